@@ -1,15 +1,18 @@
 import sys
 sys.stdout.reconfigure(encoding='utf-8')
-import pickle
 import re
-import time
-import random
 from datetime import datetime
 from bs4 import BeautifulSoup
 import pandas as pd
 from selenium import webdriver
 from selenium.webdriver.chrome.options import Options
-import requests
+from browser_profile import apply_lean_options, fetch, set_lean
+import flipkart_reviews
+from page_ready import PACER, wait_ready
+from records import ProductSnapshot
+from review_dates import parse_review_dates
+from review_pipeline import ChunkedCsvSink, ReviewDeduper, run_pipeline
+from session_manager import SessionManager, get_session_manager
 
 # ---------------------------
 # CONFIG
@@ -18,7 +21,11 @@ ASIN = "B0CS69DGSW"  # Samsung Galaxy S24 (Marble Gray, 8GB/128GB)
 MAX_PAGES_AMAZON = 30
 MAX_PAGES_FLIPKART = 10      
 DELAY_RANGE = (1, 2)
+NEAR_DUP_THRESHOLD = 0.8     # MinHash Jaccard above which cross-site reviews count as copies
+REVIEW_COLUMNS = ["Review_Title", "Review_Body", "Review_Stars", "Reviewer", "Review_Date", "Source"]
 FLIPKART_URL = "https://www.flipkart.com/samsung-galaxy-s24-5g-snapdragon-marble-grey-128-gb/product-reviews/itm8f6413060b707?pid=MOBHDVFKCP3DZG4G&lid=LSTMOBHDVFKCP3DZG4GNMA6GO"
+# politeness: minimum gap between request starts, per site
+PACER.gaps.update({"amazon": DELAY_RANGE, "flipkart": DELAY_RANGE})
 
 
 
@@ -26,7 +33,8 @@ def clean_text(t):
     return ' '.join(t.strip().split()) if t else ""
 
 # AMAZON SETUP
-def setup_driver():
+def setup_driver(lean=True):
+    # lean: block images/fonts/trackers and return at DOMContentLoaded (see browser_profile)
     options = Options()
     options.add_argument("--headless=new")
     options.add_argument("--disable-gpu")
@@ -39,26 +47,27 @@ def setup_driver():
     options.add_argument(
         "user-agent=Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 Chrome/120.0 Safari/537.36"
     )
+    if lean:
+        apply_lean_options(options)
     driver = webdriver.Chrome(options=options)
     driver.execute_script("Object.defineProperty(navigator, 'webdriver', {get: () => undefined})")
+    set_lean(driver, lean, default=True)
     return driver
 
-def load_cookies(driver, path="amazon_cookies.pkl"):
-    cookies = pickle.load(open(path, "rb"))
-    driver.get("https://www.amazon.in/")
-    for cookie in cookies:
-        if 'expiry' in cookie:
-            del cookie['expiry']  # avoid datetime serialization issues
-        driver.add_cookie(cookie)
-    print(f"✅ Loaded {len(cookies)} cookies.")
-    time.sleep(2)
+def load_cookies(driver, path=None):
+    # shared jar (see session_manager): checked for expiry, refreshed if stale, injected over CDP
+    manager = get_session_manager("amazon") if path is None else SessionManager("amazon", cookie_file=path)
+    manager.ensure_fresh()
+    print(f"✅ Loaded {manager.attach(driver)} cookies.")
+    return manager
 
 # AMAZON SCRAPER
 def extract_product_metadata(driver):
     PRODUCT_URL = f"https://www.amazon.in/dp/{ASIN}"
     REVIEWS_URL = f"https://www.amazon.in/product-reviews/{ASIN}/?ie=UTF8&reviewerType=all_reviews"
-    driver.get(PRODUCT_URL)
-    time.sleep(random.uniform(*DELAY_RANGE))
+    PACER.wait("amazon")
+    fetch(driver, PRODUCT_URL)
+    wait_ready(driver, "amazon-product")
     soup = BeautifulSoup(driver.page_source, "html.parser")
 
     # Helper function
@@ -131,14 +140,14 @@ def extract_amazon_reviews_from_page(soup):
         })
     return reviews
 
-def scrape_amazon_reviews(driver, asin, max_pages=MAX_PAGES_AMAZON):
-    all_reviews = []
+def iter_amazon_reviews(driver, asin, max_pages=MAX_PAGES_AMAZON):
     seen_hashes = set()
     for page in range(1, max_pages+1):
         print(f"\n--> Amazon-Page {page}")
         url = f"https://www.amazon.in/product-reviews/{asin}/?ie=UTF8&reviewerType=all_reviews&pageNumber={page}&sortBy=recent"
-        driver.get(url)
-        time.sleep(random.uniform(*DELAY_RANGE))
+        PACER.wait("amazon")
+        fetch(driver, url)
+        wait_ready(driver, "amazon-reviews")
         soup = BeautifulSoup(driver.page_source, "html.parser")
         revs = extract_amazon_reviews_from_page(soup)
         # deduplicate within amazon
@@ -146,98 +155,39 @@ def scrape_amazon_reviews(driver, asin, max_pages=MAX_PAGES_AMAZON):
             h = hash(r["Review_Title"] + r["Review_Body"])
             if h not in seen_hashes:
                 seen_hashes.add(h)
-                all_reviews.append(r)
+                yield r
         if not revs:
             print("No more Amazon reviews found.")
             break
         print(f"  → Found {len(revs)} reviews this page.")
-    return all_reviews
-
-
-# FLIPKART SCRAPER
-def scrape_flipkart(review_url, existing_hashes=set(), max_pages=MAX_PAGES_FLIPKART):
-    headers = {
-        "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 Chrome/120.0 Safari/537.36"
-    }
-
-    all_reviews = []
-
-    for page in range(1, max_pages + 1):
-        url = f"{review_url}&page={page}"
-        print(f"--> Flipkart-Page {page}")
-
-        r = requests.get(url, headers=headers)
-        soup = BeautifulSoup(r.text, "html.parser")
-
-        # NEW working review block selector
-        blocks = soup.find_all("div", class_="_27M-vq")
-
-        if not blocks:
-            print("No more Flipkart reviews found.")
-            break
-
-        for blk in blocks:
 
-            # Stars
-            stars = blk.find("div", class_="_3LWZlK")
-            stars = stars.get_text(strip=True) if stars else ""
-
-            # Title
-            title = blk.find("p", class_="_2-N8zT")
-            title = title.get_text(strip=True) if title else ""
-
-            # Body
-            body = blk.find("div", class_="t-ZTKy")
-            body = body.get_text(" ", strip=True) if body else ""
-
-            # Reviewer + Date (2 elements)
-            small_texts = blk.find_all("p", class_="_2sc7ZR")
-            reviewer = small_texts[0].get_text(strip=True) if len(small_texts) > 0 else ""
-            date = small_texts[1].get_text(strip=True) if len(small_texts) > 1 else ""
-
-            # Dedupe key
-            h = hash(title + body + date)
-
-            if h not in existing_hashes:
-                existing_hashes.add(h)
-                all_reviews.append({
-                    "Review_Title": title,
-                    "Review_Body": body,
-                    "Review_Stars": stars,
-                    "Reviewer": reviewer,
-                    "Review_Date": date,
-                    "Source": "Flipkart"
-                })
+def scrape_amazon_reviews(driver, asin, max_pages=MAX_PAGES_AMAZON):
+    return list(iter_amazon_reviews(driver, asin, max_pages))
 
-        print(f"  → Found {len(blocks)} reviews this page.")
-        time.sleep(random.uniform(1, 2))
 
-    return all_reviews
+# FLIPKART SCRAPER
+def iter_flipkart_reviews(review_url, existing_hashes=None, max_pages=MAX_PAGES_FLIPKART, workers=4):
+    # page count is read from page 1, the remaining pages are fetched concurrently by URL (flipkart_reviews)
+    yield from flipkart_reviews.iter_reviews(review_url, max_pages, workers, existing_hashes=existing_hashes)
 
-# ---------------------------
-# Deduplicate Reviews
-# ---------------------------
-def deduplicate_reviews(reviews):
-    seen = set()
-    unique_reviews = []
-    for r in reviews:
-        key = (r.get("Review_Title"), r.get("Review_Body"))
-        if key not in seen:
-            seen.add(key)
-            unique_reviews.append(r)
-    return unique_reviews
+def scrape_flipkart(review_url, existing_hashes=None, max_pages=MAX_PAGES_FLIPKART):
+    return list(iter_flipkart_reviews(review_url, existing_hashes, max_pages))
 
 # ---------------------------
-# SAVE TO EXCEL
+# STREAMING ENRICHMENT
 # ---------------------------
-def save_to_excel(product_data, reviews):
-    df = pd.DataFrame(reviews)
-    for col in product_data:
-        if col not in df.columns:
-            df[col] = product_data[col]
-    file = f"product_reviews_combined_{ASIN}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.xlsx"
-    df.to_excel(file, index=False)
-    print(f"✅ Saved {len(df)} reviews to {file}")
+def make_enricher(product_data):
+    # product columns are added to every review record; prices etc. are parsed once here
+    product_data = {**product_data, **ProductSnapshot.from_raw(product_data).numeric_fields()}
+
+    def enrich(record):
+        record = dict(record)
+        ts = parse_review_dates(pd.Series([record.get("Review_Date", "")]), product_data.get("Scraped_At")).iloc[0]
+        record["Review_Timestamp"] = ts if pd.notna(ts) else None
+        for col, value in product_data.items():
+            record.setdefault(col, value)
+        return record
+    return enrich
 
 # ---------------------------
 # MAIN FUNCTION
@@ -246,23 +196,27 @@ if __name__ == "__main__":
     driver = setup_driver()
 
     try:
-        load_cookies(driver)
+        session = load_cookies(driver)
 
         amazon_data = extract_product_metadata(driver)
-        amazon_reviews = scrape_amazon_reviews(driver, ASIN, MAX_PAGES_AMAZON)
 
-        seen_hashes = set(hash(r["Review_Title"] + r["Review_Body"]) for r in amazon_reviews)
-
-        flipkart_reviews = scrape_flipkart(
-            FLIPKART_URL,
-            existing_hashes=seen_hashes,
-            max_pages=MAX_PAGES_FLIPKART
+        # Amazon (Selenium) and Flipkart (requests) extract concurrently; reviews are
+        # deduplicated, enriched and appended to the CSV in chunks as they arrive.
+        out_file = f"product_reviews_combined_{ASIN}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv"
+        deduper = ReviewDeduper(NEAR_DUP_THRESHOLD)
+        enricher = make_enricher(amazon_data)
+        sink = ChunkedCsvSink(out_file, columns=REVIEW_COLUMNS + ["Review_Timestamp"] + list(amazon_data)
+                              + list(ProductSnapshot.from_raw(amazon_data).numeric_fields()))
+        saved = run_pipeline(
+            extractors=[
+                iter_amazon_reviews(driver, ASIN, MAX_PAGES_AMAZON),
+                iter_flipkart_reviews(FLIPKART_URL, max_pages=MAX_PAGES_FLIPKART),
+            ],
+            stages=[deduper, enricher],
+            sink=sink,
         )
-
-        all_reviews = amazon_reviews + flipkart_reviews
-        all_reviews = deduplicate_reviews(all_reviews)
-
-        save_to_excel(amazon_data, all_reviews)
+        print(f"✅ Saved {saved} reviews to {out_file} ({deduper.dropped} duplicates dropped)")
+        session.save_from_driver(driver)  # keep cookies Amazon rotated during the run
 
     finally:
         driver.quit()
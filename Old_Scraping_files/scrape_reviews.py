@@ -1,4 +1,5 @@
-import time
+import os
+import sys
 import pandas as pd
 from selenium import webdriver
 from selenium.webdriver.chrome.service import Service
@@ -7,6 +8,10 @@ from selenium.webdriver.chrome.options import Options
 from bs4 import BeautifulSoup
 from webdriver_manager.chrome import ChromeDriverManager
 
+# shared scraper helpers live one level up
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from page_ready import PACER, wait_ready
+
 def init_driver():
     options = Options()
     options.add_argument("--headless")  # you can remove to visually debug
@@ -16,8 +21,9 @@ def init_driver():
     return driver
 
 def scrape_flipkart_reviews(driver, product_url, max_pages=3):
+    PACER.wait("flipkart")
     driver.get(product_url)
-    time.sleep(3)
+    wait_ready(driver, "flipkart-product")
 
     # Try to get product title
     try:
@@ -30,8 +36,9 @@ def scrape_flipkart_reviews(driver, product_url, max_pages=3):
     reviews = []
     for page_num in range(1, max_pages + 1):
         review_page_url = f"{product_url}&page={page_num}"
+        PACER.wait("flipkart")
         driver.get(review_page_url)
-        time.sleep(2)
+        wait_ready(driver, "flipkart-reviews")
 
         soup = BeautifulSoup(driver.page_source, "html.parser")
 
@@ -62,7 +69,6 @@ def scrape_flipkart_reviews(driver, product_url, max_pages=3):
             })
 
         print(f"✅ Page {page_num} done — total reviews: {len(reviews)}")
-        time.sleep(2)
 
     return reviews
 
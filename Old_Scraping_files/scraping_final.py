@@ -6,7 +6,7 @@
 
 import os
 import re
-import time
+import sys
 import json
 import random
 import requests
@@ -18,11 +18,17 @@ from bs4 import BeautifulSoup
 from selenium import webdriver
 from selenium.webdriver.chrome.service import Service
 from selenium.webdriver.chrome.options import Options
-from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 from webdriver_manager.chrome import ChromeDriverManager
 
+# shared scraper helpers live one level up
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from flipkart_reviews import iter_review_soups
+from page_ready import wait_ready
+from review_dates import parse_review_dates
+from selector_registry import REGISTRY
+
 # Optional sentiment (TextBlob)
 try:
     from textblob import TextBlob
@@ -171,64 +177,26 @@ def init_driver(headless=True):
     return driver
 
 # -------------------------------
-# Flipkart metadata extraction (many fallbacks)
+# Flipkart metadata extraction (fallback chains live in selector_registry.CHAINS)
 # -------------------------------
 def scrape_flipkart_metadata(driver):
     print("[flipkart] Scraping product metadata...")
     soup = BeautifulSoup(driver.page_source, "html.parser")
-    # product name
-    name = None
-    name_selectors = ["span.B_NuCI", "span._35KyD6", "div._1Mh3u3 h1", "span._35KyD6"]
-    for sel in name_selectors:
-        el = soup.select_one(sel)
-        if el and el.get_text(strip=True):
-            name = el.get_text(strip=True)
-            break
-    # brand fallback: first word or seller link
-    brand = None
-    try:
-        brand_tag = soup.select_one("a._2whKao") or soup.select_one("span._2apC")
-        if brand_tag:
-            brand = brand_tag.get_text(strip=True)
-    except Exception:
-        brand = None
-    # price
-    price = None
-    psel = soup.select_one("div._30jeq3._16Jk6d") or soup.select_one("div._30jeq3")
-    if psel:
-        price = psel.get_text(strip=True).replace("₹", "").replace(",", "")
-    # MRP
-    mrp = None
-    mrpsel = soup.select_one("div._3I9_wc._2p6lqe") or soup.select_one("div._3I9_wc")
-    if mrpsel:
-        mrp = mrpsel.get_text(strip=True).replace("₹", "").replace(",", "")
-    # discount
-    discount = None
-    dsel = soup.select_one("div._3Ay6Sb._31Dcoz") or soup.select_one("div._3Ay6Sb")
-    if dsel:
-        discount = dsel.get_text(strip=True)
-    # rating
-    rating = None
-    rat = soup.select_one("div._3LWZlK") or soup.select_one("span._2_R_DZ")
-    if rat:
-        rating = rat.get_text(strip=True)
-    # reviews count
-    reviews_count = None
-    rc = soup.select_one("span._2_R_DZ") or soup.select_one("span._2s6RMp")
-    if rc:
-        reviews_count = rc.get_text(strip=True)
-
-    # seller & stock
-    seller = None
-    stock = None
-    # seller often in 'a._2whKao' or 'div._3k-BhJ'
-    seller_tag = soup.select_one("a._2whKao") or soup.select_one("div._3k-BhJ")
-    if seller_tag:
-        seller = seller_tag.get_text(strip=True)
-    # stock availability
-    stock_tag = soup.select_one("div._16FRp0") or soup.select_one("div._2o7WAb")
-    if stock_tag:
-        stock = stock_tag.get_text(strip=True)
+    # each field: first selector of its chain that has text; the last winner is tried first
+    name = REGISTRY.text(soup, "flipkart", "product_name")
+    brand = REGISTRY.text(soup, "flipkart", "brand")
+    price = REGISTRY.text(soup, "flipkart", "price")
+    if price:
+        price = price.replace("₹", "").replace(",", "")
+    mrp = REGISTRY.text(soup, "flipkart", "mrp")
+    if mrp:
+        mrp = mrp.replace("₹", "").replace(",", "")
+    discount = REGISTRY.text(soup, "flipkart", "discount")
+    rating = REGISTRY.text(soup, "flipkart", "rating")
+    reviews_count = REGISTRY.text(soup, "flipkart", "reviews_count")
+    seller = REGISTRY.text(soup, "flipkart", "seller")
+    stock = REGISTRY.text(soup, "flipkart", "stock")
+    REGISTRY.save()
 
     # Product ASIN or product id in URL often; we try to parse from meta or scripts
     product_asin = None
@@ -264,48 +232,20 @@ def scrape_flipkart_metadata(driver):
 def scrape_flipkart_reviews_full(driver):
     """
     Assumes driver is on the product page.
-    Clicks 'View all reviews' or scrolls to review section and paginates through Next(s).
+    Fetches every review-listing page (see flipkart_reviews.iter_review_soups).
     Returns DataFrame of reviews.
     """
     print("[flipkart] Starting full reviews scrape (may take time)...")
     reviews = []
-    # Try to open 'See all reviews' link
-    try:
-        # common anchor: "View All" link or "See all reviews"
-        # Buttons can be dynamic; search for anchors containing 'All reviews'
-        anchors = driver.find_elements(By.TAG_NAME, "a")
-        found_link = None
-        for a in anchors:
-            try:
-                text = a.text.strip().lower()
-                if "all reviews" in text or "see all" in text or "view all reviews" in text:
-                    found_link = a.get_attribute("href")
-                    break
-            except Exception:
-                continue
-        if found_link:
-            driver.get(found_link)
-            time.sleep(2)
-        else:
-            # try to scroll to reviews section on same page
-            driver.execute_script("window.scrollTo(0, document.body.scrollHeight/2);")
-            time.sleep(1.5)
-    except Exception:
-        pass
-
-    # now on reviews listing (or still on product page)
-    while True:
-        soup = BeautifulSoup(driver.page_source, "html.parser")
-        # Flipkart review text selectors have varied. Try several:
-        review_blocks = soup.select("div._16PBlm") or soup.select("div._27M-vq") or soup.select("div._1AtVbE div[class*='col-']")
-
-        if not review_blocks:
-            # alternative: find review containers by data-test attributes
-            review_blocks = soup.select("div._2kS5Gq") or soup.select("div.dhYmqp")
+    # Listing URL and page count come from the first page; the rest are fetched
+    # concurrently by URL, with the browser (and Next clicks) only as fallback.
+    for page, soup in iter_review_soups(driver.current_url, driver=driver):
+        # Flipkart review containers have varied; the registry tries the last winner first
+        review_blocks = REGISTRY.select(soup, "flipkart", "review_blocks")
 
         if not review_blocks:
             # fallback: try to find short review text nodes
-            text_items = soup.select("div.t-ZTKy div") or soup.select("div._1c3YSN")
+            text_items = REGISTRY.select(soup, "flipkart", "review_text_nodes")
             for t in text_items:
                 txt = t.get_text(" ", strip=True)
                 if txt:
@@ -317,15 +257,15 @@ def scrape_flipkart_reviews_full(driver):
                 r_text = None
                 r_rating = None
                 # possible text ele
-                t1 = rb.select_one("div.t-ZTKy div") or rb.select_one("div._3LWZlK") or rb.select_one("div.qwjRop")
+                t1 = REGISTRY.select_one(rb, "flipkart", "review_text")
                 if t1:
                     r_text = t1.get_text(" ", strip=True)
                 # rating may be in span._3LWZlK or div._3LWZlK
-                r_rat = rb.select_one("div._3LWZlK") or rb.select_one("span._2_R_DZ")
+                r_rat = REGISTRY.select_one(rb, "flipkart", "review_rating")
                 if r_rat:
                     r_rating = r_rat.get_text(strip=True)
                 # review date
-                date_tag = rb.select_one("p._2sc7ZR._2V5EHH") or rb.select_one("div._2fxQ4u")
+                date_tag = REGISTRY.select_one(rb, "flipkart", "review_date")
                 r_date = date_tag.get_text(strip=True) if date_tag else "N/A"
 
                 # clean text
@@ -338,43 +278,11 @@ def scrape_flipkart_reviews_full(driver):
                         **feats
                     })
 
-        # Try to click 'Next' button
-        try:
-            next_btn = None
-            # Try locating by aria-label or text
-            next_btn_elem = driver.find_elements(By.XPATH, "//a[contains(text(),'Next') or contains(text(),'next') or contains(@aria-label,'Next')]")
-            if next_btn_elem:
-                # filter visible
-                clicked = False
-                for el in next_btn_elem:
-                    try:
-                        if el.is_displayed():
-                            el.click()
-                            clicked = True
-                            time.sleep(1.5)
-                            break
-                    except Exception:
-                        continue
-                if not clicked:
-                    break
-            else:
-                # try pagination button with class
-                np = driver.find_elements(By.CSS_SELECTOR, "a._1LKTO3")
-                clicked = False
-                for el in np:
-                    try:
-                        if el.is_displayed() and 'Next' in el.text:
-                            el.click()
-                            clicked = True
-                            time.sleep(1.5)
-                            break
-                    except Exception:
-                        continue
-                if not clicked:
-                    break
-        except Exception:
-            break
-
+    REGISTRY.save()
+    dead = REGISTRY.dead("flipkart")
+    if dead:
+        print(f"[flipkart] Dead selectors (no match in {REGISTRY.dead_after} lookups): "
+              + ", ".join(f"{r['field']}={r['selector']}" for r in dead))
     if not reviews:
         print("[flipkart] No reviews collected by selectors.")
         return None
@@ -412,9 +320,11 @@ def merge_and_save_final(metadata: dict, reviews_df: pd.DataFrame, slug: str):
         if col not in reviews_df.columns:
             reviews_df[col] = "N/A"
 
-    # add date column if missing
-    if "date" not in reviews_df.columns:
-        reviews_df["date"] = datetime.now().strftime("%Y-%m-%d")
+    # typed review date: relative Flipkart dates resolve against the scrape time; unknown stays N/A
+    raw_dates = reviews_df["date"] if "date" in reviews_df.columns else pd.Series("", index=reviews_df.index)
+    reviews_df["date_raw"] = raw_dates
+    parsed = parse_review_dates(raw_dates.replace("N/A", ""), metadata.get("scraped_at"))
+    reviews_df["date"] = parsed.dt.strftime("%Y-%m-%d").fillna("N/A")
 
     # add platform
     reviews_df["platform"] = "flipkart"
@@ -458,7 +368,7 @@ def main():
 
     driver = init_driver(headless=HEADLESS)
     driver.get(product_url)
-    time.sleep(2)
+    wait_ready(driver, "flipkart-product")
 
     # 3) Scrape metadata
     metadata = scrape_flipkart_metadata(driver)
@@ -0,0 +1,157 @@
+# enrichment_cache.py
+# Persistent product-detail cache keyed by ASIN, with a TTL per field.
+#
+#   python enrichment_cache.py stats
+#   python enrichment_cache.py purge --older-than 30
+#
+# scrape_product_page() opens a product page only to read Seller (bylineInfo)
+# and Stock_Status (availability). Seller changes rarely, stock changes often,
+# so each field is stored with its own fetch time and TTL. A page is visited
+# only when at least one requested field is stale; the visit then refreshes every
+# field. Failed lookups ("Not Available") are never cached, so they are retried
+# on the next run.
+
+import argparse
+import os
+import sqlite3
+import sys
+import threading
+import time
+from collections import Counter
+
+CACHE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "Scraping", "enrichment_cache.sqlite")
+
+# seconds
+DEFAULT_TTLS = {
+    "Stock_Status": 30 * 60,
+    "Seller": 7 * 24 * 3600,
+}
+
+MISSING = "Not Available"
+
+
+class EnrichmentCache:
+    def __init__(self, path=CACHE_PATH, ttls=None):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.ttls = dict(DEFAULT_TTLS, **(ttls or {}))
+        # shared by the enrichment worker threads of search_pipeline.SearchCrawler
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS details ("
+            " asin TEXT, field TEXT, value TEXT, fetched_at REAL, PRIMARY KEY (asin, field))"
+        )
+        self._lock = threading.Lock()
+        self.hits = Counter()
+        self.misses = Counter()
+        self.fetches = 0
+
+    def close(self):
+        self.conn.close()
+
+    # -------------------------------
+    # Lookups
+    # -------------------------------
+    def get(self, asin, fields=None, now=None):
+        """Returns ({field: value} for fresh fields, [stale or missing fields])."""
+        fields = list(fields or self.ttls)
+        now = time.time() if now is None else now
+        marks = ",".join("?" * len(fields))
+        with self._lock:
+            rows = self.conn.execute(
+                f"SELECT field, value, fetched_at FROM details WHERE asin = ? AND field IN ({marks})",
+                [asin, *fields],
+            ).fetchall()
+        fresh = {f: v for f, v, at in rows if now - at <= self.ttls.get(f, 0)}
+        stale = [f for f in fields if f not in fresh]
+        with self._lock:
+            self.hits.update(fresh.keys())
+            self.misses.update(stale)
+        return fresh, stale
+
+    def put(self, asin, values: dict, now=None):
+        now = time.time() if now is None else now
+        rows = [(asin, f, v, now) for f, v in values.items() if v is not None and v != MISSING]
+        if not rows:
+            return
+        with self._lock, self.conn:
+            self.conn.executemany("INSERT OR REPLACE INTO details VALUES (?, ?, ?, ?)", rows)
+
+    def product_details(self, asin, url, fetch):
+        """
+        Seller / Stock_Status for one product, visiting the page only if needed.
+        fetch: url -> (seller, stock_status), e.g. web_scraping.scrape_product_page
+        """
+        fresh, stale = self.get(asin) if asin else ({}, list(self.ttls))
+        if stale:
+            seller, stock = fetch(url)
+            with self._lock:
+                self.fetches += 1
+            if asin:
+                self.put(asin, {"Seller": seller, "Stock_Status": stock})
+            # a failed visit falls back to whatever is still cached
+            fresh = {
+                "Seller": seller if seller != MISSING else fresh.get("Seller", seller),
+                "Stock_Status": stock if stock != MISSING else fresh.get("Stock_Status", stock),
+            }
+        return fresh["Seller"], fresh["Stock_Status"]
+
+    # -------------------------------
+    # Metrics / maintenance
+    # -------------------------------
+    def stats(self) -> dict:
+        lookups = sum(self.hits.values()) + sum(self.misses.values())
+        with self._lock:
+            entries = self.conn.execute("SELECT COUNT(DISTINCT asin) FROM details").fetchone()[0]
+        return {
+            "products": entries,
+            "hits": dict(self.hits),
+            "misses": dict(self.misses),
+            "hit_rate": round(sum(self.hits.values()) / lookups, 3) if lookups else None,
+            "page_fetches": self.fetches,
+        }
+
+    def staleness(self, now=None):
+        """Per field: cached products, and how many of them are past their TTL."""
+        now = time.time() if now is None else now
+        out = {}
+        with self._lock:
+            for field, ttl in self.ttls.items():
+                total, stale = self.conn.execute(
+                    "SELECT COUNT(*), COALESCE(SUM(? - fetched_at > ?), 0) FROM details WHERE field = ?",
+                    (now, ttl, field),
+                ).fetchone()
+                out[field] = {"cached": total, "stale": stale, "ttl_s": ttl}
+        return out
+
+    def purge(self, older_than_days):
+        cutoff = time.time() - older_than_days * 86400
+        with self._lock, self.conn:
+            return self.conn.execute("DELETE FROM details WHERE fetched_at < ?", (cutoff,)).rowcount
+
+
+def parse_args(argv=None):
+    p = argparse.ArgumentParser(description="Product-detail enrichment cache.")
+    p.add_argument("--db", default=CACHE_PATH)
+    sub = p.add_subparsers(dest="cmd", required=True)
+    sub.add_parser("stats", help="cached products and stale counts per field")
+    d = sub.add_parser("purge", help="drop entries fetched more than N days ago")
+    d.add_argument("--older-than", type=float, default=30)
+    return p.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    cache = EnrichmentCache(args.db)
+    try:
+        if args.cmd == "stats":
+            for field, s in cache.staleness().items():
+                print(f"[cache] {field}: {s['cached']} cached, {s['stale']} stale (ttl {s['ttl_s']}s)")
+        else:
+            print(f"[cache] Purged {cache.purge(args.older_than)} entries")
+    finally:
+        cache.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,257 @@
+# search_pipeline.py
+# Pipelined Amazon search crawler: results pages → card parsing → detail enrichment.
+#
+#   python search_pipeline.py laptops --pages 4 --fetch-workers 1 --enrich-workers 3
+#
+# scrape_amazon_search() in web_scraping.py walks pages one at a time and opens
+# every product page before moving on. Here each step is its own stage with its
+# own worker threads, connected by bounded queues:
+#
+#   page numbers ─▶ fetch (Selenium, one driver per worker, one pacer per stage) ─▶ html
+#   html ─▶ parse (BeautifulSoup → parse_card) ─▶ cards
+#   cards ─▶ enrich (Selenium, one driver per worker, one pacer per stage, scrape_product_page) ─▶ results
+#
+# So page N+1 is being fetched while the cards of page N are being enriched.
+# Queue sizes bound how far a fast stage can run ahead of a slow one, and each
+# Selenium stage has one politeness delay shared by all of its workers, counted
+# from request start; pages are read as soon as page_ready sees the result cards.
+
+import argparse
+import os
+import queue
+import sys
+import threading
+import time
+
+from bs4 import BeautifulSoup
+
+from enrichment_cache import CACHE_PATH, EnrichmentCache
+
+# shared scraper helpers live one level up
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from browser_profile import STATS as FETCH_STATS, fetch
+from page_ready import STATS as READY_STATS, Pacer, wait_ready
+from web_scraping import init_driver, parse_card, save_products, scrape_product_page
+
+_END = object()
+
+
+class StageStats:
+    def __init__(self, name):
+        self.name = name
+        self.items = 0
+        self.busy = 0.0
+        self.errors = 0
+        self._lock = threading.Lock()
+
+    def record(self, seconds, ok=True):
+        with self._lock:
+            self.items += 1
+            self.busy += seconds
+            self.errors += 0 if ok else 1
+
+    def as_dict(self):
+        return {"stage": self.name, "items": self.items, "errors": self.errors, "busy_s": round(self.busy, 2)}
+
+
+def _run_workers(n, target, *args):
+    threads = [threading.Thread(target=target, args=args, daemon=True) for _ in range(n)]
+    for t in threads:
+        t.start()
+    return threads
+
+
+def _close_stage(threads, out_q, n_downstream):
+    # runs on its own thread: once every worker of a stage is done, tell each downstream worker
+    for t in threads:
+        t.join()
+    for _ in range(n_downstream):
+        out_q.put(_END)
+
+
+class SearchCrawler:
+    """
+    fetch_workers / parse_workers / enrich_workers: threads per stage
+    queue_limit:  max pages (html) and cards waiting between stages
+    page_delay:   minimum gap between results-page requests, per stage (shared by all fetch workers)
+    enrich_delay: minimum gap between product-page visits, per stage (shared by all enrich workers)
+    enrich:       False skips product-page visits (Seller / Stock_Status stay at their defaults)
+    cache:        optional EnrichmentCache; products with fresh cached details are not visited
+    """
+
+    def __init__(self, fetch_workers=1, parse_workers=1, enrich_workers=3, queue_limit=50,
+                 page_delay=3.0, enrich_delay=0.5, enrich=True, wait_timeout=10, cache=None):
+        self.fetch_workers = fetch_workers
+        self.parse_workers = parse_workers
+        self.enrich_workers = enrich_workers if enrich else 0
+        self.queue_limit = queue_limit
+        self.page_delay = page_delay
+        self.enrich_delay = enrich_delay
+        self.wait_timeout = wait_timeout
+        self.cache = cache
+        self.stats = {name: StageStats(name) for name in ("fetch", "parse", "enrich")}
+
+    # -------------------------------
+    # Stages
+    # -------------------------------
+    def _fetch(self, base_url, page_q, html_q, pacer):
+        driver = init_driver()
+        try:
+            while True:
+                try:
+                    page = page_q.get_nowait()
+                except queue.Empty:
+                    return
+                url = f"{base_url}&page={page}"
+                print(f"🔍 Fetching page {page}: {url}")
+                pacer.wait()
+                t0 = time.perf_counter()
+                try:
+                    fetch(driver, url)
+                    if wait_ready(driver, "amazon-search", timeout=self.wait_timeout) == "timeout":
+                        raise TimeoutError("no search results rendered")
+                    html_q.put((page, driver.page_source))
+                    self.stats["fetch"].record(time.perf_counter() - t0)
+                except Exception as e:
+                    print(f"❌ Page {page} failed: {e}")
+                    self.stats["fetch"].record(time.perf_counter() - t0, ok=False)
+        finally:
+            driver.quit()
+
+    def _parse(self, html_q, card_q, results):
+        while True:
+            item = html_q.get()
+            if item is _END:
+                return
+            page, html = item
+            t0 = time.perf_counter()
+            try:
+                soup = BeautifulSoup(html, "html.parser")
+                cards = soup.find_all("div", {"data-component-type": "s-search-result"})
+            except Exception as e:
+                # keep consuming, otherwise the fetch stage blocks on a full queue
+                print(f"❌ Page {page} could not be parsed: {e}")
+                self.stats["parse"].record(time.perf_counter() - t0, ok=False)
+                continue
+            for pos, card in enumerate(cards):
+                data = parse_card(card)
+                if not data:
+                    continue
+                if card_q is not None and data["Product_Link"]:
+                    card_q.put((page, pos, data))
+                else:
+                    results.append((page, pos, data))
+            print(f"📄 Page {page}: {len(cards)} cards")
+            self.stats["parse"].record(time.perf_counter() - t0)
+
+    def _enrich(self, card_q, results, pacer):
+        try:
+            driver = init_driver()
+        except Exception as e:
+            # keep cards flowing un-enriched rather than stalling the parse stage
+            print(f"❌ Enrichment driver failed to start: {e}")
+            driver = None
+        try:
+            while True:
+                item = card_q.get()
+                if item is _END:
+                    return
+                page, pos, data = item
+                if driver is None:
+                    results.append((page, pos, data))
+                    continue
+                t0 = time.perf_counter()
+                paused = []
+
+                def visit(url):
+                    paused.append(pacer.wait())
+                    return scrape_product_page(url, driver)
+
+                if self.cache is not None:
+                    data["Seller"], data["Stock_Status"] = self.cache.product_details(
+                        data["Product_ASIN"], data["Product_Link"], visit)
+                else:
+                    data["Seller"], data["Stock_Status"] = visit(data["Product_Link"])
+                results.append((page, pos, data))
+                self.stats["enrich"].record(time.perf_counter() - t0 - sum(paused), ok=data["Seller"] != "Not Available")
+        finally:
+            if driver is not None:
+                driver.quit()
+
+    # -------------------------------
+    # Run
+    # -------------------------------
+    def crawl(self, keyword, num_pages=2):
+        base_url = f"https://www.amazon.in/s?k={keyword.replace(' ', '+')}"
+        page_q = queue.Queue()
+        for page in range(1, num_pages + 1):
+            page_q.put(page)
+        html_q = queue.Queue(self.queue_limit)
+        card_q = queue.Queue(self.queue_limit) if self.enrich_workers else None
+        results = []  # list.append is atomic; order is restored below
+        # one pacer per stage, shared by its workers: the stage's request rate is 1/delay however many workers
+        fetch_pacer = Pacer(default=(self.page_delay, self.page_delay))
+        enrich_pacer = Pacer(default=(self.enrich_delay, self.enrich_delay))
+
+        fetchers = _run_workers(self.fetch_workers, self._fetch, base_url, page_q, html_q, fetch_pacer)
+        parsers = _run_workers(self.parse_workers, self._parse, html_q, card_q, results)
+        enrichers = _run_workers(self.enrich_workers, self._enrich, card_q, results, enrich_pacer) if card_q else []
+
+        closers = [threading.Thread(target=_close_stage, args=(fetchers, html_q, self.parse_workers), daemon=True)]
+        if card_q is not None:
+            closers.append(threading.Thread(target=_close_stage, args=(parsers, card_q, self.enrich_workers),
+                                            daemon=True))
+        for t in closers:
+            t.start()
+        for t in fetchers + parsers + enrichers + closers:
+            t.join()
+
+        results.sort(key=lambda r: (r[0], r[1]))
+        return [data for _, _, data in results]
+
+
+def parse_args(argv=None):
+    p = argparse.ArgumentParser(description="Pipelined Amazon search crawler.")
+    p.add_argument("keyword", nargs="?", default="laptops")
+    p.add_argument("--pages", type=int, default=4)
+    p.add_argument("--fetch-workers", type=int, default=1)
+    p.add_argument("--parse-workers", type=int, default=1)
+    p.add_argument("--enrich-workers", type=int, default=3)
+    p.add_argument("--queue-limit", type=int, default=50, help="max items waiting between two stages")
+    p.add_argument("--page-delay", type=float, default=3.0, help="seconds between results pages, per stage")
+    p.add_argument("--enrich-delay", type=float, default=0.5, help="seconds between product pages, per stage")
+    p.add_argument("--no-enrich", action="store_true", help="skip product-page visits")
+    p.add_argument("--cache", default=CACHE_PATH, help="ASIN enrichment cache (SQLite)")
+    p.add_argument("--no-cache", action="store_true", help="visit every product page")
+    return p.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    cache = None if args.no_cache else EnrichmentCache(args.cache)
+    crawler = SearchCrawler(args.fetch_workers, args.parse_workers, args.enrich_workers, args.queue_limit,
+                            args.page_delay, args.enrich_delay, enrich=not args.no_enrich, cache=cache)
+    print(f"\n🚀 Starting the pipelined scrape for: {args.keyword}")
+    t0 = time.perf_counter()
+    try:
+        products = crawler.crawl(args.keyword, args.pages)
+    finally:
+        if cache is not None:
+            print(f"[pipeline] enrichment cache: {cache.stats()}")
+            cache.close()
+    elapsed = time.perf_counter() - t0
+
+    for s in crawler.stats.values():
+        print(f"[pipeline] {s.as_dict()}")
+    print(f"[pipeline] page loads: {FETCH_STATS.summary()}")
+    print(f"[pipeline] readiness waits: {READY_STATS.summary()}")
+    if not products:
+        print("❌ No products scraped. CSV not created.")
+        return 1
+    filepath = save_products(products, args.keyword)
+    print(f"\n✅ Scraped {len(products)} products in {elapsed:.1f}s saved to: {filepath}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -2,18 +2,24 @@ import pandas as pd
 from selenium import webdriver
 from selenium.webdriver.chrome.service import Service
 from selenium.webdriver.chrome.options import Options
-from selenium.webdriver.common.by import By
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
 from webdriver_manager.chrome import ChromeDriverManager
 from bs4 import BeautifulSoup
 from datetime import datetime
-import time
 import csv
+import os
 import re
+import sys
+
+from enrichment_cache import EnrichmentCache
+
+# shared scraper helpers live one level up
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from browser_profile import apply_lean_options, fetch, set_lean
+from page_ready import Pacer, wait_ready
 
 # Setup Chrome WebDriver
-def init_driver():
+# lean: block images/fonts/trackers and return at DOMContentLoaded (see browser_profile)
+def init_driver(lean=True):
     chrome_options = Options()
     chrome_options.add_argument("--headless")  # run browser invisibly
     chrome_options.add_argument("--disable-gpu")
@@ -22,9 +28,13 @@ def init_driver():
     chrome_options.add_argument("--disable-dev-shm-usage")
     chrome_options.add_argument("--lang=en-IN")
 
+    if lean:
+        apply_lean_options(chrome_options)
+
     #Automatically downloads the correct ChromeDriver
     service = Service(ChromeDriverManager().install())
     driver = webdriver.Chrome(service=service, options=chrome_options)
+    set_lean(driver, lean, default=True)
     return driver
 
 # ✅ Helper: clean text safely
@@ -33,8 +43,8 @@ def clean_text(text):
         return None
     return re.sub(r'\s+', ' ', text).strip()
 
-# ✅ Extract data from individual product cards
-def parse_product(card):
+# ✅ Extract data from individual product cards (no page visits)
+def parse_card(card):
     try:
         name_tag = card.find("h2", class_="a-size-medium")
         name = clean_text(name_tag.text) if name_tag else None
@@ -63,42 +73,48 @@ def parse_product(card):
         reviews_tag = card.find("span", {"aria-label": re.compile(r"\d+ ratings?")})
         reviews = clean_text(reviews_tag["aria-label"].split()[0]) if reviews_tag else None
 
-        # ✅ Default placeholders
-        stock_status = "Unknown"
-        seller = None
-
-        # ✅ Visit product page to extract seller & stock info
-        if link:
-            seller, stock_status = scrape_product_page(link)
-
-        data = {
+        return {
             "Product_Name": name,
             "Product_ASIN": asin,
             "Brand": brand,
             "Price": price,
             "MRP": mrp,
             "Discount": discount,
-            "Stock_Status": stock_status,
+            # ✅ Default placeholders, filled in by scrape_product_page
+            "Stock_Status": "Unknown",
             "Rating": rating,
             "Reviews": reviews,
-            "Seller": seller,
+            "Seller": None,
             "Product_Link": link,
             "Reviews_Link": f"{link}#customerReviews" if link else None,
             "Scraped_At": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
         }
 
-        return data
-
     except Exception as e:
         print(f"Error parsing product: {e}")
         return None
 
+# ✅ Card + product page visit for Seller & Stock
+# With an EnrichmentCache the page is only visited when the cached fields are stale.
+def parse_product(card, cache=None):
+    data = parse_card(card)
+    if data and data["Product_Link"]:
+        if cache is not None:
+            data["Seller"], data["Stock_Status"] = cache.product_details(
+                data["Product_ASIN"], data["Product_Link"], scrape_product_page)
+        else:
+            data["Seller"], data["Stock_Status"] = scrape_product_page(data["Product_Link"])
+    return data
+
 # ✅ Scrape individual product pages for Seller & Stock
-def scrape_product_page(url):
+# Pass a driver to reuse it; otherwise a fresh one is started and closed.
+def scrape_product_page(url, driver=None):
+    own_driver = driver is None
     try:
-        driver = init_driver()
-        driver.get(url)
-        WebDriverWait(driver, 10).until(EC.presence_of_element_located((By.TAG_NAME, "body")))
+        if own_driver:
+            driver = init_driver()
+        fetch(driver, url)
+        wait_ready(driver, "amazon-product", timeout=10)
         soup = BeautifulSoup(driver.page_source, "html.parser")
 
         # Seller info
@@ -109,76 +125,82 @@ def scrape_product_page(url):
         stock_tag = soup.find("div", id="availability")
         stock_status = clean_text(stock_tag.text) if stock_tag else "Not Available"
 
-        driver.quit()
         return seller, stock_status
 
     except Exception:
-        driver.quit()
         return "Not Available", "Not Available"
 
+    finally:
+        if own_driver and driver is not None:
+            driver.quit()
+
 # ✅ Scrape Search Results
-def scrape_amazon_search(keyword, num_pages=2):
+def scrape_amazon_search(keyword, num_pages=2, cache=None):
     base_url = f"https://www.amazon.in/s?k={keyword.replace(' ', '+')}"
     driver = init_driver()
+    pacer = Pacer(default=(3.0, 3.0))  # at most one results page every 3 s
     all_products = []
 
     try:
         for page in range(1, num_pages + 1):
             url = f"{base_url}&page={page}"
             print(f"🔍 Scraping page {page}: {url}")
-            driver.get(url)
+            pacer.wait()
+            fetch(driver, url)
 
-            # Wait for page to load fully
-            WebDriverWait(driver, 10).until(
-                EC.presence_of_all_elements_located((By.CSS_SELECTOR, "div.s-main-slot"))
-            )
-            time.sleep(2)
+            # Wait until the result cards are rendered
+            wait_ready(driver, "amazon-search", timeout=10)
 
             soup = BeautifulSoup(driver.page_source, "html.parser")
             product_cards = soup.find_all("div", {"data-component-type": "s-search-result"})
 
             for card in product_cards:
-                product_data = parse_product(card)
+                product_data = parse_product(card, cache)
                 if product_data:
                     all_products.append(product_data)
 
-            time.sleep(3)
-
     finally:
         driver.quit()
 
     return all_products
 
-# ✅ Main Execution
-if __name__ == "__main__":
-    import os
-    keyword = "laptops"
-    print(f"\n🚀 Starting the scrape for: {keyword}")
-    products = scrape_amazon_search(keyword, num_pages = 4)
+# ✅ Save products inside the Scraping folder
+def save_products(products, keyword):
+    df = pd.DataFrame(products)
+    df.fillna("N/A", inplace=True)
+    df.replace(r'\s+', ' ', regex=True, inplace=True)
 
-    if products:
-        df = pd.DataFrame(products)
-        df.fillna("N/A", inplace=True)
-        df.replace(r'\s+', ' ', regex=True, inplace=True)
+    # ✅ Path to Scraping folder
+    output_dir = os.path.join(os.path.dirname(__file__), "Scraping")
 
-        # ✅ Path to Scraping folder
-        output_dir = os.path.join(os.path.dirname(__file__), "Scraping")
+    # ✅ Check if folder exists
+    if not os.path.exists(output_dir):
+        os.makedirs(output_dir)
+        print("📁 'Scraping' folder was not found, so it has been created.")
+    else:
+        print("📂 'Scraping' folder already exists — saving file inside it.")
 
-        # ✅ Check if folder exists
-        if not os.path.exists(output_dir):
-            os.makedirs(output_dir)
-            print("📁 'Scraping' folder was not found, so it has been created.")
-        else:
-            print("📂 'Scraping' folder already exists — saving file inside it.")
+    # ✅ Define simple, fixed filename
+    filename = f"amazon_products_{keyword}.csv"
+    filepath = os.path.join(output_dir, filename)
 
-        # ✅ Define simple, fixed filename
-        filename = f"amazon_products_{keyword}.csv"
-        filepath = os.path.join(output_dir, filename)
+    # ✅ Save CSV inside existing Scraping folder
+    df.to_csv(filepath, index=False, encoding="utf-8-sig", quoting=csv.QUOTE_ALL)
+    return filepath
 
-        # ✅ Save CSV inside existing Scraping folder
-        df.to_csv(filepath, index=False, encoding="utf-8-sig", quoting=csv.QUOTE_ALL)
+# ✅ Main Execution
+if __name__ == "__main__":
+    keyword = "laptops"
+    print(f"\n🚀 Starting the scrape for: {keyword}")
+    cache = EnrichmentCache()
+    try:
+        products = scrape_amazon_search(keyword, num_pages = 4, cache = cache)
+        print(f"📊 Enrichment cache: {cache.stats()}")
+    finally:
+        cache.close()
 
+    if products:
+        filepath = save_products(products, keyword)
         print(f"\n✅ Scraped {len(products)} products saved to: {filepath}")
     else:
         print("❌ No products scraped. CSV not created.")
-
@@ -0,0 +1,295 @@
+# aspect_extraction.py
+# Incremental aspect / keyword extraction over scraped reviews.
+#
+#   python aspect_extraction.py update files/*.xlsx          # fold in new reviews
+#   python aspect_extraction.py top --product B0CS69DGSW --k 15
+#
+# Reviews are vectorised with scikit-learn's HashingVectorizer (unigrams +
+# bigrams, fixed 2**20 columns), so there is no vocabulary to refit when a new
+# batch arrives. Per (product, period) the state keeps three sparse rows: term
+# counts, review counts mentioning the term, and the polarity sum of those
+# reviews. Top aspects are TF-IDF scores over those rows (IDF from global
+# document frequencies); aspect sentiment is the mean polarity of the reviews
+# that mention it. Work is done in chunks and only the group rows a chunk
+# touches are rewritten, so memory is bounded by chunk size plus the sparse
+# state, and an update only touches the new reviews. Reviews already folded in
+# are remembered in a fixed-size Bloom filter rather than a set of every
+# fingerprint ever ingested.
+
+import argparse
+import os
+import pickle
+import sys
+
+import numpy as np
+import pandas as pd
+from scipy import sparse
+
+from review_sentiment import SentimentCache, enrich_reviews
+from reviews import find_review_files, product_key, read_review_file, review_day, review_identity, review_text
+
+STATE_PATH = os.path.join("output", "aspect_state.pkl")
+N_FEATURES = 2 ** 20
+CHUNK_SIZE = 5000
+MAX_TERM_NAMES = 2_000_000
+SEEN_BITS = 2 ** 27          # 16 MiB: ~0.2% false positives at 10M reviews, ~1% at 14M
+SEEN_HASHES = 7
+
+# frequent words that are never an aspect of a phone/laptop review
+DOMAIN_STOP_WORDS = {"product", "phone", "mobile", "amazon", "flipkart", "samsung", "buy", "bought",
+                     "good", "nice", "best", "bad", "great", "excellent", "awesome", "worst", "really"}
+
+
+def make_vectorizer(n_features=N_FEATURES):
+    from sklearn.feature_extraction.text import ENGLISH_STOP_WORDS, HashingVectorizer
+
+    return HashingVectorizer(
+        n_features=n_features,
+        ngram_range=(1, 2),
+        stop_words=sorted(ENGLISH_STOP_WORDS | DOMAIN_STOP_WORDS),
+        token_pattern=r"(?u)\b[a-zA-Z][a-zA-Z]+\b",
+        alternate_sign=False,
+        norm=None,
+    )
+
+
+def hashed_column(term: str, n_features: int) -> int:
+    from sklearn.utils import murmurhash3_32
+
+    # same mapping as HashingVectorizer with alternate_sign=False
+    return abs(murmurhash3_32(term, seed=0)) % n_features
+
+
+class SeenFilter:
+    """Bloom filter over review fingerprints (sha1 hex); a false positive skips a new review."""
+
+    def __init__(self, n_bits=SEEN_BITS, n_hashes=SEEN_HASHES):
+        self.n_bits = n_bits
+        self.n_hashes = n_hashes
+        self.bits = np.zeros(n_bits // 8, dtype=np.uint8)
+
+    def _positions(self, fps):
+        # double hashing from two 64-bit slices of the digest
+        h1 = np.array([int(fp[:16], 16) for fp in fps], dtype=np.uint64)
+        h2 = np.array([int(fp[16:32], 16) | 1 for fp in fps], dtype=np.uint64)
+        i = np.arange(self.n_hashes, dtype=np.uint64)
+        return (h1[:, None] + i * h2[:, None]) % np.uint64(self.n_bits)
+
+    def contains(self, fps) -> np.ndarray:
+        if not len(fps):
+            return np.zeros(0, dtype=bool)
+        pos = self._positions(fps)
+        hit = (self.bits[pos >> np.uint64(3)] >> (pos & np.uint64(7)).astype(np.uint8)) & 1
+        return hit.all(axis=1).astype(bool)
+
+    def add(self, fps):
+        if not len(fps):
+            return
+        pos = self._positions(fps).ravel()
+        np.bitwise_or.at(self.bits, pos >> np.uint64(3), (1 << (pos & np.uint64(7))).astype(np.uint8))
+
+
+class AspectState:
+    def __init__(self, n_features=N_FEATURES, period="M"):
+        self.n_features = n_features
+        self.period = period
+        self.groups = {}  # (product, period) -> row
+        # one 1 x n_features CSR row per group; a chunk replaces only the rows it touches
+        self.term_counts = []
+        self.doc_counts = []
+        self.polarity_sums = []
+        self.global_df = np.zeros(n_features, dtype=np.int64)
+        self.n_docs = 0
+        self.term_names = {}
+        self.seen = SeenFilter()
+
+    def __setstate__(self, state):
+        # whole matrices (saved state, older pickles) and older sets of fingerprints
+        self.__dict__.update(state)
+        if sparse.issparse(self.term_counts):
+            for name in ("term_counts", "doc_counts", "polarity_sums"):
+                m = getattr(self, name).tocsr()
+                setattr(self, name, [m.getrow(i) for i in range(m.shape[0])])
+        if isinstance(self.seen, set):
+            seen = SeenFilter()
+            seen.add(list(self.seen))
+            self.seen = seen
+
+    # -------------------------------
+    # Incremental update
+    # -------------------------------
+    def _group_rows(self, keys):
+        rows = []
+        empty = sparse.csr_matrix((1, self.n_features), dtype=np.float64)
+        for key in keys:
+            if key not in self.groups:
+                self.groups[key] = len(self.groups)
+                for m in (self.term_counts, self.doc_counts, self.polarity_sums):
+                    m.append(empty)
+            rows.append(self.groups[key])
+        return rows
+
+    @staticmethod
+    def _add_rows(state_rows, rows, delta):
+        for i, r in enumerate(rows):
+            state_rows[r] = state_rows[r] + delta.getrow(i)
+
+    def _remember_names(self, vectorizer, texts):
+        if len(self.term_names) >= MAX_TERM_NAMES:
+            return
+        analyze = vectorizer.build_analyzer()
+        for text in texts:
+            for term in analyze(text):
+                col = hashed_column(term, self.n_features)
+                if col not in self.term_names:
+                    self.term_names[col] = term
+
+    def update(self, df: pd.DataFrame, chunk_size=CHUNK_SIZE) -> int:
+        fps = pd.Series(review_identity(df), index=df.index)
+        df = df[~self.seen.contains(fps.tolist()) & ~fps.duplicated().to_numpy()]
+        if df.empty:
+            return 0
+
+        vectorizer = make_vectorizer(self.n_features)
+        fmt = "%Y-%m" if self.period == "M" else "%G-W%V"
+        for start in range(0, len(df), chunk_size):
+            chunk = df.iloc[start:start + chunk_size]
+            texts = review_text(chunk).tolist()
+            X = vectorizer.transform(texts).tocsr()
+            present = X.copy()
+            present.data[:] = 1.0
+
+            day = pd.to_datetime(review_day(chunk), errors="coerce")
+            period = day.dt.strftime(fmt).fillna("unknown")
+            keys = list(zip(product_key(chunk), period))
+            polarity = pd.to_numeric(chunk.get("polarity"), errors="coerce") if "polarity" in chunk \
+                else pd.Series(np.nan, index=chunk.index)
+            polarity = polarity.fillna(0.0).to_numpy()
+
+            # G: (groups in chunk × docs) indicator; G @ X sums docs into their group rows
+            uniq, inverse = np.unique(np.array([f"{p}\x1f{q}" for p, q in keys]), return_inverse=True)
+            G = sparse.csr_matrix((np.ones(len(keys)), (inverse, np.arange(len(keys)))), shape=(len(uniq), len(keys)))
+            rows = self._group_rows([tuple(u.split("\x1f")) for u in uniq])
+
+            self._add_rows(self.term_counts, rows, (G @ X).tocsr())
+            self._add_rows(self.doc_counts, rows, (G @ present).tocsr())
+            self._add_rows(self.polarity_sums, rows, (G @ sparse.diags(polarity) @ present).tocsr())
+            self.global_df += np.asarray(present.sum(axis=0)).ravel().astype(np.int64)
+            self.n_docs += X.shape[0]
+            self._remember_names(vectorizer, texts)
+
+        self.seen.add(fps[df.index].tolist())
+        return len(df)
+
+    # -------------------------------
+    # Queries
+    # -------------------------------
+    def top_aspects(self, product=None, period=None, k=10, min_reviews=2) -> pd.DataFrame:
+        idf = np.log((1 + self.n_docs) / (1 + self.global_df)) + 1.0
+        out = []
+        for (prod, per), row in sorted(self.groups.items()):
+            if (product and prod != product) or (period and per != period):
+                continue
+            tc = self.term_counts[row]
+            dc = self.doc_counts[row].toarray().ravel()
+            ps = self.polarity_sums[row].toarray().ravel()
+            cols = tc.indices[dc[tc.indices] >= min_reviews]
+            if len(cols) == 0:
+                continue
+            tf = tc.toarray().ravel()
+            scores = tf[cols] * idf[cols]
+            best = cols[np.argsort(-scores)[:k]]
+            for rank, col in enumerate(best, 1):
+                out.append({
+                    "product": prod,
+                    "period": per,
+                    "rank": rank,
+                    "aspect": self.term_names.get(col, f"#{col}"),
+                    "reviews": int(dc[col]),
+                    "tfidf": float(tf[col] * idf[col]),
+                    "mean_polarity": float(ps[col] / dc[col]),
+                })
+        return pd.DataFrame(out)
+
+    # -------------------------------
+    # Persistence
+    # -------------------------------
+    def save(self, path=STATE_PATH):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        tmp = path + ".tmp"
+        # plain state (dicts, arrays, CSR components), so a state written by the CLI (__main__) loads from an import too
+        state = dict(self.__dict__)
+        for name in ("term_counts", "doc_counts", "polarity_sums"):
+            m = sparse.vstack(state[name], format="csr") if state[name] \
+                else sparse.csr_matrix((0, self.n_features), dtype=np.float64)
+            state[name] = {"data": m.data, "indices": m.indices, "indptr": m.indptr, "shape": m.shape}
+        state["seen"] = dict(self.seen.__dict__)
+        with open(tmp, "wb") as f:
+            pickle.dump(state, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp, path)
+
+    @staticmethod
+    def load(path=STATE_PATH):
+        with open(path, "rb") as f:
+            state = pickle.load(f)
+        if isinstance(state, AspectState):
+            return state
+        for name in ("term_counts", "doc_counts", "polarity_sums"):
+            c = state[name]
+            state[name] = sparse.csr_matrix((c["data"], c["indices"], c["indptr"]), shape=c["shape"])
+        seen = SeenFilter.__new__(SeenFilter)
+        seen.__dict__.update(state["seen"])
+        state["seen"] = seen
+        aspects = AspectState.__new__(AspectState)
+        aspects.__setstate__(state)  # splits the matrices back into per-group rows
+        return aspects
+
+
+def parse_args(argv=None):
+    p = argparse.ArgumentParser(description="Incremental hashed TF-IDF aspect extraction over reviews.")
+    p.add_argument("--state", default=STATE_PATH)
+    sub = p.add_subparsers(dest="cmd", required=True)
+
+    u = sub.add_parser("update", help="fold new review files into the aspect state")
+    u.add_argument("files", nargs="*")
+    u.add_argument("--period", choices=["M", "W"], default="M", help="month or ISO week (new state only)")
+    u.add_argument("--chunk-size", type=int, default=CHUNK_SIZE)
+
+    t = sub.add_parser("top", help="top aspects per product and period")
+    t.add_argument("--product")
+    t.add_argument("--period")
+    t.add_argument("--k", type=int, default=10)
+    t.add_argument("--min-reviews", type=int, default=2)
+    t.add_argument("--output", default=None, help="also write the table to CSV")
+    return p.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    exists = os.path.exists(args.state)
+
+    if args.cmd == "update":
+        state = AspectState.load(args.state) if exists else AspectState(period=args.period)
+        cache = SentimentCache()
+        try:
+            for path in args.files or find_review_files():
+                df, _ = enrich_reviews(read_review_file(path), cache)
+                print(f"[aspects] {path}: {state.update(df, args.chunk_size)} new reviews")
+        finally:
+            cache.close()
+        state.save(args.state)
+        print(f"[aspects] {state.n_docs} reviews in {len(state.groups)} product-periods → {args.state}")
+        return 0
+
+    if not exists:
+        print(f"[aspects] No state at {args.state}; run 'update' first.")
+        return 1
+    table = AspectState.load(args.state).top_aspects(args.product, args.period, args.k, args.min_reviews)
+    print(table.to_string(index=False) if not table.empty else "[aspects] No aspects yet.")
+    if args.output and not table.empty:
+        table.to_csv(args.output, index=False, encoding="utf-8-sig")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
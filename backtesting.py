@@ -0,0 +1,209 @@
+# backtesting.py
+# Walk-forward (rolling-origin) backtesting for any forecaster in forecasting.py.
+#
+#   python backtesting.py --backend lstm --horizon 7 --folds 8 price_history/*.csv
+#
+# Each (product, fold) pair is an independent task: fit on prices[:origin],
+# forecast `horizon` steps, compare with prices[origin:origin+horizon].
+# Tasks run on a process pool; workers are spawned with BLAS/TensorFlow pinned
+# to a few threads so N workers do not oversubscribe the machine. Metrics for all folds are
+# computed in one vectorised pass and returned as a single DataFrame.
+
+import argparse
+import os
+import sys
+import time
+from contextlib import contextmanager
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from multiprocessing import get_context
+
+import numpy as np
+import pandas as pd
+
+from forecasting import FORECASTERS, load_price_history, make_forecaster
+
+THREAD_ENV_VARS = [
+    "OMP_NUM_THREADS",
+    "MKL_NUM_THREADS",
+    "OPENBLAS_NUM_THREADS",
+    "NUMEXPR_NUM_THREADS",
+    "TF_NUM_INTRAOP_THREADS",
+    "TF_NUM_INTEROP_THREADS",
+]
+
+
+# -------------------------------
+# Fold generation
+# -------------------------------
+def rolling_origins(n_obs: int, horizon: int, folds: int, min_train: int, step: int = None):
+    """Origins (train end indices) for walk-forward folds, latest fold last."""
+    last_origin = n_obs - horizon
+    if last_origin < min_train:
+        return []
+    if step is None:
+        step = max(1, (last_origin - min_train) // max(1, folds - 1)) if folds > 1 else horizon
+    origins = list(range(last_origin, min_train - 1, -step))[:folds]
+    return sorted(origins)
+
+
+# -------------------------------
+# Worker side
+# -------------------------------
+@contextmanager
+def limited_threads(n_threads: int):
+    """
+    Thread caps for work started inside the block. Spawned workers read the env
+    vars when they import numpy/TensorFlow, so they are set here in the parent
+    (a pool initializer runs after unpickling has already imported numpy); this
+    process already has BLAS loaded and is capped through threadpoolctl when
+    installed. The parent's environment is restored on exit.
+    """
+    saved = {var: os.environ.get(var) for var in THREAD_ENV_VARS}
+    os.environ.update({var: str(n_threads) for var in THREAD_ENV_VARS})
+    try:
+        try:
+            from threadpoolctl import threadpool_limits
+        except ImportError:
+            yield
+        else:
+            with threadpool_limits(limits=n_threads):
+                yield
+    finally:
+        for var, value in saved.items():
+            if value is None:
+                os.environ.pop(var, None)
+            else:
+                os.environ[var] = value
+
+
+def run_fold(product, prices, backend, params, fold, origin, horizon):
+    forecaster = make_forecaster(backend, **params)
+    t0 = time.perf_counter()
+    forecaster.fit(prices[:origin])
+    predicted = forecaster.forecast(prices[:origin], horizon)
+    return {
+        "product": product,
+        "fold": fold,
+        "origin": origin,
+        "train_rows": origin,
+        "actual": prices[origin:origin + horizon],
+        "predicted": np.asarray(predicted, dtype="float64"),
+        "seconds": time.perf_counter() - t0,
+    }
+
+
+# -------------------------------
+# Metrics
+# -------------------------------
+def fold_metrics(actual: np.ndarray, predicted: np.ndarray) -> dict:
+    """MSE/MAE/RMSE/R² per row of (folds, horizon) arrays; NaN marks padding."""
+    err = actual - predicted
+    mse = np.nanmean(err ** 2, axis=1)
+    mae = np.nanmean(np.abs(err), axis=1)
+    ss_res = np.nansum(err ** 2, axis=1)
+    ss_tot = np.nansum((actual - np.nanmean(actual, axis=1, keepdims=True)) ** 2, axis=1)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        r2 = np.where(ss_tot > 0, 1.0 - ss_res / ss_tot, np.nan)
+    return {"mse": mse, "mae": mae, "rmse": np.sqrt(mse), "r2": r2}
+
+
+def results_table(fold_results: list, horizon: int) -> pd.DataFrame:
+    fold_results = sorted(fold_results, key=lambda r: (r["product"], r["fold"]))
+    actual = np.full((len(fold_results), horizon), np.nan)
+    predicted = np.full_like(actual, np.nan)
+    for i, r in enumerate(fold_results):
+        actual[i, :len(r["actual"])] = r["actual"]
+        predicted[i, :len(r["predicted"])] = r["predicted"][:horizon]
+
+    table = pd.DataFrame({
+        "product": [r["product"] for r in fold_results],
+        "fold": [r["fold"] for r in fold_results],
+        "origin": [r["origin"] for r in fold_results],
+        "train_rows": [r["train_rows"] for r in fold_results],
+        "seconds": [round(r["seconds"], 3) for r in fold_results],
+        **fold_metrics(actual, predicted),
+    })
+    return table
+
+
+def summarise(table: pd.DataFrame) -> pd.DataFrame:
+    return table.groupby("product")[["mse", "mae", "rmse", "r2"]].mean().reset_index()
+
+
+# -------------------------------
+# Driver
+# -------------------------------
+def backtest(series: dict, backend="naive", params=None, horizon=7, folds=5, min_train=None,
+             step=None, workers=None, threads_per_worker=1) -> pd.DataFrame:
+    """
+    series: {product_name: 1-D price array}
+    Returns one row per (product, fold) with MSE/MAE/RMSE/R².
+    """
+    params = params or {}
+    window = make_forecaster(backend, **params).window
+    tasks = []
+    for product, prices in series.items():
+        prices = np.asarray(prices, dtype="float64")
+        floor = min_train or max(window * 4, 30)
+        for fold, origin in enumerate(rolling_origins(len(prices), horizon, folds, floor, step)):
+            tasks.append((product, prices, backend, params, fold, origin, horizon))
+
+    if not tasks:
+        return results_table([], horizon)
+
+    workers = workers or os.cpu_count() or 1
+    results = []
+    if workers == 1:
+        with limited_threads(threads_per_worker):
+            results = [run_fold(*t) for t in tasks]
+    else:
+        # spawn keeps TensorFlow state out of forked children; workers are spawned
+        # on demand while submitting, so the caps stay set for the whole pool
+        with limited_threads(threads_per_worker), \
+                ProcessPoolExecutor(max_workers=min(workers, len(tasks)), mp_context=get_context("spawn")) as pool:
+            futures = [pool.submit(run_fold, *t) for t in tasks]
+            for fut in as_completed(futures):
+                r = fut.result()
+                results.append(r)
+                print(f"[backtest] {r['product']} fold {r['fold']} done in {r['seconds']:.1f}s")
+
+    return results_table(results, horizon)
+
+
+def parse_args(argv=None):
+    p = argparse.ArgumentParser(description="Walk-forward backtest of price forecasters.")
+    p.add_argument("csv", nargs="+", help="price history CSVs (one product each)")
+    p.add_argument("--backend", default="naive", choices=sorted(FORECASTERS))
+    p.add_argument("--horizon", type=int, default=7)
+    p.add_argument("--folds", type=int, default=5)
+    p.add_argument("--min-train", type=int, default=None)
+    p.add_argument("--step", type=int, default=None, help="rows between origins (default: spread over history)")
+    p.add_argument("--window", type=int, default=None)
+    p.add_argument("--epochs", type=int, default=None)
+    p.add_argument("--workers", type=int, default=None)
+    p.add_argument("--threads-per-worker", type=int, default=1)
+    p.add_argument("--output", default=os.path.join("output", "backtest_results.csv"))
+    return p.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    series = {}
+    for path in args.csv:
+        series[os.path.splitext(os.path.basename(path))[0]] = load_price_history(path)["price"].to_numpy()
+
+    params = {k: v for k, v in {"window": args.window, "epochs": args.epochs}.items() if v is not None}
+    t0 = time.perf_counter()
+    table = backtest(series, args.backend, params, args.horizon, args.folds, args.min_train,
+                     args.step, args.workers, args.threads_per_worker)
+    os.makedirs(os.path.dirname(args.output) or ".", exist_ok=True)
+    table.to_csv(args.output, index=False, encoding="utf-8-sig")
+
+    print(f"\n[backtest] {len(table)} folds in {time.perf_counter() - t0:.1f}s → {args.output}")
+    if not table.empty:
+        print(summarise(table).to_string(index=False))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
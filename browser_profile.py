@@ -0,0 +1,186 @@
+# browser_profile.py
+# Lean Chrome profile for text-only scraping.
+#
+#   python browser_profile.py https://www.amazon.in/product-reviews/B0CS69DGSW --repeat 3
+#
+# The scrapers only read text from the DOM, but a normal page load also pulls
+# product images, web fonts, video, ad frames and analytics scripts. A lean
+# driver uses the "eager" page-load strategy (return at DOMContentLoaded) and a
+# persistent disk cache, and blocks those resources through the DevTools
+# protocol (Network.setBlockedURLs). Blocking is switched per fetch, so one
+# driver can still load a page in full when a scrape needs it. Every fetch()
+# records wall time and transferred bytes; FetchStats.summary() reports the
+# averages per mode and what lean mode saved.
+
+import argparse
+import os
+import sys
+import time
+
+CACHE_DIR = os.path.join("output", "browser_cache")
+CACHE_SIZE = 256 * 1024 * 1024
+
+BLOCKED_URLS = [
+    # images / media
+    "*.jpg", "*.jpeg", "*.png", "*.gif", "*.webp", "*.avif", "*.svg", "*.ico", "*.mp4", "*.webm",
+    "*images-amazon.com/images/I/*", "*rukminim*.flixcart.com/image/*",
+    # web fonts
+    "*.woff", "*.woff2", "*.ttf", "*.otf", "*fonts.googleapis.com*", "*fonts.gstatic.com*",
+    # ads / analytics / trackers
+    "*doubleclick.net*", "*googlesyndication.com*", "*googletagmanager.com*", "*google-analytics.com*",
+    "*amazon-adsystem.com*", "*aax-eu.amazon*", "*fls-eu.amazon*", "*unagi.amazon*", "*/uedata*",
+    "*facebook.net*", "*connect.facebook*", "*hotjar*", "*clarity.ms*", "*criteo*",
+]
+
+_MEASURE_JS = """
+const nav = performance.getEntriesByType('navigation')[0];
+const res = performance.getEntriesByType('resource');
+return [(nav ? nav.transferSize : 0) + res.reduce((a, r) => a + (r.transferSize || 0), 0), res.length];
+"""
+
+
+# open lock files, one per claimed cache slot; a slot is held until the process exits
+_CACHE_LOCKS = []
+
+
+def _try_lock(f):
+    try:
+        import fcntl
+    except ImportError:
+        import msvcrt
+
+        msvcrt.locking(f.fileno(), msvcrt.LK_NBLCK, 1)
+    else:
+        fcntl.flock(f, fcntl.LOCK_EX | fcntl.LOCK_NB)
+
+
+def claim_cache_dir(cache_dir=CACHE_DIR):
+    """
+    A subdirectory of cache_dir that no other live driver is using. Chrome's disk
+    cache belongs to one browser process, so concurrent drivers (crawl slots,
+    search_pipeline fetch/enrich workers) each get their own slot<k>/; slots are
+    reused by later runs, so the cache still persists between them.
+    """
+    os.makedirs(cache_dir, exist_ok=True)
+    slot = 0
+    while True:
+        path = os.path.join(cache_dir, f"slot{slot}")
+        f = open(f"{path}.lock", "a+")
+        try:
+            _try_lock(f)
+        except OSError:
+            f.close()
+            slot += 1
+            continue
+        _CACHE_LOCKS.append(f)
+        os.makedirs(path, exist_ok=True)
+        return path
+
+
+def apply_lean_options(options, cache_dir=CACHE_DIR):
+    """Eager page loads and a persistent disk cache; call before webdriver.Chrome(options=...)."""
+    options.page_load_strategy = "eager"
+    options.add_argument(f"--disk-cache-dir={os.path.abspath(claim_cache_dir(cache_dir))}")
+    options.add_argument(f"--disk-cache-size={CACHE_SIZE}")
+    return options
+
+
+def set_lean(driver, lean=True, default=False, blocked=BLOCKED_URLS):
+    """Turns resource blocking on or off; default=True also makes it the mode fetch() uses when not told."""
+    if default:
+        driver._lean_default = lean
+    if getattr(driver, "_lean", None) == lean:
+        return
+    try:
+        driver.execute_cdp_cmd("Network.enable", {})
+        driver.execute_cdp_cmd("Network.setBlockedURLs", {"urls": list(blocked) if lean else []})
+        driver._lean = lean
+    except Exception as e:  # non-Chrome drivers have no CDP
+        print(f"[browser] resource blocking unavailable: {e}")
+        driver._lean = driver._lean_default = False
+
+
+class FetchStats:
+    def __init__(self):
+        self.rows = []
+
+    def record(self, mode, url, seconds, transferred, resources):
+        self.rows.append({"mode": mode, "url": url, "seconds": seconds, "bytes": transferred,
+                          "resources": resources})
+
+    def summary(self) -> dict:
+        out = {}
+        for mode in ("full", "lean"):
+            rows = [r for r in self.rows if r["mode"] == mode]
+            if rows:
+                out[mode] = {
+                    "fetches": len(rows),
+                    "mean_s": round(sum(r["seconds"] for r in rows) / len(rows), 3),
+                    "mean_kb": round(sum(r["bytes"] for r in rows) / len(rows) / 1024, 1),
+                    "mean_resources": round(sum(r["resources"] for r in rows) / len(rows), 1),
+                }
+        if "full" in out and "lean" in out:
+            full, lean = out["full"], out["lean"]
+            out["saved"] = {
+                "seconds_per_page": round(full["mean_s"] - lean["mean_s"], 3),
+                "kb_per_page": round(full["mean_kb"] - lean["mean_kb"], 1),
+                "time_pct": round(100 * (1 - lean["mean_s"] / full["mean_s"]), 1) if full["mean_s"] else None,
+                "bytes_pct": round(100 * (1 - lean["mean_kb"] / full["mean_kb"]), 1) if full["mean_kb"] else None,
+            }
+        return out
+
+
+STATS = FetchStats()
+
+
+def fetch(driver, url, lean=None, stats=STATS):
+    """
+    driver.get(url) in lean or full mode (None: the driver's default); returns the elapsed seconds.
+    Full mode also waits for the load event, as a normal-strategy driver would.
+    Byte counts come from the Resource Timing API, so cross-origin resources
+    without Timing-Allow-Origin are under-counted in both modes alike.
+    """
+    lean = getattr(driver, "_lean_default", False) if lean is None else lean
+    set_lean(driver, lean)
+    t0 = time.perf_counter()
+    driver.get(url)
+    if not lean:
+        deadline = time.time() + 30
+        while time.time() < deadline and driver.execute_script("return document.readyState") != "complete":
+            time.sleep(0.05)
+    elapsed = time.perf_counter() - t0
+    try:
+        transferred, resources = driver.execute_script(_MEASURE_JS)
+    except Exception:
+        transferred, resources = 0, 0
+    if stats is not None:
+        stats.record("lean" if lean else "full", url, elapsed, transferred or 0, resources or 0)
+    return elapsed
+
+
+def parse_args(argv=None):
+    p = argparse.ArgumentParser(description="Compare full vs lean page loads.")
+    p.add_argument("urls", nargs="+")
+    p.add_argument("--repeat", type=int, default=2)
+    return p.parse_args(argv)
+
+
+def main(argv=None):
+    from Ascrape_review import setup_driver
+
+    args = parse_args(argv)
+    driver = setup_driver(lean=True)
+    try:
+        for _ in range(args.repeat):
+            for url in args.urls:
+                fetch(driver, url, lean=False)
+                fetch(driver, url, lean=True)
+    finally:
+        driver.quit()
+    for mode, s in STATS.summary().items():
+        print(f"[browser] {mode}: {s}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
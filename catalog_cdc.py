@@ -0,0 +1,246 @@
+# catalog_cdc.py
+# Change-data-capture between successive catalog scrapes.
+#
+#   python catalog_cdc.py ingest Scraping/Scraping/amazon_products_laptops.csv --catalog laptops
+#   python catalog_cdc.py events --catalog laptops --since 2025-11-05 --field Price
+#   python catalog_cdc.py history B0CL7CMTXS
+#
+# The search scrapers overwrite their CSV on every run. Here each snapshot row
+# (keyed by ASIN) is hashed over the tracked fields and compared with the hash
+# kept in a state table, so an unchanged product costs one hash comparison.
+# Only inserts, updates (with the fields that changed, old → new) and deletes
+# are written to the events table; the state table holds one current row per
+# product, never a copy per run. Search results are partial by nature, so
+# deletes are only emitted for scrapes ingested as --complete.
+
+import argparse
+import json
+import os
+import sqlite3
+import sys
+from datetime import datetime
+
+import pandas as pd
+
+DB_PATH = os.path.join("output", "catalog_cdc.sqlite")
+KEY_COLUMN = "Product_ASIN"
+
+# Product_Link / Reviews_Link carry per-search tracking parameters and Scraped_At
+# changes every run; neither is a change to the product.
+TRACKED_FIELDS = ["Product_Name", "Brand", "Price", "MRP", "Discount", "Stock_Status", "Rating", "Reviews", "Seller"]
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS state (
+    catalog TEXT NOT NULL,
+    key TEXT NOT NULL,
+    row_hash TEXT NOT NULL,
+    fields TEXT NOT NULL,
+    first_seen TEXT,
+    last_seen TEXT,
+    deleted INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (catalog, key)
+);
+CREATE TABLE IF NOT EXISTS events (
+    id INTEGER PRIMARY KEY,
+    run_id INTEGER NOT NULL,
+    catalog TEXT NOT NULL,
+    key TEXT NOT NULL,
+    op TEXT NOT NULL,
+    changes TEXT,
+    at TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS events_catalog_at ON events (catalog, at);
+CREATE INDEX IF NOT EXISTS events_key ON events (key, at);
+CREATE TABLE IF NOT EXISTS runs (
+    run_id INTEGER PRIMARY KEY,
+    catalog TEXT,
+    source_file TEXT,
+    at TEXT,
+    rows INTEGER,
+    inserts INTEGER,
+    updates INTEGER,
+    deletes INTEGER
+);
+"""
+
+
+def normalise_snapshot(df: pd.DataFrame, fields=TRACKED_FIELDS) -> pd.DataFrame:
+    """Key + tracked fields as stripped strings ('' for missing / 'N/A'), one row per key."""
+    out = pd.DataFrame(index=df.index)
+    out["key"] = df[KEY_COLUMN].astype("string").str.strip()
+    for f in fields:
+        col = df[f] if f in df else pd.Series("", index=df.index)
+        col = col.astype("string").str.replace(r"\s+", " ", regex=True).str.strip().fillna("")
+        out[f] = col.where(col != "N/A", "")
+    out = out[out["key"].notna() & (out["key"] != "")]
+    # sponsored cards repeat a product on later pages; the first occurrence wins
+    return out.drop_duplicates("key").reset_index(drop=True)
+
+
+def row_hashes(snapshot: pd.DataFrame, fields=TRACKED_FIELDS) -> pd.Series:
+    hashes = pd.util.hash_pandas_object(snapshot[fields], index=False)
+    return hashes.map("{:016x}".format)
+
+
+class CatalogCDC:
+    def __init__(self, path=DB_PATH, fields=TRACKED_FIELDS):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.fields = list(fields)
+        self.conn = sqlite3.connect(path)
+        self.conn.executescript(SCHEMA)
+
+    def close(self):
+        self.conn.close()
+
+    # -------------------------------
+    # Diff + apply
+    # -------------------------------
+    def _state(self, catalog) -> pd.DataFrame:
+        return pd.read_sql_query(
+            "SELECT key, row_hash, fields, deleted FROM state WHERE catalog = ?", self.conn, params=[catalog]
+        )
+
+    def diff(self, catalog, df: pd.DataFrame, complete=False):
+        """
+        Compares a snapshot with the stored state without writing anything.
+        Returns (events [{key, op, changes}], normalised snapshot with row_hash and touched).
+        """
+        snap = normalise_snapshot(df, self.fields)
+        snap["row_hash"] = row_hashes(snap, self.fields)
+        merged = snap.merge(self._state(catalog), on="key", how="outer", suffixes=("", "_old"), indicator=True)
+        live_old = merged["deleted"].eq(0)
+
+        events = []
+        inserted = (merged["_merge"] == "left_only") | ((merged["_merge"] == "both") & ~live_old)
+        for row in merged[inserted].itertuples(index=False):
+            events.append({"key": row.key, "op": "insert",
+                           "changes": {f: [None, getattr(row, f)] for f in self.fields}})
+
+        # only rows whose hash moved are decoded and compared field by field
+        changed = (merged["_merge"] == "both") & live_old & (merged["row_hash"] != merged["row_hash_old"])
+        for row in merged[changed].itertuples(index=False):
+            old = json.loads(row.fields)
+            delta = {f: [old.get(f, ""), getattr(row, f)] for f in self.fields if old.get(f, "") != getattr(row, f)}
+            if delta:
+                events.append({"key": row.key, "op": "update", "changes": delta})
+
+        snap["touched"] = snap["key"].isin(merged.loc[inserted | changed, "key"])
+        if complete:
+            gone = (merged["_merge"] == "right_only") & live_old
+            for row in merged[gone].itertuples(index=False):
+                events.append({"key": row.key, "op": "delete", "changes": None})
+        return events, snap
+
+    def ingest(self, catalog, df: pd.DataFrame, source_file="", complete=False, at=None) -> dict:
+        at = at or datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        events, snap = self.diff(catalog, df, complete)
+        counts = {op: sum(e["op"] == op for e in events) for op in ("insert", "update", "delete")}
+
+        rows = [(catalog, r["key"], r["row_hash"], json.dumps({f: r[f] for f in self.fields}), at, at)
+                for r in snap[snap["touched"]].to_dict("records")]
+        with self.conn:
+            run_id = self.conn.execute(
+                "INSERT INTO runs (catalog, source_file, at, rows, inserts, updates, deletes) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (catalog, source_file, at, len(snap), counts["insert"], counts["update"], counts["delete"]),
+            ).lastrowid
+            self.conn.executemany(
+                "INSERT INTO events (run_id, catalog, key, op, changes, at) VALUES (?, ?, ?, ?, ?, ?)",
+                [(run_id, catalog, e["key"], e["op"], json.dumps(e["changes"]) if e["changes"] else None, at)
+                 for e in events],
+            )
+            self.conn.executemany(
+                "INSERT INTO state (catalog, key, row_hash, fields, first_seen, last_seen, deleted) "
+                "VALUES (?, ?, ?, ?, ?, ?, 0) ON CONFLICT (catalog, key) DO UPDATE SET "
+                "row_hash = excluded.row_hash, fields = excluded.fields, last_seen = excluded.last_seen, deleted = 0",
+                rows,
+            )
+            self.conn.executemany(
+                "UPDATE state SET deleted = 1 WHERE catalog = ? AND key = ?",
+                [(catalog, e["key"]) for e in events if e["op"] == "delete"],
+            )
+            # unchanged rows: only the last-seen stamp moves
+            unchanged = snap.loc[~snap["touched"], "key"].tolist()
+            self.conn.executemany("UPDATE state SET last_seen = ? WHERE catalog = ? AND key = ?",
+                                  [(at, catalog, k) for k in unchanged])
+        return {"run_id": run_id, "rows": len(snap), **counts}
+
+    # -------------------------------
+    # Queries
+    # -------------------------------
+    def events(self, catalog=None, since=None, op=None, field=None, key=None) -> pd.DataFrame:
+        sql, params = "SELECT run_id, catalog, key, op, changes, at FROM events WHERE 1 = 1", []
+        for col, op_, value in [("catalog", "=", catalog), ("at", ">=", since), ("op", "=", op), ("key", "=", key)]:
+            if value is not None:
+                sql += f" AND {col} {op_} ?"
+                params.append(value)
+        df = pd.read_sql_query(sql + " ORDER BY at, id", self.conn, params=params)
+        if field:
+            df = df[df["changes"].fillna("").str.contains(json.dumps(field), regex=False)]
+        return df
+
+    def explode(self, events: pd.DataFrame) -> pd.DataFrame:
+        """One row per changed field: key, op, field, old, new, at."""
+        rows = []
+        for e in events.itertuples(index=False):
+            changes = json.loads(e.changes) if isinstance(e.changes, str) else {None: [None, None]}
+            for f, (old, new) in changes.items():
+                rows.append({"at": e.at, "catalog": e.catalog, "key": e.key, "op": e.op,
+                             "field": f, "old": old, "new": new})
+        return pd.DataFrame(rows)
+
+
+def parse_args(argv=None):
+    p = argparse.ArgumentParser(description="Change-data-capture over catalog scrape files.")
+    p.add_argument("--db", default=DB_PATH)
+    sub = p.add_subparsers(dest="cmd", required=True)
+
+    i = sub.add_parser("ingest", help="diff scrape files against the stored state")
+    i.add_argument("files", nargs="+")
+    i.add_argument("--catalog", default=None, help="defaults to the file name")
+    i.add_argument("--complete", action="store_true", help="the file is a full catalog: emit deletes")
+
+    e = sub.add_parser("events", help="list change events")
+    e.add_argument("--catalog")
+    e.add_argument("--since", help="YYYY-MM-DD")
+    e.add_argument("--op", choices=["insert", "update", "delete"])
+    e.add_argument("--field", choices=TRACKED_FIELDS)
+    e.add_argument("--output", default=None, help="also write one row per changed field to CSV")
+
+    h = sub.add_parser("history", help="all events for one product")
+    h.add_argument("key")
+    return p.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    cdc = CatalogCDC(args.db)
+    try:
+        if args.cmd == "ingest":
+            for path in args.files:
+                catalog = args.catalog or os.path.splitext(os.path.basename(path))[0]
+                # as text, so "25979" never turns into "25979.0" depending on the other rows
+                df = pd.read_excel(path, dtype=str) if path.endswith((".xlsx", ".xls")) \
+                    else pd.read_csv(path, dtype=str, keep_default_na=False)
+                r = cdc.ingest(catalog, df, os.path.basename(path), args.complete)
+                print(f"[cdc] {path} → {catalog}: {r['rows']} products, {r['insert']} inserts, "
+                      f"{r['update']} updates, {r['delete']} deletes")
+            return 0
+
+        if args.cmd == "events":
+            events = cdc.events(args.catalog, args.since, args.op, args.field)
+        else:
+            events = cdc.events(key=args.key)
+        table = cdc.explode(events)
+        if args.cmd == "events" and args.field and not table.empty:
+            table = table[table["field"] == args.field]
+        print(table.to_string(index=False) if not table.empty else "[cdc] No events.")
+        if getattr(args, "output", None) and not table.empty:
+            table.to_csv(args.output, index=False, encoding="utf-8-sig")
+    finally:
+        cdc.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
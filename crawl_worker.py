@@ -0,0 +1,248 @@
+# crawl_worker.py
+# Crawl workers that pull jobs from a job_queue backend (open_queue()).
+#
+#   python crawl_worker.py --slots 4                               # 4 worker processes, every job kind
+#   python crawl_worker.py --slots 2 --kinds search amazon-review
+#   python crawl_worker.py --enqueue-defaults                      # the product the scripts hard-code today
+#
+# Job kinds and payloads:
+#   amazon-review    {"asin": "B0CS69DGSW", "max_pages": 30}
+#   flipkart-review  {"url": "<flipkart product-reviews url>", "max_pages": 10}
+#   search           {"keyword": "laptops", "pages": 4, "enrich_workers": 3}
+#   price-history    {"url": "https://pricehistoryapp.com/product/<slug>"}
+#
+# Each slot is a separate process with its own browser, so throughput grows
+# with the number of slots until the per-site politeness limits bind. Workers
+# only use the job_queue.QueueBackend methods; the SQLite queue is single-host,
+# so spreading slots over machines needs a networked backend behind
+# open_queue(). While a handler runs, a heartbeat thread extends the lease; a
+# crashed slot just lets it lapse and another slot retries the job. Handlers
+# write their results under output/jobs/ and return a small summary that is
+# stored with the finished job.
+
+import argparse
+import multiprocessing as mp
+import os
+import sys
+import threading
+import time
+from datetime import datetime
+
+from job_queue import DB_PATH, VISIBILITY_TIMEOUT_S, open_queue, worker_id
+
+OUTPUT_DIR = os.path.join("output", "jobs")
+SCRAPING_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "Scraping")
+IDLE_SLEEP_S = 5.0
+
+# per-process resources reused across jobs (e.g. the logged-in Selenium driver);
+# requests sessions are kept warm by session_manager.get_session_manager()
+_RESOURCES = {}
+
+
+def _stamp():
+    return datetime.now().strftime("%Y%m%d_%H%M%S")
+
+
+def _amazon_driver():
+    if "amazon_driver" not in _RESOURCES:
+        from Ascrape_review import load_cookies, setup_driver
+
+        driver = setup_driver()
+        _RESOURCES["amazon_session"] = load_cookies(driver)
+        _RESOURCES["amazon_driver"] = driver
+    else:
+        # cheap local expiry check; refreshes the shared jar before it runs out
+        if _RESOURCES["amazon_session"].ensure_fresh():
+            _RESOURCES["amazon_session"].attach(_RESOURCES["amazon_driver"])
+    return _RESOURCES["amazon_driver"]
+
+
+def close_resources(save=True):
+    driver = _RESOURCES.pop("amazon_driver", None)
+    session = _RESOURCES.pop("amazon_session", None)
+    if driver is not None:
+        try:
+            if save:
+                session.save_from_driver(driver)
+        finally:
+            try:
+                driver.quit()
+            except Exception:
+                pass  # the session may already be gone
+
+
+# -------------------------------
+# Handlers: payload -> summary dict
+# -------------------------------
+def handle_amazon_review(payload):
+    from Ascrape_review import MAX_PAGES_AMAZON, REVIEW_COLUMNS, iter_amazon_reviews
+    from review_pipeline import ChunkedCsvSink, ReviewDeduper, run_pipeline
+
+    asin = payload["asin"]
+    path = os.path.join(OUTPUT_DIR, f"amazon_reviews_{asin}_{_stamp()}.csv")
+    reviews = iter_amazon_reviews(_amazon_driver(), asin, payload.get("max_pages", MAX_PAGES_AMAZON))
+    saved = run_pipeline([reviews], [ReviewDeduper()], ChunkedCsvSink(path, REVIEW_COLUMNS))
+    # share cookies Amazon rotated with other slots and requests sessions
+    _RESOURCES["amazon_session"].save_from_driver(_amazon_driver())
+    return {"file": path, "reviews": saved}
+
+
+def handle_flipkart_review(payload):
+    from Ascrape_review import MAX_PAGES_FLIPKART, REVIEW_COLUMNS, iter_flipkart_reviews
+    from review_pipeline import ChunkedCsvSink, ReviewDeduper, run_pipeline
+
+    path = os.path.join(OUTPUT_DIR, f"flipkart_reviews_{_stamp()}_{os.getpid()}.csv")
+    reviews = iter_flipkart_reviews(payload["url"], max_pages=payload.get("max_pages", MAX_PAGES_FLIPKART))
+    saved = run_pipeline([reviews], [ReviewDeduper()], ChunkedCsvSink(path, REVIEW_COLUMNS))
+    return {"file": path, "reviews": saved}
+
+
+def handle_search(payload):
+    if SCRAPING_DIR not in sys.path:
+        sys.path.insert(0, SCRAPING_DIR)
+    from search_pipeline import SearchCrawler
+    from web_scraping import save_products
+
+    crawler = SearchCrawler(enrich_workers=payload.get("enrich_workers", 3))
+    products = crawler.crawl(payload["keyword"], payload.get("pages", 2))
+    if not products:
+        raise RuntimeError(f"No products scraped for '{payload['keyword']}'")
+    return {"file": save_products(products, payload["keyword"]), "products": len(products)}
+
+
+def handle_price_history(payload):
+    from Ascraping import fetch_price_history
+
+    df, csv_name = fetch_price_history(payload["url"], save=False)
+    path = os.path.join(OUTPUT_DIR, csv_name)
+    os.makedirs(OUTPUT_DIR, exist_ok=True)
+    df.to_csv(path, index=False)
+    return {"file": path, "points": len(df)}
+
+
+HANDLERS = {
+    "amazon-review": handle_amazon_review,
+    "flipkart-review": handle_flipkart_review,
+    "search": handle_search,
+    "price-history": handle_price_history,
+}
+
+
+# -------------------------------
+# Worker loop
+# -------------------------------
+def _is_webdriver_error(e):
+    try:
+        from selenium.common.exceptions import WebDriverException
+    except ImportError:
+        return False
+    return isinstance(e, WebDriverException)
+
+
+def _heartbeat(db_path, job_id, owner, stop, every):
+    q = open_queue(db_path)
+    try:
+        while not stop.wait(every):
+            if not q.extend(job_id, owner):
+                print(f"[worker {owner}] lost lease on job {job_id}")
+                return
+    finally:
+        q.close()
+
+
+def run_worker(db_path=DB_PATH, kinds=None, max_jobs=None, idle_exit=False, visibility_timeout=VISIBILITY_TIMEOUT_S):
+    os.makedirs(OUTPUT_DIR, exist_ok=True)
+    owner = worker_id()
+    q = open_queue(db_path, visibility_timeout)
+    kinds = list(kinds or HANDLERS)
+    done = 0
+    try:
+        while max_jobs is None or done < max_jobs:
+            jobs = q.lease(owner, kinds)
+            if not jobs:
+                if idle_exit:
+                    break
+                time.sleep(IDLE_SLEEP_S)
+                continue
+            job = jobs[0]
+            stop = threading.Event()
+            beat = threading.Thread(target=_heartbeat, args=(db_path, job["id"], owner, stop, visibility_timeout / 3),
+                                    daemon=True)
+            beat.start()
+            t0 = time.perf_counter()
+            try:
+                result = HANDLERS[job["kind"]](job["payload"])
+                q.ack(job["id"], owner, result)
+                print(f"[worker {owner}] job {job['id']} {job['kind']} done in {time.perf_counter() - t0:.1f}s")
+            except Exception as e:
+                outcome = q.fail(job["id"], owner, f"{type(e).__name__}: {e}")
+                print(f"[worker {owner}] job {job['id']} {job['kind']} failed ({outcome}): {e}")
+                if _is_webdriver_error(e):
+                    # a crashed browser session fails every later job; start a fresh driver next time
+                    close_resources(save=False)
+            finally:
+                stop.set()
+                beat.join()
+            done += 1
+    finally:
+        close_resources()
+        q.close()
+    return done
+
+
+def enqueue_defaults(db_path=DB_PATH):
+    """The product and search the single-run scripts hard-code, as jobs."""
+    from Ascrape_review import ASIN, FLIPKART_URL
+    from Ascraping import PRODUCT_URL
+
+    q = open_queue(db_path)
+    try:
+        ids = [
+            q.put("amazon-review", {"asin": ASIN}, dedupe_key=f"amazon-review:{ASIN}"),
+            q.put("flipkart-review", {"url": FLIPKART_URL}, dedupe_key=f"flipkart-review:{FLIPKART_URL}"),
+            q.put("search", {"keyword": "laptops", "pages": 4}, dedupe_key="search:laptops"),
+            q.put("price-history", {"url": PRODUCT_URL}, dedupe_key=f"price-history:{PRODUCT_URL}"),
+        ]
+    finally:
+        q.close()
+    return [i for i in ids if i is not None]
+
+
+def parse_args(argv=None):
+    p = argparse.ArgumentParser(description="Crawl workers pulling from the SQLite job queue.")
+    p.add_argument("--db", default=DB_PATH)
+    p.add_argument("--slots", type=int, default=1, help="worker processes (one browser each)")
+    p.add_argument("--kinds", nargs="*", choices=sorted(HANDLERS), default=None)
+    p.add_argument("--max-jobs", type=int, default=None, help="per slot")
+    p.add_argument("--idle-exit", action="store_true", help="stop when the queue is empty")
+    p.add_argument("--visibility-timeout", type=float, default=VISIBILITY_TIMEOUT_S)
+    p.add_argument("--enqueue-defaults", action="store_true")
+    return p.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    if args.enqueue_defaults:
+        print(f"[worker] Enqueued jobs {enqueue_defaults(args.db)}")
+        return 0
+
+    worker_args = (args.db, args.kinds, args.max_jobs, args.idle_exit, args.visibility_timeout)
+    if args.slots <= 1:
+        run_worker(*worker_args)
+        return 0
+    # spawn: every slot starts clean (no inherited sqlite connections or browser handles)
+    ctx = mp.get_context("spawn")
+    procs = [ctx.Process(target=run_worker, args=worker_args) for _ in range(args.slots)]
+    for p in procs:
+        p.start()
+    try:
+        for p in procs:
+            p.join()
+    except KeyboardInterrupt:
+        for p in procs:
+            p.terminate()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,400 @@
+# discount_strategy.py
+# Competitor discount-strategy events over a dense product x day price panel.
+#
+#   python discount_strategy.py --history price_history/*.csv --scrapes Scraping/Scraping/amazon_products_laptops.csv
+#   python discount_strategy.py --history price_history/*.csv --cdc --our-prices our_prices.csv \
+#       --link samsung_galaxy_s24_5g_ai_smartphone_marble_gray_8gb_128gb_storage_price_history=B0CS69DGSW
+#   python discount_strategy.py --synthetic 20000        # timing on a generated catalog
+#
+# Price history files (date, price), catalog scrapes (Price / MRP per
+# Scraped_At) and catalog_cdc Price / MRP change events are stacked into one
+# table of observations and laid out as a products x days panel, forward
+# filled for up to MAX_GAP_D days. Everything below is whole-array NumPy over
+# that panel, with no per-product loop:
+#
+#   reference price  max(MRP, rolling REF_WINDOW_D-day max price): what a sale is measured against
+#   depth            1 - price / reference, in percent; a sale day has depth >= MIN_DEPTH_PCT
+#   episodes         runs of sale days (diff of the padded mask), aggregated with ufunc.reduceat;
+#                    a break of a day or two between sale days is bridged (MERGE_GAP_D), and a
+#                    run ends at its last real observation, not where the forward fill runs out
+#   pre-sale hike    rise of the reference price over the HIKE_LOOKBACK_D days before a sale,
+#                    i.e. the list price was pushed up before the "discount"
+#   undercut         price below our price (--our-prices), as its own runs
+#
+# Each episode becomes a StrategyEvent: flash_sale (over within FLASH_MAX_DAYS),
+# sale, markdown (>= MARKDOWN_MIN_DAYS, a standing price cut rather than a
+# promotion) or undercut, with the product's promotion frequency attached once
+# at least MIN_SPAN_D days of its prices have been seen.
+
+import argparse
+import os
+import sys
+import time
+from dataclasses import dataclass, fields
+
+import numpy as np
+import pandas as pd
+
+from forecasting import load_price_history
+from records import add_numeric_columns, parse_currency
+
+MAX_GAP_D = 30
+REF_WINDOW_D = 90
+MIN_DEPTH_PCT = 5.0
+MERGE_GAP_D = 2
+FLASH_MAX_DAYS = 3
+MARKDOWN_MIN_DAYS = 30
+HIKE_LOOKBACK_D = 14
+UNDERCUT_MIN_PCT = 1.0
+FREQ_WINDOW_D = 90
+MIN_SPAN_D = 30
+OUTPUT_PATH = os.path.join("output", "discount_events.csv")
+_EPOCH = pd.Timestamp(0, tz="UTC")
+_DAY_NS = 86_400 * 10 ** 9
+
+
+@dataclass(slots=True)
+class StrategyEvent:
+    product: str
+    kind: str                 # flash_sale | sale | markdown | undercut
+    start: str
+    end: str                  # last day of the episode
+    days: int
+    ongoing: bool             # still running on the product's last observed day
+    depth_pct: float          # deepest discount vs the reference price
+    mean_depth_pct: float
+    min_price: float
+    ref_price: float          # reference price on the first day
+    pre_hike_pct: float       # reference price rise in the HIKE_LOOKBACK_D days before the start
+    undercut_pct: float       # deepest % below our price (NaN without our price)
+    sales_per_90d: float      # the product's promotions per 90 observed days (NaN under MIN_SPAN_D)
+
+
+EVENT_COLUMNS = [f.name for f in fields(StrategyEvent)]
+
+
+# -------------------------------
+# Observations (product, at, price, mrp)
+# -------------------------------
+def observations_from_history(paths, links=None) -> pd.DataFrame:
+    """Price history CSVs; the product is the file stem unless `links` maps it (e.g. to an ASIN)."""
+    links = links or {}
+    frames = []
+    for path in paths:
+        stem = os.path.splitext(os.path.basename(path))[0]
+        df = load_price_history(path)
+        frames.append(pd.DataFrame({"product": links.get(stem, stem), "at": df["date"],
+                                    "price": df["price"].astype(np.float64), "mrp": np.nan}))
+    return pd.concat(frames, ignore_index=True) if frames else _empty()
+
+
+def observations_from_scrapes(df: pd.DataFrame) -> pd.DataFrame:
+    """Catalog / product scrapes: one observation per row, with the MRP the page showed."""
+    df = add_numeric_columns(df)
+    return pd.DataFrame({"product": df["Product_ASIN"].astype(str),
+                         "at": pd.to_datetime(df["Scraped_At"], utc=True, errors="coerce"),
+                         "price": df.get("Price_INR", np.nan), "mrp": df.get("MRP_INR", np.nan)})
+
+
+def observations_from_cdc(cdc, catalog=None) -> pd.DataFrame:
+    """Price / MRP inserts and updates from catalog_cdc, one observation per changed field."""
+    table = cdc.explode(cdc.events(catalog))
+    if table.empty:
+        return _empty()
+    table = table[table["field"].isin(["Price", "MRP"]) & (table["op"] != "delete")]
+    value = table["new"].map(parse_currency)
+    return pd.DataFrame({"product": table["key"], "at": pd.to_datetime(table["at"], utc=True, errors="coerce"),
+                         "price": value.where(table["field"] == "Price"),
+                         "mrp": value.where(table["field"] == "MRP")})
+
+
+def synthetic_observations(n_products, days=365, seed=0) -> pd.DataFrame:
+    """Daily prices with list-price plateaus, random promotions and a few permanent cuts."""
+    rng = np.random.default_rng(seed)
+    base = rng.uniform(500, 80000, n_products)[:, None]
+    price = np.repeat(base, days, axis=1)
+    promos = rng.random((n_products, days)) < 0.02
+    length = rng.integers(1, 8, (n_products, days))
+    depth = rng.uniform(0.05, 0.35, (n_products, days))
+    for lag in range(7):  # spread each promo start over its length
+        hit = np.roll(promos & (length > lag), lag, axis=1)
+        price = np.where(hit, np.minimum(price, base * (1 - np.roll(depth, lag, axis=1))), price)
+    cut = rng.random(n_products) < 0.1
+    cut_day = rng.integers(days // 2, days, n_products)
+    price = np.where(cut[:, None] & (np.arange(days) >= cut_day[:, None]), price * 0.85, price)
+    at = pd.Timestamp("2025-01-01", tz="UTC") + pd.to_timedelta(np.arange(days), unit="D")
+    return pd.DataFrame({"product": np.repeat([f"P{i:06d}" for i in range(n_products)], days),
+                         "at": np.tile(at, n_products), "price": price.round(0).ravel(),
+                         "mrp": np.repeat(base.ravel(), days).round(0)})
+
+
+def _empty():
+    return pd.DataFrame({"product": pd.Series(dtype=str), "at": pd.Series(dtype="datetime64[ns, UTC]"),
+                         "price": pd.Series(dtype=np.float64), "mrp": pd.Series(dtype=np.float64)})
+
+
+# -------------------------------
+# Panel
+# -------------------------------
+def _ffill(a, max_gap):
+    """Forward fill along days, at most max_gap days past the last observation."""
+    days = np.arange(a.shape[1])
+    last = np.maximum.accumulate(np.where(np.isnan(a), 0, days), axis=1)
+    out = np.take_along_axis(a, last, axis=1)
+    out[days - last > max_gap] = np.nan
+    return out
+
+
+def rolling_max(a, window):
+    """Max over the trailing `window` days (van Herk / Gil-Werman: O(n) whatever the window); NaN is ignored."""
+    n_rows, n_days = a.shape
+    padded_len = -(-n_days // window) * window
+    x = np.full((n_rows, padded_len), -np.inf)
+    x[:, :n_days] = np.where(np.isnan(a), -np.inf, a)
+    blocks = x.reshape(n_rows, -1, window)
+    prefix = np.maximum.accumulate(blocks, axis=2).reshape(n_rows, -1)
+    suffix = np.maximum.accumulate(blocks[:, :, ::-1], axis=2)[:, :, ::-1].reshape(n_rows, -1)
+    out = prefix[:, :n_days].copy()
+    i = np.arange(window - 1, n_days)
+    out[:, i] = np.maximum(suffix[:, i - window + 1], prefix[:, i])
+    out[np.isneginf(out)] = np.nan
+    return out
+
+
+def _bridge(mask, gap):
+    """Fills breaks of at most `gap` days between two runs of True."""
+    if gap <= 0:
+        return mask
+    rows, starts, ends = _runs(~mask)
+    inner = (ends - starts <= gap) & (starts > 0) & (ends < mask.shape[1])
+    delta = np.zeros((mask.shape[0], mask.shape[1] + 1), dtype=np.int32)
+    np.add.at(delta, (rows[inner], starts[inner]), 1)
+    np.add.at(delta, (rows[inner], ends[inner]), -1)
+    return mask | (np.cumsum(delta[:, :-1], axis=1) > 0)
+
+
+@dataclass
+class PricePanel:
+    products: pd.Index
+    days: pd.DatetimeIndex
+    price: np.ndarray         # products x days, forward filled
+    mrp: np.ndarray
+    observed: np.ndarray      # products x days, a real observation that day
+
+    @classmethod
+    def from_observations(cls, obs: pd.DataFrame, max_gap=MAX_GAP_D) -> "PricePanel":
+        at = pd.to_datetime(obs["at"], utc=True, errors="coerce")
+        obs = obs.assign(at=at).dropna(subset=["at"])
+        obs = obs[obs["price"].notna() | obs["mrp"].notna()].sort_values("at", kind="stable")
+        codes, products = pd.factorize(obs["product"])
+        day = obs["at"].to_numpy(dtype="datetime64[ns]").view(np.int64) // _DAY_NS
+        day0 = day.min()
+        col = day - day0
+        shape = (len(products), int(col.max()) + 1)
+        cell = codes.astype(np.int64) * shape[1] + col
+        panel = {}
+        for name in ("price", "mrp"):
+            values = obs[name].to_numpy(dtype=np.float64)
+            keep = np.flatnonzero(~np.isnan(values))
+            # rows are in time order: the day's last observation of each product wins
+            order = keep[np.argsort(cell[keep], kind="stable")]
+            sorted_cells = cell[order]
+            last = order[np.append(sorted_cells[1:] != sorted_cells[:-1], True)] if len(order) else order
+            grid = np.full(shape, np.nan)
+            grid.ravel()[cell[last]] = values[last]
+            panel[name] = grid
+        observed = ~np.isnan(panel["price"])
+        days = pd.DatetimeIndex(_EPOCH + pd.to_timedelta(day0 + np.arange(shape[1]), unit="D"))
+        return cls(pd.Index(products), days, _ffill(panel["price"], max_gap), _ffill(panel["mrp"], max_gap), observed)
+
+
+# -------------------------------
+# Detection
+# -------------------------------
+def _runs(mask):
+    """(row, start, end_exclusive) of every run of True along days, in row-major order."""
+    padded = np.zeros((mask.shape[0], mask.shape[1] + 2), dtype=np.int8)
+    padded[:, 1:-1] = mask
+    step = np.diff(padded, axis=1)
+    rows, starts = np.nonzero(step == 1)
+    _, ends = np.nonzero(step == -1)
+    return rows, starts, ends
+
+
+def _reduce(ufunc, values, rows, starts, ends):
+    """ufunc over values[row, start:end] for every run, in one reduceat call."""
+    flat = np.append(values.ravel(), 0.0)  # sentinel so an end at the last cell is a valid index
+    width = values.shape[1]
+    idx = np.empty(2 * len(rows), dtype=np.int64)
+    idx[0::2] = rows * width + starts
+    idx[1::2] = rows * width + ends
+    return ufunc.reduceat(flat, idx)[0::2] if len(rows) else np.empty(0)
+
+
+def detect_events(panel: PricePanel, our_prices=None, min_depth=MIN_DEPTH_PCT) -> pd.DataFrame:
+    """
+    All strategy events for the panel as a DataFrame with EVENT_COLUMNS.
+    our_prices: optional {product: price}; adds undercut events and undercut_pct.
+    """
+    price = panel.price
+    n_products, n_days = price.shape
+    ref = np.fmax(panel.mrp, rolling_max(price, REF_WINDOW_D))
+    with np.errstate(invalid="ignore", divide="ignore"):
+        depth = (1 - price / ref) * 100
+        hike = np.full_like(ref, np.nan)
+        hike[:, HIKE_LOOKBACK_D:] = (ref[:, HIKE_LOOKBACK_D:] / ref[:, :-HIKE_LOOKBACK_D] - 1) * 100
+    # forward fill carries prices past the last real observation; nothing after it is an event
+    observed = panel.observed
+    last_day = np.where(observed.any(axis=1), n_days - 1 - np.argmax(observed[:, ::-1], axis=1), -1)
+    live = np.arange(n_days)[None, :] <= last_day[:, None]
+    day_idx = np.arange(n_days)
+    last_obs = np.maximum.accumulate(np.where(observed, day_idx, -1), axis=1)
+    next_obs = np.minimum.accumulate(np.where(observed, day_idx, n_days)[:, ::-1], axis=1)[:, ::-1]
+    on_sale = _bridge((np.nan_to_num(depth, nan=0.0) >= min_depth) & live, MERGE_GAP_D)
+
+    our = np.full(n_products, np.nan)
+    if our_prices:
+        our = pd.Series(our_prices, dtype=np.float64).reindex(panel.products).to_numpy()
+    with np.errstate(invalid="ignore", divide="ignore"):
+        undercut = (our[:, None] - price) / our[:, None] * 100
+    undercut_mask = (np.nan_to_num(undercut, nan=0.0) >= UNDERCUT_MIN_PCT) & live
+
+    depth0, undercut0 = np.nan_to_num(depth, nan=0.0), np.nan_to_num(undercut, nan=-np.inf)
+
+    labels = np.asarray(panel.days.strftime("%Y-%m-%d"))  # formatted once per day, not per event
+    frames = []
+    sale_rows = None
+    for kind_mask, is_sale in ((on_sale, True), (undercut_mask, False)):
+        rows, starts, ends = _runs(kind_mask)
+        # filled days after a run's last real observation are not evidence that it lasted:
+        # one reading at 60 between two at 100 a month apart is not a 31-day markdown
+        ends = last_obs[rows, ends - 1] + 1
+        keep = ends > starts
+        rows, starts, ends = rows[keep], starts[keep], ends[keep]
+        if not len(rows):
+            continue
+        days = ends - starts
+        ongoing = ends - 1 >= last_day[rows]
+        if is_sale:
+            # flash only when the price is seen back within FLASH_MAX_DAYS of the start
+            back = next_obs[rows, np.minimum(ends, n_days - 1)]
+            flash = (back - starts <= FLASH_MAX_DAYS) & ~ongoing
+            kind = np.where(days >= MARKDOWN_MIN_DAYS, "markdown", np.where(flash, "flash_sale", "sale"))
+            sale_rows = rows
+        else:
+            kind = np.full(len(rows), "undercut")
+        frames.append(pd.DataFrame({
+            "row": rows,
+            "kind": kind,
+            "start": labels[starts],
+            "end": labels[ends - 1],
+            "days": days,
+            "ongoing": ongoing,
+            "depth_pct": _reduce(np.maximum, depth0, rows, starts, ends),
+            "mean_depth_pct": _reduce(np.add, depth0, rows, starts, ends) / days,
+            "min_price": _reduce(np.minimum, np.nan_to_num(price, nan=np.inf), rows, starts, ends),
+            "ref_price": ref[rows, starts],
+            "pre_hike_pct": hike[rows, starts],
+            "undercut_pct": _reduce(np.maximum, undercut0, rows, starts, ends),
+        }))
+    if not frames:
+        return pd.DataFrame(columns=EVENT_COLUMNS)
+
+    events = pd.concat(frames, ignore_index=True)
+    # frequency: promotions (markdowns excluded) per FREQ_WINDOW_D observed days
+    observed_days = observed.sum(axis=1).astype(np.float64)
+    observed_days[observed_days < MIN_SPAN_D] = np.nan
+    promos = np.zeros(n_products)
+    if sale_rows is not None:
+        sale_kinds = events.loc[events["kind"] != "undercut", "kind"].to_numpy()
+        np.add.at(promos, sale_rows[sale_kinds != "markdown"], 1)
+    events["sales_per_90d"] = (promos / observed_days * FREQ_WINDOW_D)[events["row"].to_numpy()]
+    events["product"] = panel.products[events["row"].to_numpy()]
+    events["undercut_pct"] = events["undercut_pct"].replace(-np.inf, np.nan)
+    for col in ("depth_pct", "mean_depth_pct", "pre_hike_pct", "undercut_pct", "sales_per_90d"):
+        events[col] = events[col].round(2)
+    return events[EVENT_COLUMNS].sort_values(["product", "start", "kind"], ignore_index=True)
+
+
+def to_events(df: pd.DataFrame) -> list:
+    return [StrategyEvent(*row) for row in df[EVENT_COLUMNS].itertuples(index=False, name=None)]
+
+
+def product_summary(events: pd.DataFrame) -> pd.DataFrame:
+    """Per product: promotions, their depth and length, markdowns and undercut days."""
+    promos = events[events["kind"].isin(["flash_sale", "sale"])]
+    out = pd.DataFrame({
+        "promotions": promos.groupby("product").size(),
+        "flash_sales": promos[promos["kind"] == "flash_sale"].groupby("product").size(),
+        "mean_depth_pct": promos.groupby("product")["depth_pct"].mean().round(2),
+        "mean_days": promos.groupby("product")["days"].mean().round(1),
+        "sales_per_90d": events.groupby("product")["sales_per_90d"].first(),
+        "markdowns": events[events["kind"] == "markdown"].groupby("product").size(),
+        "undercut_days": events[events["kind"] == "undercut"].groupby("product")["days"].sum(),
+    })
+    return out.fillna({"promotions": 0, "flash_sales": 0, "markdowns": 0, "undercut_days": 0})
+
+
+def load_our_prices(path) -> dict:
+    df = pd.read_csv(path, dtype={"product": str})
+    return dict(zip(df["product"], pd.to_numeric(df["our_price"], errors="coerce")))
+
+
+def parse_args(argv=None):
+    p = argparse.ArgumentParser(description="Detect competitor discount strategies over the price panel.")
+    p.add_argument("--history", nargs="*", default=[], help="price history CSVs (date, price)")
+    p.add_argument("--scrapes", nargs="*", default=[], help="catalog / product scrape CSV or XLSX files")
+    p.add_argument("--cdc", action="store_true", help="include Price / MRP changes from catalog_cdc")
+    p.add_argument("--catalog", default=None, help="with --cdc: only this catalog")
+    p.add_argument("--link", action="append", default=[], metavar="STEM=PRODUCT",
+                   help="treat a price history file as this product (e.g. its ASIN)")
+    p.add_argument("--our-prices", default=None, help="CSV with product, our_price")
+    p.add_argument("--min-depth", type=float, default=MIN_DEPTH_PCT)
+    p.add_argument("--synthetic", type=int, default=0, help="generate N products instead of reading files")
+    p.add_argument("--output", default=OUTPUT_PATH)
+    return p.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    t0 = time.perf_counter()
+    if args.synthetic:
+        obs = synthetic_observations(args.synthetic)
+    else:
+        links = dict(link.split("=", 1) for link in args.link)
+        frames = [observations_from_history(args.history, links)]
+        for path in args.scrapes:
+            df = pd.read_excel(path, dtype=str) if path.endswith((".xlsx", ".xls")) \
+                else pd.read_csv(path, dtype=str, keep_default_na=False)
+            frames.append(observations_from_scrapes(df))
+        if args.cdc:
+            from catalog_cdc import CatalogCDC
+
+            cdc = CatalogCDC()
+            try:
+                frames.append(observations_from_cdc(cdc, args.catalog))
+            finally:
+                cdc.close()
+        obs = pd.concat(frames, ignore_index=True)
+    if obs.empty:
+        print("[discount] No price observations.")
+        return 1
+    t1 = time.perf_counter()
+    panel = PricePanel.from_observations(obs)
+    our = load_our_prices(args.our_prices) if args.our_prices else None
+    events = detect_events(panel, our, args.min_depth)
+    t2 = time.perf_counter()
+
+    print(f"[discount] {len(panel.products)} products x {len(panel.days)} days: {len(events)} events "
+          f"in {t2 - t1:.2f}s (loading {t1 - t0:.2f}s)")
+    if not events.empty:
+        print(events["kind"].value_counts().to_string())
+        print(product_summary(events).sort_values("promotions", ascending=False).head(10).to_string())
+        os.makedirs(os.path.dirname(args.output) or ".", exist_ok=True)
+        events.to_csv(args.output, index=False, encoding="utf-8-sig")
+        print(f"[discount] Saved events → {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
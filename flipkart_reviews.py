@@ -0,0 +1,260 @@
+# flipkart_reviews.py
+# Flipkart review crawler: resolve the listing once, then fetch pages by URL in parallel.
+#
+#   python flipkart_reviews.py "https://www.flipkart.com/<slug>/p/<itm>?pid=..." --max-pages 100 --workers 4
+#
+# The old scrapers found "all reviews" by asking WebDriver for the text of
+# every <a> on the product page and then clicked "Next" once per page, each a
+# full render. Review listings are plain URLs (/<slug>/product-reviews/<itm>
+# ?pid=...&page=N) and the first page says "Page 1 of N", so here the listing
+# URL and page count are resolved once and pages 2..N are fetched
+# concurrently over the shared requests session (session_manager). The Pacer
+# still spaces request starts, so concurrency overlaps latency rather than
+# raising the request rate. Pages come back in order. A page that does not
+# parse over HTTP is loaded by URL in the browser when a driver is given, and
+# clicking "Next" is only used when no listing URL can be found at all.
+
+import argparse
+import math
+import os
+import re
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from urllib.parse import parse_qsl, urlencode, urljoin, urlsplit, urlunsplit
+
+import pandas as pd
+from bs4 import BeautifulSoup
+
+from page_ready import PACER, click_and_wait, wait_ready
+from selector_registry import REGISTRY
+from session_manager import get_session_manager
+
+BASE_URL = "https://www.flipkart.com"
+OUTPUT_DIR = "output"
+WORKERS = 4
+HEADERS = {
+    "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 Chrome/120.0 Safari/537.36",
+    "Accept-Language": "en-US,en;q=0.9",
+}
+_PAGE_OF = re.compile(r"Page\s+\d+\s+of\s+([\d,]+)")
+_REVIEW_TOTAL = re.compile(r"([\d,]+)\s+Reviews")
+REVIEWS_PER_PAGE = 10
+
+
+# -------------------------------
+# URLs and page count
+# -------------------------------
+def page_url(listing, page):
+    parts = urlsplit(listing)
+    query = [(k, v) for k, v in parse_qsl(parts.query) if k != "page"] + [("page", str(page))]
+    return urlunsplit(parts._replace(query=urlencode(query)))
+
+
+def listing_url(product_url, html=None):
+    """Review-listing URL for a product: the URL itself, a link on the page, or /p/ -> /product-reviews/."""
+    if "/product-reviews/" in product_url:
+        return product_url
+    if html:
+        a = BeautifulSoup(html, "html.parser").select_one("a[href*='/product-reviews/']")
+        if a is not None:
+            return urljoin(BASE_URL, a["href"])
+    if "/p/" in product_url:
+        return product_url.replace("/p/", "/product-reviews/", 1)
+    return None
+
+
+def page_count(soup):
+    """Total listing pages from "Page 1 of N", else from the review total; None when neither is shown."""
+    node = soup.find(string=_PAGE_OF)
+    if node is not None:
+        return int(_PAGE_OF.search(node).group(1).replace(",", ""))
+    node = soup.find(string=_REVIEW_TOTAL)
+    if node is not None:
+        return math.ceil(int(_REVIEW_TOTAL.search(node).group(1).replace(",", "")) / REVIEWS_PER_PAGE)
+    return None
+
+
+# -------------------------------
+# Parsing
+# -------------------------------
+def parse_reviews(soup):
+    """Review rows (Ascrape_review.REVIEW_COLUMNS) from one listing page."""
+    rows = []
+    for blk in REGISTRY.select(soup, "flipkart", "review_blocks"):
+        stars = REGISTRY.select_one(blk, "flipkart", "review_rating")
+        title = REGISTRY.select_one(blk, "flipkart", "review_title")
+        body = REGISTRY.select_one(blk, "flipkart", "review_body")
+        # reviewer + date are the first two small-print lines
+        small_texts = blk.find_all("p", class_="_2sc7ZR")
+        rows.append({
+            "Review_Title": title.get_text(strip=True) if title else "",
+            "Review_Body": body.get_text(" ", strip=True) if body else "",
+            "Review_Stars": stars.get_text(strip=True) if stars else "",
+            "Reviewer": small_texts[0].get_text(strip=True) if len(small_texts) > 0 else "",
+            "Review_Date": small_texts[1].get_text(strip=True) if len(small_texts) > 1 else "",
+            "Source": "Flipkart",
+        })
+    return rows
+
+
+# -------------------------------
+# Fetching
+# -------------------------------
+def _get(session, url):
+    PACER.wait("flipkart")
+    r = session.get(url, headers=HEADERS, timeout=20)
+    return BeautifulSoup(r.text, "html.parser") if r.status_code == 200 else None
+
+
+def _browser_page(driver, url):
+    PACER.wait("flipkart")
+    driver.get(url)
+    wait_ready(driver, "flipkart-reviews")
+    return BeautifulSoup(driver.page_source, "html.parser")
+
+
+def _click_pages(driver, product_url, max_pages):
+    # last resort: no listing URL, so walk "Next" in the browser
+    from selenium.webdriver.common.by import By
+
+    if driver.current_url != product_url:
+        driver.get(product_url)
+    wait_ready(driver, "flipkart-reviews")
+    for page in range(1, max_pages + 1):
+        soup = BeautifulSoup(driver.page_source, "html.parser")
+        yield page, soup
+        links = driver.find_elements(By.XPATH, "//a[contains(text(),'Next') or contains(text(),'next') "
+                                               "or contains(@aria-label,'Next')]")
+        links = [el for el in links if el.is_displayed()] or \
+            [el for el in driver.find_elements(By.CSS_SELECTOR, "a._1LKTO3") if el.is_displayed() and "Next" in el.text]
+        if not links:
+            return
+        PACER.wait("flipkart")
+        click_and_wait(driver, links[0], "flipkart-reviews")
+
+
+def iter_review_soups(product_url, max_pages=None, workers=WORKERS, driver=None, session=None):
+    """
+    Yields (page, soup) for the review listing, in page order. Pages 2..N are
+    fetched concurrently, at most workers * 2 ahead of the consumer; stops at
+    the first page that cannot be fetched, and pending fetches are cancelled
+    when the consumer stops early. When the first page shows no page count,
+    pages are fetched (up to max_pages) until one has no review blocks.
+    """
+    session = session or get_session_manager("flipkart").requests_session()
+    listing = listing_url(product_url)
+    first = _get(session, page_url(listing, 1)) if listing else None
+    if first is None or not REGISTRY.select(first, "flipkart", "review_blocks"):
+        # the product page itself may carry the real listing link (slug/itm differ from the product URL)
+        html = None
+        if driver is not None:
+            driver.get(product_url)
+            wait_ready(driver, "flipkart-product")
+            html = driver.page_source
+        else:
+            res = session.get(product_url, headers=HEADERS, timeout=20)
+            html = res.text if res.status_code == 200 else None
+        found = listing_url(product_url, html) if html else None
+        if found and found != listing:
+            listing = found
+            first = _get(session, page_url(listing, 1))
+        if (first is None or not REGISTRY.select(first, "flipkart", "review_blocks")) and driver is not None:
+            if listing is None:
+                yield from _click_pages(driver, product_url, max_pages or 10 ** 6)
+                return
+            first = _browser_page(driver, page_url(listing, 1))
+    if first is None:
+        return
+
+    total = page_count(first)
+    if total is None:
+        # no "Page 1 of N": keep going (up to max_pages) until a page has no review blocks
+        last = max_pages or math.inf
+    else:
+        last = min(total, max_pages) if max_pages else total
+    print(f"[flipkart] {listing} — {total or 'unknown'} review pages, fetching up to {'the first empty page' if last == math.inf else last}")
+    yield 1, first
+    if last < 2:
+        return
+
+    # at most workers * 2 pages in flight, so finished soups never pile up ahead of the consumer
+    window = workers * 2
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        futures = {}
+        submitted = 1
+        try:
+            page = 1
+            while page < last:
+                page += 1
+                while submitted < min(last, page + window - 1):
+                    submitted += 1
+                    futures[submitted] = pool.submit(_get, session, page_url(listing, submitted))
+                try:
+                    soup = futures.pop(page).result()
+                except Exception as e:
+                    print(f"[flipkart] page {page} failed over HTTP: {e}")
+                    soup = None
+                if (soup is None or not REGISTRY.select(soup, "flipkart", "review_blocks")) and driver is not None:
+                    soup = _browser_page(driver, page_url(listing, page))
+                if soup is None:
+                    return
+                if total is None and not REGISTRY.select(soup, "flipkart", "review_blocks"):
+                    return  # past the end of a listing of unknown length
+                yield page, soup
+        finally:
+            for f in futures.values():
+                f.cancel()
+
+
+def iter_reviews(product_url, max_pages=None, workers=WORKERS, driver=None, existing_hashes=None):
+    """Review rows in page order, deduplicated on title + body + date."""
+    seen = set() if existing_hashes is None else existing_hashes
+    try:
+        for page, soup in iter_review_soups(product_url, max_pages, workers, driver):
+            rows = parse_reviews(soup)
+            if not rows:
+                print("No more Flipkart reviews found.")
+                return
+            print(f"--> Flipkart-Page {page}: {len(rows)} reviews")
+            for r in rows:
+                h = hash(r["Review_Title"] + r["Review_Body"] + r["Review_Date"])
+                if h not in seen:
+                    seen.add(h)
+                    yield r
+    finally:
+        REGISTRY.save()
+
+
+def parse_args(argv=None):
+    p = argparse.ArgumentParser(description="Crawl a Flipkart review listing by URL, pages in parallel.")
+    p.add_argument("url", help="Flipkart product or product-reviews URL")
+    p.add_argument("--max-pages", type=int, default=None)
+    p.add_argument("--workers", type=int, default=WORKERS)
+    p.add_argument("--browser", action="store_true", help="use a headless browser for pages HTTP cannot parse")
+    return p.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    driver = None
+    if args.browser:
+        from Ascrape_review import setup_driver
+        driver = setup_driver(lean=True)
+    try:
+        rows = list(iter_reviews(args.url, args.max_pages, args.workers, driver))
+    finally:
+        if driver is not None:
+            driver.quit()
+    if not rows:
+        print("❌ No Flipkart reviews scraped.")
+        return 1
+    os.makedirs(OUTPUT_DIR, exist_ok=True)
+    path = os.path.join(OUTPUT_DIR, f"flipkart_reviews_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv")
+    pd.DataFrame(rows).to_csv(path, index=False, encoding="utf-8-sig")
+    print(f"✅ Saved {len(rows)} reviews to {path}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
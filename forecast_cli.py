@@ -0,0 +1,156 @@
+# forecast_cli.py
+# Headless forecasting entry point.
+#
+#   python forecast_cli.py --backend lstm --steps 30 --plot
+#
+# Writes <output-dir>/<stem>_<backend>_forecast.csv and _metrics.json.
+# TensorFlow / scikit-learn are only imported when an LSTM backend is chosen,
+# matplotlib only with --plot (Agg backend, saved to PNG, never plt.show()).
+# Every run appends its start-up timings to <output-dir>/forecast_cold_start.csv.
+
+import time
+
+_T0 = time.perf_counter()
+
+import argparse
+import csv
+import json
+import os
+import sys
+from datetime import datetime
+
+import pandas as pd
+
+from forecasting import (DEFAULT_PRICE_CSV, FORECASTERS, load_price_history, make_forecaster, make_windows,
+                         regression_metrics, save_forecaster)
+
+COLD_START_LOG = "forecast_cold_start.csv"
+
+
+def parse_args(argv=None):
+    p = argparse.ArgumentParser(description="Train a price forecaster and write forecasts/metrics to files.")
+    p.add_argument("--csv", default=DEFAULT_PRICE_CSV, help="price history CSV with date,price columns")
+    p.add_argument("--backend", default="lstm", choices=sorted(FORECASTERS))
+    p.add_argument("--steps", type=int, default=30, help="days to forecast past the last observation")
+    p.add_argument("--test-size", type=float, default=0.2, help="hold-out fraction used for metrics")
+    p.add_argument("--uplift", type=float, default=1.0, help="multiply the future forecast (1.10 = +10%%)")
+    p.add_argument("--window", type=int, default=None)
+    p.add_argument("--epochs", type=int, default=None)
+    p.add_argument("--output-dir", default="output")
+    p.add_argument("--plot", action="store_true", help="save a PNG plot (non-interactive backend)")
+    p.add_argument("--metrics-only", action="store_true", help="skip the future forecast")
+    p.add_argument("--register", metavar="NAME", default=None,
+                   help="save the fitted model under models/NAME for forecast_server.py")
+    return p.parse_args(argv)
+
+
+def save_plot(path, df, window, split_idx, holdout_pred, forecast_df):
+    import matplotlib
+    matplotlib.use("Agg")
+    import matplotlib.pyplot as plt
+
+    fig = plt.figure(figsize=(12, 6))
+    plt.plot(df["date"].iloc[window:], df["price"].iloc[window:], label="Actual Price", linewidth=2)
+    plt.plot(df["date"].iloc[window + split_idx:], holdout_pred, label="Predicted Price", linewidth=2)
+    if forecast_df is not None:
+        plt.plot(forecast_df["date"], forecast_df["forecast_price"], label="Future Forecast", linewidth=2)
+    plt.title("Actual vs Predicted vs Forecasted Prices")
+    plt.xlabel("Date")
+    plt.ylabel("Price")
+    plt.legend()
+    plt.grid(True)
+    fig.savefig(path, dpi=120, bbox_inches="tight")
+    plt.close(fig)
+
+
+def record_cold_start(output_dir, row):
+    path = os.path.join(output_dir, COLD_START_LOG)
+    new_file = not os.path.exists(path)
+    with open(path, "a", newline="", encoding="utf-8") as f:
+        writer = csv.DictWriter(f, fieldnames=list(row))
+        if new_file:
+            writer.writeheader()
+        writer.writerow(row)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    cli_ready_s = time.perf_counter() - _T0
+    os.makedirs(args.output_dir, exist_ok=True)
+
+    df = load_price_history(args.csv)
+    prices = df["price"].to_numpy(dtype="float64")
+    forecaster = make_forecaster(args.backend, window=args.window, epochs=args.epochs)
+    window = forecaster.window
+
+    # 1) Hold-out evaluation on the chronological tail
+    X, y = make_windows(prices, window)
+    split_idx = int(len(X) * (1 - args.test_size))
+    if split_idx < 1 or split_idx >= len(X):
+        print(f"[forecast] Not enough data for window={window} and test-size={args.test_size}")
+        return 1
+
+    t_import = time.perf_counter()
+    forecaster.load_backend()
+    backend_import_s = time.perf_counter() - t_import
+
+    t_fit = time.perf_counter()
+    forecaster.fit(prices[:split_idx + window])
+    fit_s = time.perf_counter() - t_fit
+
+    holdout_pred = forecaster.predict_next(X[split_idx:])
+    metrics = regression_metrics(y[split_idx:], holdout_pred)
+
+    # 2) Future forecast from the last observed window
+    forecast_df = None
+    if not args.metrics_only:
+        future = forecaster.forecast(prices, args.steps) * args.uplift
+        future_dates = pd.date_range(start=df["date"].max() + pd.Timedelta(days=1), periods=args.steps)
+        forecast_df = pd.DataFrame({"date": future_dates, "forecast_price": future})
+
+    stem = f"{os.path.splitext(os.path.basename(args.csv))[0]}_{args.backend}"
+    if forecast_df is not None:
+        out_forecast = os.path.join(args.output_dir, f"{stem}_forecast.csv")
+        forecast_df.to_csv(out_forecast, index=False, encoding="utf-8-sig")
+        print(f"[forecast] Saved forecast → {out_forecast}")
+
+    out_metrics = os.path.join(args.output_dir, f"{stem}_metrics.json")
+    with open(out_metrics, "w", encoding="utf-8") as f:
+        json.dump({
+            "backend": args.backend,
+            "params": forecaster.params(),
+            "train_rows": split_idx,
+            "test_rows": len(X) - split_idx,
+            "metrics": metrics,
+            "fit_seconds": round(fit_s, 3),
+        }, f, indent=2)
+    print(f"[forecast] Saved metrics → {out_metrics}")
+
+    if args.register:
+        path = save_forecaster(forecaster, args.register, args.backend, last_window=prices[-window:])
+        print(f"[forecast] Registered model → {path}")
+
+    if args.plot:
+        out_plot = os.path.join(args.output_dir, f"{stem}_plot.png")
+        save_plot(out_plot, df, window, split_idx, holdout_pred, forecast_df)
+        print(f"[forecast] Saved plot → {out_plot}")
+
+    record_cold_start(args.output_dir, {
+        "run_at": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+        "backend": args.backend,
+        "cli_ready_s": round(cli_ready_s, 4),
+        "backend_import_s": round(backend_import_s, 4),
+        "fit_s": round(fit_s, 4),
+        "total_s": round(time.perf_counter() - _T0, 4),
+    })
+
+    print("\n----- Model Evaluation -----")
+    print(f"MSE  : {metrics['mse']:.2f}")
+    print(f"MAE  : {metrics['mae']:.2f}")
+    print(f"RMSE : {metrics['rmse']:.2f}")
+    print(f"R²   : {metrics['r2']:.4f}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,248 @@
+# forecast_server.py
+# Long-running local forecast service for models registered with
+#   python forecast_cli.py --backend lstm --register s24_amazon
+#
+#   python forecast_server.py --port 8765
+#   python forecast_server.py --unix-socket /tmp/forecast.sock
+#
+# Endpoints (JSON):
+#   POST /forecast  {"model": "s24_amazon", "steps": 7, "history": [..optional..]}
+#   GET  /models    registered models
+#   GET  /metrics   request count, p50/p99 latency (ms), batch-size stats per model
+#
+# Models are loaded once at start-up. Concurrent requests for the same model are
+# queued and coalesced by a per-model batcher thread into one forecast_batch()
+# call (up to --max-batch requests, waiting at most --max-wait-ms for stragglers).
+
+import argparse
+import json
+import os
+import queue
+import socketserver
+import sys
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import numpy as np
+
+from forecasting import MODEL_DIR, forecast_batch, list_models, load_forecaster
+
+MAX_STEPS = 365
+
+
+class MicroBatcher:
+    """Collects requests for one model and answers them with a single model call."""
+
+    def __init__(self, name, forecaster, meta, max_batch=64, max_wait_ms=5.0):
+        self.name = name
+        self.forecaster = forecaster
+        self.meta = meta
+        self.max_batch = max_batch
+        self.max_wait = max_wait_ms / 1000.0
+        self.requests = queue.Queue()
+        self.latencies_ms = deque(maxlen=10000)
+        self.batch_sizes = deque(maxlen=10000)
+        self.served = 0
+        self.errors = 0
+        self._lock = threading.Lock()
+        self._thread = threading.Thread(target=self._loop, name=f"batcher-{name}", daemon=True)
+        self._thread.start()
+
+    def submit(self, window: np.ndarray, steps: int) -> Future:
+        fut = Future()
+        self.requests.put((window, steps, fut, time.perf_counter()))
+        return fut
+
+    def _loop(self):
+        while True:
+            batch = [self.requests.get()]
+            deadline = time.perf_counter() + self.max_wait
+            while len(batch) < self.max_batch:
+                remaining = deadline - time.perf_counter()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(self.requests.get(timeout=remaining))
+                except queue.Empty:
+                    break
+            self._run(batch)
+
+    def _run(self, batch):
+        windows = np.stack([b[0] for b in batch])
+        steps = max(b[1] for b in batch)
+        try:
+            preds = forecast_batch(self.forecaster, windows, steps)
+        except Exception as e:
+            with self._lock:
+                self.errors += len(batch)
+            for _, _, fut, _ in batch:
+                fut.set_exception(e)
+            return
+
+        done = time.perf_counter()
+        with self._lock:
+            self.batch_sizes.append(len(batch))
+            for i, (_, n, fut, t0) in enumerate(batch):
+                self.latencies_ms.append((done - t0) * 1000.0)
+                self.served += 1
+                fut.set_result(preds[i, :n].tolist())
+
+    def stats(self) -> dict:
+        # null until the first request: NaN is not valid JSON
+        with self._lock:
+            lat = np.array(self.latencies_ms)
+            sizes = np.array(self.batch_sizes)
+            return {
+                "served": self.served,
+                "errors": self.errors,
+                "batches": len(self.batch_sizes),
+                "latency_ms_p50": round(float(np.percentile(lat, 50)), 3) if lat.size else None,
+                "latency_ms_p99": round(float(np.percentile(lat, 99)), 3) if lat.size else None,
+                "batch_size_mean": round(float(np.mean(sizes)), 2) if sizes.size else None,
+                "batch_size_max": int(np.max(sizes)) if sizes.size else None,
+                "queue_depth": self.requests.qsize(),
+            }
+
+
+class ForecastService:
+    def __init__(self, model_dir=MODEL_DIR, names=None, max_batch=64, max_wait_ms=5.0, prefer_exported=True):
+        self.batchers = {}
+        for name in names or list_models(model_dir):
+            forecaster, meta = load_forecaster(name, model_dir, prefer_exported)
+            self.batchers[name] = MicroBatcher(name, forecaster, meta, max_batch, max_wait_ms)
+            print(f"[serve] Loaded model '{name}' ({meta['backend']} via {forecaster.name}, window={forecaster.window})")
+        self.started = time.time()
+
+    def forecast(self, payload: dict) -> dict:
+        if not isinstance(payload, dict):
+            raise ValueError("request body must be a JSON object")
+        name = payload.get("model")
+        if name not in self.batchers:
+            raise KeyError(f"Unknown model '{name}'")
+        batcher = self.batchers[name]
+        window = batcher.forecaster.window
+        steps = int(payload.get("steps", 7))
+        if not 1 <= steps <= MAX_STEPS:
+            raise ValueError(f"steps must be between 1 and {MAX_STEPS}")
+        history = payload.get("history") or batcher.meta.get("last_window") or []
+        history = np.asarray(history, dtype="float64").ravel()
+        if len(history) < window:
+            raise ValueError(f"history needs at least {window} prices for model '{name}'")
+        forecast = batcher.submit(history[-window:], steps).result()
+        return {"model": name, "steps": steps, "forecast": forecast}
+
+    def models(self) -> dict:
+        return {name: {"backend": b.meta["backend"], "params": b.meta["params"], "saved_at": b.meta.get("saved_at")}
+                for name, b in self.batchers.items()}
+
+    def metrics(self) -> dict:
+        return {
+            "uptime_s": round(time.time() - self.started, 1),
+            "models": {name: b.stats() for name, b in self.batchers.items()},
+        }
+
+
+def make_handler(service: ForecastService):
+    class Handler(BaseHTTPRequestHandler):
+        def _send(self, code, body):
+            data = json.dumps(body).encode("utf-8")
+            self.send_response(code)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def do_GET(self):
+            if self.path == "/metrics":
+                self._send(200, service.metrics())
+            elif self.path == "/models":
+                self._send(200, service.models())
+            else:
+                self._send(404, {"error": "not found"})
+
+        def do_POST(self):
+            if self.path != "/forecast":
+                self._send(404, {"error": "not found"})
+                return
+            try:
+                length = int(self.headers.get("Content-Length") or 0)
+                payload = json.loads(self.rfile.read(length) or b"{}")
+                self._send(200, service.forecast(payload))
+            except KeyError as e:
+                self._send(404, {"error": str(e)})
+            except (ValueError, TypeError) as e:
+                self._send(400, {"error": str(e)})
+            except Exception as e:
+                self._send(500, {"error": str(e)})
+
+        # unix-socket peers have no (host, port) address
+        def address_string(self):
+            return self.client_address[0] if self.client_address else "unix"
+
+        def log_message(self, fmt, *args):
+            pass
+
+    return Handler
+
+
+# socketserver's default listen backlog of 5 resets bursts of concurrent clients
+class ForecastHTTPServer(ThreadingHTTPServer):
+    request_queue_size = 256
+
+
+class ThreadingUnixHTTPServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+    request_queue_size = 256
+
+    def server_bind(self):
+        socketserver.UnixStreamServer.server_bind(self)
+        self.server_name, self.server_port = "localhost", 0
+
+
+def parse_args(argv=None):
+    p = argparse.ArgumentParser(description="Serve registered price forecasters over HTTP or a Unix socket.")
+    p.add_argument("--host", default="127.0.0.1")
+    p.add_argument("--port", type=int, default=8765)
+    p.add_argument("--unix-socket", default=None, help="listen on this socket path instead of TCP")
+    p.add_argument("--model-dir", default=MODEL_DIR)
+    p.add_argument("--models", nargs="*", default=None, help="subset of registered models to load")
+    p.add_argument("--max-batch", type=int, default=64)
+    p.add_argument("--max-wait-ms", type=float, default=5.0)
+    p.add_argument("--keras", action="store_true", help="ignore NumPy exports and serve through Keras")
+    return p.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    service = ForecastService(args.model_dir, args.models, args.max_batch, args.max_wait_ms,
+                              prefer_exported=not args.keras)
+    if not service.batchers:
+        print(f"[serve] No registered models in '{args.model_dir}'. Use forecast_cli.py --register NAME.")
+        return 1
+
+    handler = make_handler(service)
+    if args.unix_socket:
+        if os.path.exists(args.unix_socket):
+            os.remove(args.unix_socket)
+        server = ThreadingUnixHTTPServer(args.unix_socket, handler)
+        print(f"[serve] Listening on unix:{args.unix_socket}")
+    else:
+        server = ForecastHTTPServer((args.host, args.port), handler)
+        print(f"[serve] Listening on http://{args.host}:{args.port}")
+
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        if args.unix_socket and os.path.exists(args.unix_socket):
+            os.remove(args.unix_socket)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,290 @@
+# forecasting.py
+# Reusable price-forecasting pieces behind forecasting_model.py / prediction.py.
+# TensorFlow and scikit-learn are imported inside the functions that need them,
+# so importing this module (or running the "naive" backend) stays cheap.
+
+import inspect
+import json
+import os
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+DEFAULT_PRICE_CSV = "samsung-galaxy-s24-5g-ai-smartphone-marble-gray-8gb-128gb-storage_amazon_price_history.csv"
+
+# Hand-picked configurations from the two original scripts
+PRESETS = {
+    # forecasting_model.py: small LSTM for a tiny dataset
+    "lstm": {
+        "window": 3,
+        "lstm_units": (32,),
+        "bidirectional": False,
+        "dropout": 0.2,
+        "dense_units": 16,
+        "epochs": 100,
+        "batch_size": 4,
+    },
+    # prediction.py: stacked Bidirectional LSTM
+    "bilstm": {
+        "window": 15,
+        "lstm_units": (128, 64, 32),
+        "bidirectional": True,
+        "dropout": 0.3,
+        "dense_units": 64,
+        "epochs": 200,
+        "batch_size": 15,
+    },
+}
+
+
+# -------------------------------
+# Data helpers
+# -------------------------------
+def load_price_history(path: str) -> pd.DataFrame:
+    df = pd.read_csv(path)
+    df["date"] = pd.to_datetime(df["date"], utc=True, errors="coerce")
+    df["price"] = pd.to_numeric(df["price"], errors="coerce")
+    df = df.dropna(subset=["date", "price"]).sort_values("date").reset_index(drop=True)
+    return df
+
+
+def make_windows(series: np.ndarray, window: int):
+    """Return (X, y) where X[i] = series[i:i+window] and y[i] = series[i+window]."""
+    series = np.asarray(series, dtype="float64").ravel()
+    if len(series) <= window:
+        return np.empty((0, window)), np.empty(0)
+    X = np.lib.stride_tricks.sliding_window_view(series[:-1], window)
+    y = series[window:]
+    return np.ascontiguousarray(X), y
+
+
+def regression_metrics(actual, predicted) -> dict:
+    actual = np.asarray(actual, dtype="float64").ravel()
+    predicted = np.asarray(predicted, dtype="float64").ravel()
+    err = actual - predicted
+    mse = float(np.mean(err ** 2))
+    ss_tot = float(np.sum((actual - actual.mean()) ** 2))
+    r2 = 1.0 - float(np.sum(err ** 2)) / ss_tot if ss_tot > 0 else float("nan")
+    return {
+        "mse": mse,
+        "mae": float(np.mean(np.abs(err))),
+        "rmse": float(np.sqrt(mse)),
+        "r2": r2,
+    }
+
+
+# -------------------------------
+# Forecasters
+# -------------------------------
+# Every forecaster exposes the same small interface:
+#   load_backend()               -> import whatever heavy libraries it needs
+#   fit(prices)                  -> self
+#   predict_next(windows)        -> next price for each row of a (n, window) array
+#   forecast(history, steps)     -> recursive multi-step forecast
+class NaiveForecaster:
+    """Last observed price carried forward. No heavy imports; useful baseline."""
+
+    name = "naive"
+
+    def __init__(self, window: int = 1):
+        self.window = window
+
+    def params(self) -> dict:
+        return {"window": self.window}
+
+    def load_backend(self):
+        pass
+
+    def fit(self, prices):
+        return self
+
+    def predict_next(self, windows):
+        windows = np.asarray(windows, dtype="float64")
+        return windows[:, -1]
+
+    def forecast(self, history, steps: int):
+        return forecast_recursive(self, history, steps)
+
+
+class LSTMForecaster:
+    """Keras LSTM on RobustScaler-ed prices, configured like the original scripts."""
+
+    name = "lstm"
+
+    def __init__(self, window=3, lstm_units=(32,), bidirectional=False, dropout=0.2,
+                 dense_units=16, epochs=100, batch_size=4, verbose=0):
+        self.window = window
+        self.lstm_units = tuple(lstm_units)
+        self.bidirectional = bidirectional
+        self.dropout = dropout
+        self.dense_units = dense_units
+        self.epochs = epochs
+        self.batch_size = batch_size
+        self.verbose = verbose
+        self.model = None
+        self.center_ = 0.0
+        self.scale_ = 1.0
+
+    def params(self) -> dict:
+        return {
+            "window": self.window,
+            "lstm_units": list(self.lstm_units),
+            "bidirectional": self.bidirectional,
+            "dropout": self.dropout,
+            "dense_units": self.dense_units,
+            "epochs": self.epochs,
+            "batch_size": self.batch_size,
+        }
+
+    def load_backend(self):
+        import sklearn.preprocessing  # noqa: F401
+        import tensorflow  # noqa: F401
+
+    # RobustScaler is fitted once; only its median/IQR are kept so that
+    # inference does not need scikit-learn.
+    def _fit_scaler(self, prices):
+        from sklearn.preprocessing import RobustScaler
+
+        scaler = RobustScaler().fit(np.asarray(prices, dtype="float64").reshape(-1, 1))
+        self.center_ = float(scaler.center_[0])
+        self.scale_ = float(scaler.scale_[0])
+
+    def _scale(self, values):
+        return (np.asarray(values, dtype="float64") - self.center_) / self.scale_
+
+    def _unscale(self, values):
+        return np.asarray(values, dtype="float64") * self.scale_ + self.center_
+
+    def build_model(self):
+        from tensorflow.keras.models import Sequential
+        from tensorflow.keras.layers import LSTM, Dense, Dropout, Bidirectional, Input
+
+        layers = [Input(shape=(self.window, 1))]
+        last = len(self.lstm_units) - 1
+        for i, units in enumerate(self.lstm_units):
+            lstm = LSTM(units, return_sequences=i < last)
+            if self.bidirectional and i < last:
+                lstm = Bidirectional(lstm)
+            layers.append(lstm)
+            if self.dropout and (i < last or last == 0):
+                layers.append(Dropout(self.dropout))
+        if self.dense_units:
+            layers.append(Dense(self.dense_units, activation="relu"))
+        layers.append(Dense(1))
+
+        model = Sequential(layers)
+        model.compile(optimizer="adam", loss="mse")
+        return model
+
+    def fit(self, prices):
+        self._fit_scaler(prices)
+        X, y = make_windows(self._scale(prices), self.window)
+        self.model = self.build_model()
+        self.model.fit(X[..., None], y, epochs=self.epochs, batch_size=self.batch_size,
+                       verbose=self.verbose)
+        return self
+
+    def predict_next(self, windows):
+        X = self._scale(windows).astype("float32")[..., None]
+        pred = self.model.predict(X, verbose=0).ravel()
+        return self._unscale(pred)
+
+    def forecast(self, history, steps: int):
+        return forecast_recursive(self, history, steps)
+
+
+FORECASTERS = {
+    "naive": NaiveForecaster,
+    "lstm": LSTMForecaster,
+    "bilstm": LSTMForecaster,
+}
+
+
+def make_forecaster(name: str, **overrides):
+    if name not in FORECASTERS:
+        raise ValueError(f"Unknown forecaster '{name}'. Choose from: {', '.join(FORECASTERS)}")
+    cls = FORECASTERS[name]
+    # CLI flags are shared by all backends; only forward the ones this backend takes
+    accepted = inspect.signature(cls).parameters
+    params = dict(PRESETS.get(name, {}))
+    params.update({k: v for k, v in overrides.items() if v is not None and k in accepted})
+    return cls(**params)
+
+
+def forecast_recursive(forecaster, history, steps: int):
+    """Feed each one-step prediction back in as input, like the original scripts."""
+    window = np.asarray(history, dtype="float64").ravel()[-forecaster.window:]
+    return forecast_batch(forecaster, window[None, :], steps)[0]
+
+
+def forecast_batch(forecaster, windows, steps: int):
+    """Recursive forecast for many (n, window) inputs at once: one model call per step."""
+    seq = np.asarray(windows, dtype="float64")
+    out = np.empty((seq.shape[0], steps))
+    for k in range(steps):
+        out[:, k] = forecaster.predict_next(seq[:, -forecaster.window:])
+        seq = np.concatenate([seq[:, 1:], out[:, k:k + 1]], axis=1)
+    return out
+
+
+# -------------------------------
+# Model registry on disk
+# -------------------------------
+# models/<name>/meta.json   backend, params, scaler stats, last observed window
+# models/<name>/model.keras Keras weights (LSTM backends only)
+# models/<name>/model.npz   optional NumPy export written by lstm_export.py
+MODEL_DIR = "models"
+
+
+def save_forecaster(forecaster, name: str, backend: str, last_window=None, model_dir=MODEL_DIR):
+    path = os.path.join(model_dir, name)
+    os.makedirs(path, exist_ok=True)
+    meta = {
+        "name": name,
+        "backend": backend,
+        "params": forecaster.params(),
+        "center": getattr(forecaster, "center_", 0.0),
+        "scale": getattr(forecaster, "scale_", 1.0),
+        "last_window": [float(v) for v in (last_window if last_window is not None else [])],
+        "saved_at": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+    }
+    if getattr(forecaster, "model", None) is not None:
+        forecaster.model.save(os.path.join(path, "model.keras"))
+    # an export belongs to the weights it was made from; re-run lstm_export.py after re-registering
+    exported = os.path.join(path, "model.npz")
+    if os.path.exists(exported):
+        os.remove(exported)
+    with open(os.path.join(path, "meta.json"), "w", encoding="utf-8") as f:
+        json.dump(meta, f, indent=2)
+    return path
+
+
+def load_meta(name: str, model_dir=MODEL_DIR) -> dict:
+    with open(os.path.join(model_dir, name, "meta.json"), encoding="utf-8") as f:
+        return json.load(f)
+
+
+def load_forecaster(name: str, model_dir=MODEL_DIR, prefer_exported=True):
+    """Load a registered model; uses the NumPy export (lstm_export.py) when present and parity-checked."""
+    meta = load_meta(name, model_dir)
+    exported = os.path.join(model_dir, name, "model.npz")
+    if prefer_exported and os.path.exists(exported) and meta.get("export", {}).get("parity_ok", False):
+        from lstm_export import NumpyLSTMForecaster
+
+        return NumpyLSTMForecaster(exported, meta), meta
+
+    forecaster = make_forecaster(meta["backend"], **meta["params"])
+    keras_path = os.path.join(model_dir, name, "model.keras")
+    if os.path.exists(keras_path):
+        from tensorflow.keras.models import load_model
+
+        forecaster.model = load_model(keras_path)
+        forecaster.center_, forecaster.scale_ = meta["center"], meta["scale"]
+    return forecaster, meta
+
+
+def list_models(model_dir=MODEL_DIR):
+    if not os.path.isdir(model_dir):
+        return []
+    return sorted(d for d in os.listdir(model_dir) if os.path.exists(os.path.join(model_dir, d, "meta.json")))
@@ -0,0 +1,232 @@
+# hyperparameter_search.py
+# Parallel search over window size and LSTM architecture for one product.
+#
+#   python hyperparameter_search.py --csv <price_history.csv> --trials 27 --max-epochs 90
+#
+# Successive halving: every trial is trained for a small epoch budget, the best
+# 1/eta move on to the next rung with eta× more epochs, the rest are pruned.
+# Inside each run EarlyStopping / ReduceLROnPlateau (as sketched in prediction.py)
+# stop a model once validation loss stalls. Windowed datasets are built once per
+# window size and cached as .npz, so trials only pay for training.
+
+import argparse
+import hashlib
+import json
+import os
+import random
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from multiprocessing import get_context
+
+import numpy as np
+import pandas as pd
+
+from backtesting import limited_threads
+from forecasting import DEFAULT_PRICE_CSV, LSTMForecaster, load_price_history, make_windows
+
+SEARCH_SPACE = {
+    "window": [3, 7, 15, 30],
+    "lstm_units": [(32,), (64,), (64, 32), (128, 64, 32)],
+    "bidirectional": [False, True],
+    "dropout": [0.0, 0.2, 0.3],
+    "dense_units": [16, 64],
+    "batch_size": [4, 16],
+}
+
+CACHE_DIR = os.path.join("output", ".window_cache")
+
+# per-process memo so a worker reuses datasets across the trials it runs
+_DATASETS = {}
+
+
+# -------------------------------
+# Cached window datasets
+# -------------------------------
+def file_fingerprint(path: str) -> str:
+    h = hashlib.sha1()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            h.update(chunk)
+    return h.hexdigest()[:12]
+
+
+def window_dataset(csv_path, window, val_fraction=0.2, cache_dir=CACHE_DIR):
+    """Scaled (X_train, y_train, X_val, y_val) plus scaler stats for one window size."""
+    key = f"{file_fingerprint(csv_path)}_w{window}_v{val_fraction}"
+    if key in _DATASETS:
+        return _DATASETS[key]
+
+    path = os.path.join(cache_dir, f"{key}.npz")
+    if os.path.exists(path):
+        with np.load(path) as npz:
+            data = {k: npz[k] for k in npz.files}
+    else:
+        prices = load_price_history(csv_path)["price"].to_numpy(dtype="float64")
+        split = int(len(prices) * (1 - val_fraction))
+        # scaler is fitted on the training part only, so validation stays unseen
+        median = np.median(prices[:split])
+        q1, q3 = np.percentile(prices[:split], [25, 75])
+        scale = (q3 - q1) or 1.0
+        X, y = make_windows((prices - median) / scale, window)
+        cut = split - window
+        data = {
+            "X_train": X[:cut], "y_train": y[:cut],
+            "X_val": X[cut:], "y_val": y[cut:],
+            "center": np.array(median), "scale": np.array(scale),
+        }
+        os.makedirs(cache_dir, exist_ok=True)
+        tmp = path + ".tmp.npz"
+        np.savez(tmp, **data)
+        os.replace(tmp, path)
+
+    _DATASETS[key] = data
+    return data
+
+
+# -------------------------------
+# Trial execution (worker side)
+# -------------------------------
+def sample_trials(n_trials: int, seed: int = 42):
+    rng = random.Random(seed)
+    seen, trials = set(), []
+    for _ in range(n_trials * 20):
+        params = {k: rng.choice(v) for k, v in SEARCH_SPACE.items()}
+        # a single LSTM layer has nothing to wrap bidirectionally
+        if len(params["lstm_units"]) == 1:
+            params["bidirectional"] = False
+        key = json.dumps(params, sort_keys=True)
+        if key not in seen:
+            seen.add(key)
+            trials.append(params)
+        if len(trials) == n_trials:
+            break
+    return trials
+
+
+def run_trial(trial_id, params, csv_path, epochs, patience, val_fraction):
+    from tensorflow.keras.callbacks import EarlyStopping, ReduceLROnPlateau
+
+    t0 = time.perf_counter()
+    data = window_dataset(csv_path, params["window"], val_fraction)
+    if len(data["X_train"]) < params["batch_size"] or len(data["X_val"]) == 0:
+        return {"trial": trial_id, "val_rmse": float("inf"), "epochs_run": 0, "seconds": 0.0}
+
+    forecaster = LSTMForecaster(epochs=epochs, **params)
+    forecaster.center_, forecaster.scale_ = float(data["center"]), float(data["scale"])
+    model = forecaster.build_model()
+    history = model.fit(
+        data["X_train"][..., None], data["y_train"],
+        validation_data=(data["X_val"][..., None], data["y_val"]),
+        epochs=epochs,
+        batch_size=params["batch_size"],
+        verbose=0,
+        callbacks=[
+            EarlyStopping(monitor="val_loss", patience=patience, restore_best_weights=True),
+            ReduceLROnPlateau(monitor="val_loss", factor=0.5, patience=max(1, patience // 2)),
+        ],
+    )
+    pred = model.predict(data["X_val"][..., None], verbose=0).ravel()
+    # report in price units so trials with different windows are comparable
+    val_rmse = float(np.sqrt(np.mean((pred - data["y_val"]) ** 2)) * forecaster.scale_)
+    return {
+        "trial": trial_id,
+        "val_rmse": val_rmse,
+        "epochs_run": len(history.history["loss"]),
+        "seconds": time.perf_counter() - t0,
+    }
+
+
+# -------------------------------
+# Successive halving driver
+# -------------------------------
+def search(csv_path, n_trials=27, min_epochs=10, max_epochs=90, eta=3, patience=10,
+           val_fraction=0.2, workers=None, seed=42):
+    trials = sample_trials(n_trials, seed)
+    status = {i: {"trial": i, **p, "rung": 0, "status": "running", "val_rmse": np.nan,
+                  "epochs_run": 0, "seconds": 0.0} for i, p in enumerate(trials)}
+
+    # warm the cache in the parent so workers only ever read it
+    for w in sorted({p["window"] for p in trials}):
+        window_dataset(csv_path, w, val_fraction)
+
+    alive = list(status)
+    epochs = min_epochs
+    rung = 0
+    workers = workers or os.cpu_count() or 1
+    with limited_threads(1), ProcessPoolExecutor(max_workers=workers, mp_context=get_context("spawn")) as pool:
+        while alive:
+            print(f"[search] rung {rung}: {len(alive)} trials × {epochs} epochs")
+            futures = [pool.submit(run_trial, i, trials[i], csv_path, epochs, patience, val_fraction)
+                       for i in alive]
+            for fut in as_completed(futures):
+                r = fut.result()
+                row = status[r["trial"]]
+                row.update(rung=rung, val_rmse=r["val_rmse"], epochs_run=r["epochs_run"])
+                row["seconds"] += r["seconds"]
+
+            ranked = sorted(alive, key=lambda i: status[i]["val_rmse"])
+            if epochs >= max_epochs or len(ranked) <= 1:
+                for i in ranked:
+                    status[i]["status"] = "completed"
+                break
+            keep = max(1, len(ranked) // eta)
+            for i in ranked[keep:]:
+                status[i]["status"] = "pruned"
+            alive = ranked[:keep]
+            epochs = min(max_epochs, epochs * eta)
+            rung += 1
+
+    table = pd.DataFrame(status.values()).sort_values(["status", "val_rmse"])
+    table["lstm_units"] = table["lstm_units"].map(lambda u: "-".join(map(str, u)))
+    return table
+
+
+def parse_args(argv=None):
+    p = argparse.ArgumentParser(description="Successive-halving hyperparameter search for the LSTM forecaster.")
+    p.add_argument("--csv", default=DEFAULT_PRICE_CSV)
+    p.add_argument("--trials", type=int, default=27)
+    p.add_argument("--min-epochs", type=int, default=10)
+    p.add_argument("--max-epochs", type=int, default=90)
+    p.add_argument("--eta", type=int, default=3, help="keep the best 1/eta trials at each rung")
+    p.add_argument("--patience", type=int, default=10, help="EarlyStopping patience (epochs)")
+    p.add_argument("--val-fraction", type=float, default=0.2)
+    p.add_argument("--workers", type=int, default=None, help="defaults to all CPU cores")
+    p.add_argument("--seed", type=int, default=42)
+    p.add_argument("--output-dir", default="output")
+    return p.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    t0 = time.perf_counter()
+    table = search(args.csv, args.trials, args.min_epochs, args.max_epochs, args.eta,
+                   args.patience, args.val_fraction, args.workers, args.seed)
+
+    stem = os.path.splitext(os.path.basename(args.csv))[0]
+    os.makedirs(args.output_dir, exist_ok=True)
+    out_trials = os.path.join(args.output_dir, f"{stem}_search_trials.csv")
+    table.to_csv(out_trials, index=False, encoding="utf-8-sig")
+
+    best = table[table["status"] == "completed"].iloc[0]
+    best_params = {
+        "window": int(best["window"]),
+        "lstm_units": [int(u) for u in best["lstm_units"].split("-")],
+        "bidirectional": bool(best["bidirectional"]),
+        "dropout": float(best["dropout"]),
+        "dense_units": int(best["dense_units"]),
+        "batch_size": int(best["batch_size"]),
+        "epochs": int(best["epochs_run"]),
+        "val_rmse": float(best["val_rmse"]),
+    }
+    out_best = os.path.join(args.output_dir, f"{stem}_best_params.json")
+    with open(out_best, "w", encoding="utf-8") as f:
+        json.dump(best_params, f, indent=2)
+
+    print(f"\n[search] {len(table)} trials in {time.perf_counter() - t0:.0f}s → {out_trials}")
+    print(f"[search] Best: {best_params} → {out_best}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
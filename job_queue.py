@@ -0,0 +1,281 @@
+# job_queue.py
+# Leased job queue on SQLite: at-least-once delivery without an external broker.
+#
+#   python job_queue.py put search '{"keyword": "laptops", "pages": 4}'
+#   python job_queue.py stats
+#   python job_queue.py dead                       # dead-lettered jobs and their last error
+#   python job_queue.py requeue 42                 # give a dead job another round
+#
+# A worker lease()s jobs: they become invisible to other workers until the
+# visibility timeout passes. ack() finishes a job; fail() puts it back with
+# exponential backoff, or moves it to the dead-letter state once max_attempts
+# is used up. A worker that dies simply lets its lease expire and the job is
+# handed out again, so handlers must tolerate running twice. Long jobs call
+# extend() as a heartbeat. Leasing is one short IMMEDIATE transaction on a WAL
+# database, so many worker processes on one host can pull from the same
+# queue (WAL needs shared memory, so not across machines or network mounts).
+# Jobs with a dedupe key are only enqueued once while a previous copy is still
+# pending.
+
+import argparse
+import json
+import os
+import socket
+import sqlite3
+import sys
+import time
+import uuid
+from typing import Protocol
+
+DB_PATH = os.path.join("output", "job_queue.sqlite")
+VISIBILITY_TIMEOUT_S = 15 * 60
+MAX_ATTEMPTS = 5
+BACKOFF_BASE_S = 30
+BACKOFF_MAX_S = 3600
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id INTEGER PRIMARY KEY,
+    kind TEXT NOT NULL,
+    payload TEXT NOT NULL,
+    status TEXT NOT NULL DEFAULT 'ready',   -- ready | leased | done | dead
+    priority INTEGER NOT NULL DEFAULT 0,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    max_attempts INTEGER NOT NULL,
+    available_at REAL NOT NULL,
+    lease_owner TEXT,
+    lease_expires REAL,
+    dedupe_key TEXT,
+    last_error TEXT,
+    result TEXT,
+    created_at REAL NOT NULL,
+    updated_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS jobs_ready ON jobs (status, kind, priority DESC, available_at);
+CREATE INDEX IF NOT EXISTS jobs_leases ON jobs (status, lease_expires);
+CREATE UNIQUE INDEX IF NOT EXISTS jobs_pending_dedupe ON jobs (dedupe_key)
+    WHERE dedupe_key IS NOT NULL AND status IN ('ready', 'leased');
+"""
+
+
+class QueueBackend(Protocol):
+    """
+    What workers need from a queue. JobQueue implements it on one host's SQLite
+    file; a networked backend (e.g. a database server) for workers on several
+    machines would implement the same methods and be returned by open_queue().
+    """
+
+    def put(self, kind, payload=None, priority=0, delay=0.0, max_attempts=MAX_ATTEMPTS, dedupe_key=None): ...
+    def lease(self, owner, kinds=None, n=1, visibility_timeout=None) -> list: ...
+    def extend(self, job_id, owner, seconds=None) -> bool: ...
+    def ack(self, job_id, owner, result=None) -> bool: ...
+    def fail(self, job_id, owner, error="", retry=True) -> str: ...
+    def close(self): ...
+
+
+def open_queue(location=DB_PATH, visibility_timeout=VISIBILITY_TIMEOUT_S) -> QueueBackend:
+    """Queue for a location; only SQLite file paths exist today."""
+    return JobQueue(location, visibility_timeout)
+
+
+def worker_id():
+    return f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:6]}"
+
+
+class JobQueue:
+    def __init__(self, path=DB_PATH, visibility_timeout=VISIBILITY_TIMEOUT_S):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.visibility_timeout = visibility_timeout
+        # autocommit; transactions are opened explicitly where needed
+        self.conn = sqlite3.connect(path, timeout=30, isolation_level=None)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript(SCHEMA)
+
+    def close(self):
+        self.conn.close()
+
+    # -------------------------------
+    # Producer side
+    # -------------------------------
+    def put(self, kind, payload=None, priority=0, delay=0.0, max_attempts=MAX_ATTEMPTS, dedupe_key=None):
+        """Returns the job id, or None when a pending job with the same dedupe_key exists."""
+        now = time.time()
+        try:
+            return self.conn.execute(
+                "INSERT INTO jobs (kind, payload, priority, max_attempts, available_at, dedupe_key, "
+                "created_at, updated_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (kind, json.dumps(payload or {}), priority, max_attempts, now + delay, dedupe_key, now, now),
+            ).lastrowid
+        except sqlite3.IntegrityError:
+            return None
+
+    # -------------------------------
+    # Worker side
+    # -------------------------------
+    def lease(self, owner, kinds=None, n=1, visibility_timeout=None):
+        """
+        Atomically claims up to n jobs (ready, or leased with an expired lease).
+        Returns [{id, kind, payload, attempts}]; attempts counts this delivery.
+        """
+        now = time.time()
+        timeout = visibility_timeout or self.visibility_timeout
+        kind_sql, params = "", []
+        if kinds:
+            kind_sql = f" AND kind IN ({','.join('?' * len(kinds))})"
+            params = list(kinds)
+        self.conn.execute("BEGIN IMMEDIATE")
+        try:
+            self._expire(now)
+            rows = self.conn.execute(
+                f"SELECT id, kind, payload, attempts FROM jobs WHERE status = 'ready' AND available_at <= ?{kind_sql} "
+                "ORDER BY priority DESC, available_at, id LIMIT ?",
+                [now, *params, n],
+            ).fetchall()
+            self.conn.executemany(
+                "UPDATE jobs SET status = 'leased', lease_owner = ?, lease_expires = ?, attempts = attempts + 1, "
+                "updated_at = ? WHERE id = ?",
+                [(owner, now + timeout, now, r[0]) for r in rows],
+            )
+            self.conn.execute("COMMIT")
+        except Exception:
+            self.conn.execute("ROLLBACK")
+            raise
+        return [{"id": r[0], "kind": r[1], "payload": json.loads(r[2]), "attempts": r[3] + 1} for r in rows]
+
+    def _expire(self, now):
+        # expired leases: back to ready, or dead when the crashed attempt was the last one
+        self.conn.execute(
+            "UPDATE jobs SET status = CASE WHEN attempts >= max_attempts THEN 'dead' ELSE 'ready' END, "
+            "last_error = COALESCE(last_error, '') || CASE WHEN attempts >= max_attempts "
+            "THEN ' | lease expired' ELSE '' END, lease_owner = NULL, lease_expires = NULL, updated_at = ? "
+            "WHERE status = 'leased' AND lease_expires < ?",
+            (now, now),
+        )
+
+    def extend(self, job_id, owner, seconds=None) -> bool:
+        """Heartbeat: pushes the lease out. False if the lease was lost (expired and re-leased)."""
+        now = time.time()
+        cur = self.conn.execute(
+            "UPDATE jobs SET lease_expires = ?, updated_at = ? WHERE id = ? AND status = 'leased' AND lease_owner = ?",
+            (now + (seconds or self.visibility_timeout), now, job_id, owner),
+        )
+        return cur.rowcount == 1
+
+    def ack(self, job_id, owner, result=None) -> bool:
+        cur = self.conn.execute(
+            "UPDATE jobs SET status = 'done', result = ?, lease_owner = NULL, lease_expires = NULL, updated_at = ? "
+            "WHERE id = ? AND status = 'leased' AND lease_owner = ?",
+            (json.dumps(result) if result is not None else None, time.time(), job_id, owner),
+        )
+        return cur.rowcount == 1
+
+    def fail(self, job_id, owner, error="", retry=True) -> str:
+        """Releases a failed job: 'retry' (after backoff), 'dead', or 'lost' if the lease was gone."""
+        now = time.time()
+        self.conn.execute("BEGIN IMMEDIATE")
+        try:
+            row = self.conn.execute(
+                "SELECT attempts, max_attempts FROM jobs WHERE id = ? AND status = 'leased' AND lease_owner = ?",
+                (job_id, owner),
+            ).fetchone()
+            status = None
+            if row is not None:
+                attempts, max_attempts = row
+                status = "ready" if retry and attempts < max_attempts else "dead"
+                delay = min(BACKOFF_MAX_S, BACKOFF_BASE_S * 2 ** (attempts - 1))
+                cur = self.conn.execute(
+                    "UPDATE jobs SET status = ?, available_at = ?, last_error = ?, lease_owner = NULL, "
+                    "lease_expires = NULL, updated_at = ? WHERE id = ? AND status = 'leased' AND lease_owner = ?",
+                    (status, now + delay, str(error)[:2000], now, job_id, owner),
+                )
+                if cur.rowcount == 0:
+                    status = None
+            self.conn.execute("COMMIT")
+        except Exception:
+            self.conn.execute("ROLLBACK")
+            raise
+        if status is None:
+            return "lost"
+        return "retry" if status == "ready" else "dead"
+
+    # -------------------------------
+    # Admin
+    # -------------------------------
+    def requeue(self, job_id) -> str:
+        """'requeued', 'not dead', or 'pending' when another copy with the same dedupe_key is still pending."""
+        try:
+            cur = self.conn.execute(
+                "UPDATE jobs SET status = 'ready', attempts = 0, available_at = ?, updated_at = ? "
+                "WHERE id = ? AND status = 'dead'",
+                (time.time(), time.time(), job_id),
+            )
+        except sqlite3.IntegrityError:
+            return "pending"
+        return "requeued" if cur.rowcount == 1 else "not dead"
+
+    def stats(self) -> dict:
+        out = {}
+        for kind, status, n in self.conn.execute("SELECT kind, status, COUNT(*) FROM jobs GROUP BY kind, status"):
+            out.setdefault(kind, {})[status] = n
+        return out
+
+    def dead(self, limit=50):
+        return self.conn.execute(
+            "SELECT id, kind, attempts, payload, last_error FROM jobs WHERE status = 'dead' "
+            "ORDER BY updated_at DESC LIMIT ?", (limit,)
+        ).fetchall()
+
+    def purge_done(self, older_than_s=7 * 86400) -> int:
+        return self.conn.execute("DELETE FROM jobs WHERE status = 'done' AND updated_at < ?",
+                                 (time.time() - older_than_s,)).rowcount
+
+
+def parse_args(argv=None):
+    p = argparse.ArgumentParser(description="Leased SQLite job queue.")
+    p.add_argument("--db", default=DB_PATH)
+    sub = p.add_subparsers(dest="cmd", required=True)
+
+    a = sub.add_parser("put", help="enqueue a job")
+    a.add_argument("kind")
+    a.add_argument("payload", nargs="?", default="{}", help="JSON object")
+    a.add_argument("--priority", type=int, default=0)
+    a.add_argument("--delay", type=float, default=0.0)
+    a.add_argument("--max-attempts", type=int, default=MAX_ATTEMPTS)
+    a.add_argument("--dedupe-key")
+
+    sub.add_parser("stats", help="job counts per kind and status")
+    sub.add_parser("dead", help="dead-lettered jobs")
+    r = sub.add_parser("requeue", help="move a dead job back to ready")
+    r.add_argument("job_id", type=int)
+    sub.add_parser("purge", help="drop finished jobs older than a week")
+    return p.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    q = JobQueue(args.db)
+    try:
+        if args.cmd == "put":
+            job_id = q.put(args.kind, json.loads(args.payload), args.priority, args.delay, args.max_attempts,
+                           args.dedupe_key)
+            print(f"[queue] {'Enqueued job ' + str(job_id) if job_id else 'Already pending (dedupe key)'}")
+        elif args.cmd == "stats":
+            for kind, counts in sorted(q.stats().items()):
+                print(f"{kind:>16}  " + "  ".join(f"{s}={n}" for s, n in sorted(counts.items())))
+        elif args.cmd == "dead":
+            for job_id, kind, attempts, payload, error in q.dead():
+                print(f"#{job_id} {kind} after {attempts} attempts {payload}\n    {error}")
+        elif args.cmd == "requeue":
+            result = q.requeue(args.job_id)
+            print(f"[queue] {args.job_id}: " + {"requeued": "Requeued", "not dead": "Not a dead job",
+                                                 "pending": "Already pending (dedupe key)"}[result])
+        else:
+            print(f"[queue] Purged {q.purge_done()} finished jobs")
+    finally:
+        q.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,245 @@
+# lstm_export.py
+# Export a registered Keras forecaster to a pure-NumPy inference format.
+#
+#   python lstm_export.py s24_amazon                  # float32 weights
+#   python lstm_export.py s24_amazon --quantize int8  # int8 weights + per-column scales
+#   python lstm_export.py s24_amazon --check          # parity against Keras
+#
+# Writes models/<name>/model.npz next to model.keras. load_forecaster() picks up
+# model.npz once --check has recorded parity for that export (any new export
+# resets it), so forecast_server.py and batch forecasts run the LSTM/Dense
+# forward pass in NumPy without importing TensorFlow.
+# Only the layers the forecasters build are supported: LSTM, Bidirectional(LSTM)
+# with concat merge, Dropout (identity at inference) and Dense (linear/relu).
+
+import argparse
+import json
+import os
+import sys
+import time
+
+import numpy as np
+
+from forecasting import MODEL_DIR, load_meta, make_windows
+
+EXPORT_FILE = "model.npz"
+
+
+# -------------------------------
+# NumPy forward pass
+# -------------------------------
+def _sigmoid(x):
+    return 1.0 / (1.0 + np.exp(-x))
+
+
+def lstm_forward(x, kernel, recurrent, bias, return_sequences, reverse=False):
+    """Keras LSTM (gate order i, f, c, o; tanh / sigmoid) over a (n, T, d) batch."""
+    n, steps, _ = x.shape
+    units = recurrent.shape[0]
+    xz = x @ kernel + bias  # input projection for all timesteps at once
+    h = np.zeros((n, units), dtype=x.dtype)
+    c = np.zeros((n, units), dtype=x.dtype)
+    outputs = []
+    for t in (range(steps - 1, -1, -1) if reverse else range(steps)):
+        z = xz[:, t] + h @ recurrent
+        i = _sigmoid(z[:, :units])
+        f = _sigmoid(z[:, units:2 * units])
+        g = np.tanh(z[:, 2 * units:3 * units])
+        o = _sigmoid(z[:, 3 * units:])
+        c = f * c + i * g
+        h = o * np.tanh(c)
+        outputs.append(h)
+    if not return_sequences:
+        return h
+    seq = np.stack(outputs, axis=1)
+    return seq[:, ::-1] if reverse else seq
+
+
+def run_layers(layers, weights, x):
+    for layer in layers:
+        w = [weights[k] for k in layer["weights"]]
+        if layer["type"] == "lstm":
+            x = lstm_forward(x, *w, layer["return_sequences"])
+        elif layer["type"] == "bidirectional":
+            fwd = lstm_forward(x, *w[:3], layer["return_sequences"])
+            bwd = lstm_forward(x, *w[3:], layer["return_sequences"], reverse=True)
+            x = np.concatenate([fwd, bwd], axis=-1)
+        elif layer["type"] == "dense":
+            x = x @ w[0] + w[1]
+            if layer["activation"] == "relu":
+                x = np.maximum(x, 0.0)
+    return x
+
+
+class NumpyLSTMForecaster:
+    """Drop-in for LSTMForecaster at inference time, backed by an exported model.npz."""
+
+    name = "lstm-numpy"
+
+    def __init__(self, path, meta):
+        with np.load(path, allow_pickle=False) as npz:
+            self.layers = json.loads(str(npz["__layers__"]))
+            quantized = json.loads(str(npz["__quantized__"]))
+            self.weights = {}
+            for key in npz.files:
+                if key.startswith("__") or key.endswith("__scale"):
+                    continue
+                w = npz[key]
+                if key in quantized:
+                    w = w.astype("float32") * npz[f"{key}__scale"]
+                self.weights[key] = w.astype("float32")
+        self.window = meta["params"]["window"]
+        self._params = meta["params"]
+        self.center_ = meta["center"]
+        self.scale_ = meta["scale"]
+
+    def params(self) -> dict:
+        return dict(self._params)
+
+    def load_backend(self):
+        pass
+
+    def predict_next(self, windows):
+        x = ((np.asarray(windows, dtype="float64") - self.center_) / self.scale_).astype("float32")
+        out = run_layers(self.layers, self.weights, x[..., None]).ravel()
+        return out.astype("float64") * self.scale_ + self.center_
+
+    def forecast(self, history, steps: int):
+        from forecasting import forecast_recursive
+
+        return forecast_recursive(self, history, steps)
+
+
+# -------------------------------
+# Export from Keras
+# -------------------------------
+def _quantize_int8(w):
+    # symmetric, one scale per output column
+    scale = np.abs(w).max(axis=0, keepdims=True) / 127.0
+    scale[scale == 0] = 1.0
+    return np.round(w / scale).astype("int8"), scale.astype("float32")
+
+
+def export_model(name, quantize=None, model_dir=MODEL_DIR):
+    from tensorflow.keras.models import load_model
+
+    src = os.path.join(model_dir, name, "model.keras")
+    model = load_model(src)
+    layers, arrays, quantized = [], {}, []
+
+    def add(prefix, values):
+        keys = []
+        for j, w in enumerate(values):
+            key = f"{prefix}_{j}"
+            w = np.asarray(w, dtype="float32")
+            if quantize == "int8" and w.ndim == 2:
+                arrays[key], arrays[f"{key}__scale"] = _quantize_int8(w)
+                quantized.append(key)
+            elif quantize == "float16":
+                arrays[key] = w.astype("float16")
+            else:
+                arrays[key] = w
+            keys.append(key)
+        return keys
+
+    for i, layer in enumerate(model.layers):
+        kind = layer.__class__.__name__
+        cfg = layer.get_config()
+        if kind == "LSTM":
+            layers.append({"type": "lstm", "return_sequences": cfg["return_sequences"],
+                           "weights": add(f"l{i}", layer.get_weights())})
+        elif kind == "Bidirectional":
+            if cfg.get("merge_mode", "concat") != "concat":
+                raise ValueError(f"Unsupported Bidirectional merge_mode: {cfg.get('merge_mode')}")
+            layers.append({"type": "bidirectional", "return_sequences": layer.forward_layer.return_sequences,
+                           "weights": add(f"l{i}", layer.get_weights())})
+        elif kind == "Dense":
+            if cfg["activation"] not in ("linear", "relu"):
+                raise ValueError(f"Unsupported Dense activation: {cfg['activation']}")
+            layers.append({"type": "dense", "activation": cfg["activation"],
+                           "weights": add(f"l{i}", layer.get_weights())})
+        elif kind in ("Dropout", "InputLayer"):
+            continue
+        else:
+            raise ValueError(f"Unsupported layer for NumPy export: {kind}")
+
+    out = os.path.join(model_dir, name, EXPORT_FILE)
+    np.savez(out, __layers__=json.dumps(layers), __quantized__=json.dumps(quantized), **arrays)
+    # a parity result belongs to the export it was measured on
+    _write_export_meta(name, model_dir, {"quantize": quantize, "parity_ok": False})
+    print(f"[export] {name}: {len(layers)} layers, quantize={quantize or 'none'} → {out} "
+          f"({os.path.getsize(out) / 1024:.1f} KiB vs {os.path.getsize(src) / 1024:.1f} KiB .keras)")
+    return out
+
+
+def _write_export_meta(name, model_dir, export):
+    meta = load_meta(name, model_dir)
+    meta["export"] = export
+    with open(os.path.join(model_dir, name, "meta.json"), "w", encoding="utf-8") as f:
+        json.dump(meta, f, indent=2)
+
+
+def parity_check(name, model_dir=MODEL_DIR, n_windows=256, seed=0):
+    """Max |Keras - NumPy| on random windows around the training price level."""
+    from forecasting import load_forecaster
+
+    keras_fc, meta = load_forecaster(name, model_dir, prefer_exported=False)
+    numpy_fc = NumpyLSTMForecaster(os.path.join(model_dir, name, EXPORT_FILE), meta)
+
+    rng = np.random.default_rng(seed)
+    base = np.asarray(meta.get("last_window") or [meta["center"]] * keras_fc.window, dtype="float64")
+    if len(base) < keras_fc.window + n_windows:
+        noise = rng.normal(0, meta["scale"], size=(n_windows, keras_fc.window))
+        windows = base[-keras_fc.window:] + noise
+    else:
+        windows = make_windows(base, keras_fc.window)[0][-n_windows:]
+
+    t0 = time.perf_counter()
+    ref = keras_fc.predict_next(windows)
+    keras_ms = (time.perf_counter() - t0) * 1000
+    t0 = time.perf_counter()
+    got = numpy_fc.predict_next(windows)
+    numpy_ms = (time.perf_counter() - t0) * 1000
+
+    diff = np.abs(ref - got)
+    return {
+        "windows": len(windows),
+        "max_abs_diff": float(diff.max()),
+        "mean_abs_diff": float(diff.mean()),
+        "max_rel_diff": float((diff / np.maximum(np.abs(ref), 1e-9)).max()),
+        "keras_ms": round(keras_ms, 2),
+        "numpy_ms": round(numpy_ms, 2),
+    }
+
+
+def parse_args(argv=None):
+    p = argparse.ArgumentParser(description="Export a registered LSTM forecaster to NumPy inference weights.")
+    p.add_argument("name", help="model name under --model-dir")
+    p.add_argument("--model-dir", default=MODEL_DIR)
+    p.add_argument("--quantize", choices=["int8", "float16"], default=None)
+    p.add_argument("--check", action="store_true", help="compare against Keras output after export")
+    p.add_argument("--tolerance", type=float, default=None,
+                   help="max relative difference allowed by --check (default 1e-4, 2e-2 when quantised)")
+    return p.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    if not os.path.exists(os.path.join(args.model_dir, args.name, "model.keras")):
+        print(f"[export] '{args.name}' has no model.keras (naive models need no export).")
+        return 1
+    export_model(args.name, args.quantize, args.model_dir)
+    if not args.check:
+        print("[export] Not parity-checked; load_forecaster() keeps using Keras until --check passes.")
+        return 0
+
+    report = parity_check(args.name, args.model_dir)
+    tolerance = args.tolerance or (2e-2 if args.quantize else 1e-4)
+    ok = report["max_rel_diff"] <= tolerance
+    print(f"[export] Parity {'OK' if ok else 'FAILED'} (tolerance {tolerance}): {report}")
+    _write_export_meta(args.name, args.model_dir, {"quantize": args.quantize, "parity": report, "parity_ok": ok})
+    return 0 if ok else 2
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,206 @@
+# page_ready.py
+# Page readiness from DOM events instead of fixed sleeps after navigation.
+#
+#   python page_ready.py amazon-reviews "https://www.amazon.in/product-reviews/B0CS69DGSW" --repeat 3
+#
+# wait_ready(driver, "amazon-reviews") returns as soon as the page is usable:
+# one of the spec's `ready` selectors matches (review blocks, result cards,
+# product title) and the page has settled, i.e. a `settle` selector such as
+# the pagination bar is rendered or the network has been quiet for idle_ms.
+# An `empty` selector (a "no reviews" notice) ends the wait early, and the
+# timeout is the worst case rather than the cost of every page. The check runs
+# inside the browser on a MutationObserver, so there is no polling round trip
+# per tick. Politeness is a separate concern: Pacer spaces request *starts*
+# per site, so time spent loading and parsing counts towards the gap instead
+# of being added to it.
+
+import argparse
+import random
+import sys
+import threading
+import time
+from dataclasses import dataclass
+
+
+@dataclass(frozen=True)
+class WaitSpec:
+    ready: tuple                  # any of these selectors: content is there
+    settle: tuple = ()            # any of these as well (or network idle): page finished rendering
+    empty: tuple = ()             # any of these without `ready`: page rendered with nothing to scrape
+    idle_ms: int = 500            # network quiet this long counts as settled
+    timeout: float = 15.0
+
+
+SPECS = {
+    "amazon-product": WaitSpec(
+        ready=("#productTitle",),
+        settle=("#availability", "#bylineInfo", "#sellerProfileTriggerId"),
+    ),
+    "amazon-reviews": WaitSpec(
+        ready=("[data-hook='review']",),
+        settle=("ul.a-pagination", "li.a-last"),
+        empty=(".no-reviews-section", "#cm_cr-review_list .a-spacing-top-large .a-size-medium"),
+    ),
+    "amazon-search": WaitSpec(
+        ready=("div.s-main-slot [data-component-type='s-search-result']",),
+        settle=(".s-pagination-strip", "span.s-pagination-item"),
+        empty=("div.s-no-outline", ".s-no-results-filler"),
+    ),
+    "flipkart-product": WaitSpec(
+        ready=("span.B_NuCI", "span.VU-ZEz", "h1"),
+        settle=("div._30jeq3", "div.Nx9bqj"),
+    ),
+    "flipkart-reviews": WaitSpec(
+        ready=("div._27M-vq", "div._16PBlm", "div.t-ZTKy", "div.EKFha-", "div.ZmyHeo"),
+        settle=("nav._1ypTlJ", "a._1LKTO3", "nav.WSL9JP"),
+        empty=("div._1UKuZU", "div.jN6Fhf"),
+    ),
+}
+
+_WAIT_JS = """
+const [ready, settle, empty, idleMs, timeoutMs, done] = arguments;
+const t0 = performance.now();
+const any = sels => sels.some(s => { try { return !!document.querySelector(s); } catch (e) { return false; } });
+let lastNet = performance.now(), finished = false;
+const po = new PerformanceObserver(() => { lastNet = performance.now(); });
+try { po.observe({type: 'resource', buffered: false}); } catch (e) {}
+const mo = new MutationObserver(check);
+const iv = setInterval(check, 50);
+function finish(state) {
+  if (finished) return;
+  finished = true;
+  mo.disconnect(); po.disconnect(); clearInterval(iv);
+  done([state, (performance.now() - t0) / 1000]);
+}
+function check() {
+  const now = performance.now();
+  const hasReady = any(ready);
+  if (hasReady && (any(settle) || now - lastNet >= idleMs)) return finish('ready');
+  if (!hasReady && any(empty) && now - lastNet >= idleMs) return finish('empty');
+  if (now - t0 >= timeoutMs) return finish(hasReady ? 'ready' : 'timeout');
+}
+mo.observe(document.documentElement, {childList: true, subtree: true});
+check();
+"""
+
+
+class ReadyStats:
+    def __init__(self):
+        self.rows = []
+        self._lock = threading.Lock()
+
+    def record(self, spec, state, seconds):
+        with self._lock:
+            self.rows.append({"spec": spec, "state": state, "seconds": seconds})
+
+    def summary(self) -> dict:
+        out = {}
+        for r in self.rows:
+            s = out.setdefault(r["spec"], {"waits": 0, "total_s": 0.0, "max_s": 0.0, "states": {}})
+            s["waits"] += 1
+            s["total_s"] += r["seconds"]
+            s["max_s"] = max(s["max_s"], r["seconds"])
+            s["states"][r["state"]] = s["states"].get(r["state"], 0) + 1
+        for s in out.values():
+            s["mean_s"] = round(s.pop("total_s") / s["waits"], 3)
+            s["max_s"] = round(s["max_s"], 3)
+        return out
+
+
+STATS = ReadyStats()
+
+
+def wait_ready(driver, spec, timeout=None, stats=STATS) -> str:
+    """
+    Blocks until the page matches `spec` (a SPECS key or a WaitSpec); returns
+    'ready', 'empty' or 'timeout'. Callers parse the page in every case, as
+    they did after a fixed sleep; 'timeout' only means nothing matched in time.
+    """
+    name = spec if isinstance(spec, str) else "custom"
+    spec = SPECS[spec] if isinstance(spec, str) else spec
+    timeout = spec.timeout if timeout is None else timeout
+    t0 = time.perf_counter()
+    try:
+        driver.set_script_timeout(timeout + 5)
+        state, _ = driver.execute_async_script(
+            _WAIT_JS, list(spec.ready), list(spec.settle), list(spec.empty), spec.idle_ms, timeout * 1000)
+    except Exception as e:  # script timeout or a driver without async scripts
+        print(f"[ready] {name}: {type(e).__name__}")
+        state = "timeout"
+    if stats is not None:
+        stats.record(name, state, time.perf_counter() - t0)
+    return state
+
+
+class Pacer:
+    """
+    Per-site politeness: wait(site) returns once at least a random gap from
+    `gaps[site]` has passed since the previous request *start* for that site.
+    Thread-safe; share one instance between workers that should share a budget.
+    """
+
+    def __init__(self, gaps=None, default=(1.0, 2.0)):
+        self.gaps = dict(gaps or {})
+        self.default = default
+        self._next = {}
+        self._lock = threading.Lock()
+
+    def wait(self, site="default") -> float:
+        lo, hi = self.gaps.get(site, self.default)
+        with self._lock:
+            now = time.monotonic()
+            start = max(now, self._next.get(site, now))
+            self._next[site] = start + random.uniform(lo, hi)
+        if start > now:
+            time.sleep(start - now)
+        return start - now
+
+
+PACER = Pacer({"amazon": (1.0, 2.0), "flipkart": (1.0, 2.0)})
+
+
+def click_and_wait(driver, element, spec, timeout=None) -> str:
+    """Clicks a pagination control, waits for the page to change (new URL or detached DOM), then for `spec`."""
+    from selenium.webdriver.common.by import By
+    from selenium.webdriver.support import expected_conditions as EC
+    from selenium.webdriver.support.ui import WebDriverWait
+
+    old_url = driver.current_url
+    marker = driver.find_element(By.TAG_NAME, "body")
+    element.click()
+    stale = EC.staleness_of(marker)
+    WebDriverWait(driver, timeout or 10).until(lambda d: d.current_url != old_url or stale(d))
+    return wait_ready(driver, spec, timeout)
+
+
+def parse_args(argv=None):
+    p = argparse.ArgumentParser(description="Time event-driven readiness against a page.")
+    p.add_argument("spec", choices=sorted(SPECS))
+    p.add_argument("urls", nargs="+")
+    p.add_argument("--repeat", type=int, default=1)
+    return p.parse_args(argv)
+
+
+def main(argv=None):
+    from Ascrape_review import setup_driver
+    from browser_profile import fetch
+
+    args = parse_args(argv)
+    driver = setup_driver(lean=True)
+    try:
+        for _ in range(args.repeat):
+            for url in args.urls:
+                PACER.wait("amazon" if "amazon." in url else "flipkart")
+                loaded = fetch(driver, url)
+                t0 = time.perf_counter()
+                state = wait_ready(driver, args.spec)
+                print(f"[ready] {url}: load {loaded:.2f}s + wait {time.perf_counter() - t0:.2f}s -> {state}")
+    finally:
+        driver.quit()
+    for spec, s in STATS.summary().items():
+        print(f"[ready] {spec}: {s}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
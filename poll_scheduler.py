@@ -0,0 +1,384 @@
+# poll_scheduler.py
+# Volatility-aware re-poll scheduler for product monitoring.
+#
+#   python poll_scheduler.py add B0CS69DGSW --host amazon.in --url https://www.amazon.in/dp/B0CS69DGSW
+#   python poll_scheduler.py import-cdc --catalog laptops          # targets + change history from catalog_cdc
+#   python poll_scheduler.py sale "2025-11-20 00:00" "2025-11-27 23:59" --host flipkart.com
+#   python poll_scheduler.py budget amazon.in 120                   # polls per hour
+#   python poll_scheduler.py due                                    # what to poll now
+#   python poll_scheduler.py status
+#
+# Each target keeps an exponentially decayed count of observed changes and of
+# observed hours, so its change rate follows recent behaviour (half-life
+# RATE_HALF_LIFE_H); the rate is corrected for changes hidden between polls. The next poll is placed at 1 / (OVERSAMPLE × rate), clamped
+# to [min_interval, max_interval], so a listing that reprices every 20 minutes is
+# checked every few minutes and a flat one about daily. Inside (or just before)
+# a sale window the rate is boosted. Targets sit in a heap keyed by due time;
+# when several are due, the most overdue relative to their interval go first,
+# and each host has a token bucket so the per-marketplace request budget is
+# never exceeded. Targets that do not fit the budget are deferred until a token
+# frees up.
+
+import argparse
+import heapq
+import math
+import os
+import pickle
+import sys
+from dataclasses import asdict, dataclass, field
+from datetime import datetime
+
+STATE_PATH = os.path.join("output", "poll_scheduler.pkl")
+
+MIN_INTERVAL_S = 5 * 60
+MAX_INTERVAL_S = 24 * 3600
+OVERSAMPLE = 2.0          # polls per expected change
+RATE_HALF_LIFE_H = 7 * 24
+PRIOR_CHANGES = 1.0       # prior: one change per PRIOR_HOURS
+PRIOR_HOURS = 24.0
+SALE_BOOST = 6.0
+SALE_LEAD_S = 6 * 3600    # start tightening this long before a sale window opens
+DEFAULT_BUDGET_PER_HOUR = 60
+
+
+@dataclass
+class PollTarget:
+    key: str
+    host: str
+    payload: dict = field(default_factory=dict)
+    next_due: float = 0.0
+    interval: float = MIN_INTERVAL_S
+    last_polled: float = None
+    changes: float = PRIOR_CHANGES    # decayed count of polls that saw a change
+    observed: float = 2 * PRIOR_CHANGES  # decayed count of polls
+    hours: float = PRIOR_HOURS        # decayed observed hours
+    polls: int = 0
+    seq: int = 0                      # heap entry currently live for this target
+
+    @property
+    def rate_per_hour(self) -> float:
+        # a poll sees at most one change, so the share of changed polls saturates for
+        # volatile listings; invert P(change in Δ) = 1 - exp(-λΔ) instead of counting
+        p = min(self.changes / self.observed, 0.95)
+        return -math.log(1.0 - p) * self.observed / self.hours
+
+
+@dataclass
+class SaleWindow:
+    start: float
+    end: float
+    host: str = None   # None: every host
+
+    def active(self, host, now) -> bool:
+        return (self.host in (None, host)) and self.start - SALE_LEAD_S <= now <= self.end
+
+
+class TokenBucket:
+    def __init__(self, per_hour, burst=None):
+        self.rate = per_hour / 3600.0
+        self.capacity = float(burst or max(1.0, per_hour / 12))
+        self.tokens = self.capacity
+        self.updated = None
+
+    def _refill(self, now):
+        if self.updated is not None:
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def take(self, now) -> bool:
+        self._refill(now)
+        if self.tokens >= 1.0:
+            self.tokens -= 1.0
+            return True
+        return False
+
+    def next_token_at(self, now) -> float:
+        self._refill(now)
+        return now + max(0.0, 1.0 - self.tokens) / self.rate
+
+
+class PollScheduler:
+    def __init__(self, min_interval=MIN_INTERVAL_S, max_interval=MAX_INTERVAL_S, oversample=OVERSAMPLE):
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.oversample = oversample
+        self.targets = {}
+        self.budgets = {}
+        self.sales = []
+        self._heap = []      # (next_due, seq, key); entries whose seq is not the target's are skipped on pop
+        self._seq = 0
+
+    def __len__(self):
+        return len(self.targets)
+
+    # -------------------------------
+    # Configuration
+    # -------------------------------
+    def add(self, key, host, payload=None, now=None):
+        now = datetime.now().timestamp() if now is None else now
+        if key in self.targets:
+            self.targets[key].payload.update(payload or {})
+            return self.targets[key]
+        target = PollTarget(key=key, host=host, payload=dict(payload or {}))
+        self.targets[key] = target
+        self._push(target, now)
+        return target
+
+    def remove(self, key):
+        self.targets.pop(key, None)
+
+    def set_budget(self, host, per_hour, burst=None):
+        self.budgets[host] = TokenBucket(per_hour, burst)
+
+    def add_sale(self, start, end, host=None, now=None):
+        self.sales.append(SaleWindow(start, end, host))
+        # pull affected targets forward to their tightened interval
+        now = datetime.now().timestamp() if now is None else now
+        for t in self.targets.values():
+            if t.last_polled is not None and (host in (None, t.host)):
+                self._schedule(t, t.last_polled, now)
+
+    def _budget(self, host):
+        if host not in self.budgets:
+            self.budgets[host] = TokenBucket(DEFAULT_BUDGET_PER_HOUR)
+        return self.budgets[host]
+
+    # -------------------------------
+    # Scheduling
+    # -------------------------------
+    def _push(self, target, due):
+        target.next_due = due
+        self._seq += 1
+        target.seq = self._seq
+        heapq.heappush(self._heap, (due, self._seq, target.key))
+
+    def interval_for(self, target, now) -> float:
+        rate = target.rate_per_hour
+        if any(s.active(target.host, now) for s in self.sales):
+            rate *= SALE_BOOST
+        seconds = 3600.0 / (self.oversample * rate)
+        return min(self.max_interval, max(self.min_interval, seconds))
+
+    def _schedule(self, target, from_time, now):
+        target.interval = self.interval_for(target, now)
+        self._push(target, max(now, from_time + target.interval) if from_time else now)
+
+    def record(self, key, changed, now=None):
+        """Feed back one poll result: changed is whether the product differed from the last poll."""
+        now = datetime.now().timestamp() if now is None else now
+        target = self.targets[key]
+        if target.last_polled is not None:
+            elapsed_h = max(0.0, now - target.last_polled) / 3600.0
+            decay = 0.5 ** (elapsed_h / RATE_HALF_LIFE_H)
+            target.changes = target.changes * decay + (1.0 if changed else 0.0)
+            target.observed = target.observed * decay + 1.0
+            target.hours = target.hours * decay + elapsed_h
+        target.last_polled = now
+        target.polls += 1
+        self._schedule(target, now, now)
+
+    def due(self, now=None, limit=None):
+        """
+        Targets to poll now, most stale first, within each host's budget.
+        Returned targets are rescheduled by record(); without it they come back after max_interval.
+        """
+        now = datetime.now().timestamp() if now is None else now
+        ready = []
+        while self._heap and self._heap[0][0] <= now:
+            _, seq, key = heapq.heappop(self._heap)
+            target = self.targets.get(key)
+            if target is None or target.seq != seq:
+                continue  # removed or rescheduled since this entry was pushed
+            ready.append(target)
+
+        # staleness: how far past due, relative to the target's own interval
+        ready.sort(key=lambda t: -(now - t.next_due) / max(t.interval, 1.0))
+        out = []
+        for target in ready:
+            if (limit is None or len(out) < limit) and self._budget(target.host).take(now):
+                out.append(target)
+                # safety net: if no result is ever recorded, hand the target out again later
+                self._push(target, now + self.max_interval)
+            else:
+                self._push(target, self._budget(target.host).next_token_at(now))
+        return out
+
+    def next_wakeup(self):
+        while self._heap:
+            due_at, seq, key = self._heap[0]
+            target = self.targets.get(key)
+            if target is not None and target.seq == seq:
+                return due_at
+            heapq.heappop(self._heap)
+        return None
+
+    def run(self, poll, stop=None, sleep=None):
+        """
+        Blocking loop: poll(target) -> bool (changed) for every due target.
+        stop: optional callable returning True to end the loop.
+        """
+        import time
+
+        sleep = sleep or time.sleep
+        while not (stop and stop()):
+            for target in self.due():
+                try:
+                    changed = bool(poll(target))
+                except Exception as e:
+                    print(f"[scheduler] {target.key} failed: {e}")
+                    changed = False
+                self.record(target.key, changed)
+            wake = self.next_wakeup()
+            sleep(min(60.0, max(1.0, wake - datetime.now().timestamp())) if wake else 60.0)
+
+    # -------------------------------
+    # Persistence / reporting
+    # -------------------------------
+    def status(self, now=None):
+        import pandas as pd
+
+        now = datetime.now().timestamp() if now is None else now
+        rows = [{
+            "key": t.key,
+            "host": t.host,
+            "changes_per_day": round(t.rate_per_hour * 24, 2),
+            "interval_min": round(t.interval / 60, 1),
+            "due_in_min": round((t.next_due - now) / 60, 1),
+            "stale_min": round((now - t.last_polled) / 60, 1) if t.last_polled else None,
+            "polls": t.polls,
+        } for t in self.targets.values()]
+        return pd.DataFrame(rows).sort_values("due_in_min") if rows else pd.DataFrame(rows)
+
+    def save(self, path=STATE_PATH):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        tmp = path + ".tmp"
+        # plain state, so a scheduler saved by the CLI (__main__) loads from an import too
+        state = {
+            "min_interval": self.min_interval, "max_interval": self.max_interval, "oversample": self.oversample,
+            "targets": [asdict(t) for t in self.targets.values()],
+            "budgets": {host: dict(vars(b)) for host, b in self.budgets.items()},
+            "sales": [asdict(w) for w in self.sales],
+            "heap": list(self._heap),
+            "seq": self._seq,
+        }
+        with open(tmp, "wb") as f:
+            pickle.dump(state, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp, path)
+
+    @staticmethod
+    def load(path=STATE_PATH):
+        with open(path, "rb") as f:
+            state = pickle.load(f)
+        if isinstance(state, PollScheduler):
+            sched = state
+            # states saved before targets tracked their live heap entry
+            for target in sched.targets.values():
+                if "seq" not in vars(target):
+                    sched._push(target, target.next_due)
+            return sched
+        sched = PollScheduler(state["min_interval"], state["max_interval"], state["oversample"])
+        sched.targets = {t["key"]: PollTarget(**t) for t in state["targets"]}
+        for host, values in state["budgets"].items():
+            bucket = TokenBucket.__new__(TokenBucket)
+            bucket.__dict__.update(values)
+            sched.budgets[host] = bucket
+        sched.sales = [SaleWindow(**w) for w in state["sales"]]
+        sched._heap = state["heap"]
+        sched._seq = state["seq"]
+        return sched
+
+
+def import_cdc(scheduler, catalog, db_path=None, host="amazon.in"):
+    """Registers every product of a catalog_cdc catalog and replays its update history as poll results."""
+    from catalog_cdc import DB_PATH, CatalogCDC
+
+    cdc = CatalogCDC(db_path or DB_PATH)
+    try:
+        runs = [r[0] for r in cdc.conn.execute("SELECT at FROM runs WHERE catalog = ? ORDER BY at", (catalog,))]
+        first_seen = dict(cdc.conn.execute(
+            "SELECT key, first_seen FROM state WHERE catalog = ? AND deleted = 0", (catalog,)).fetchall())
+        updated = {}
+        for key, at in cdc.conn.execute("SELECT key, at FROM events WHERE catalog = ? AND op = 'update'", (catalog,)):
+            updated.setdefault(key, set()).add(at)
+    finally:
+        cdc.close()
+
+    for key, since in first_seen.items():
+        scheduler.add(key, host, {"url": f"https://www.{host}/dp/{key}"})
+        target = scheduler.targets[key]
+        if target.polls:
+            continue
+        # runs before the product appeared did not observe it; counting them as unchanged polls dilutes its rate
+        for at in runs:
+            if since and at < since:
+                continue
+            scheduler.record(key, at in updated.get(key, ()), datetime.strptime(at, "%Y-%m-%d %H:%M:%S").timestamp())
+    return len(first_seen)
+
+
+def parse_args(argv=None):
+    p = argparse.ArgumentParser(description="Adaptive re-poll scheduler for monitored products.")
+    p.add_argument("--state", default=STATE_PATH)
+    sub = p.add_subparsers(dest="cmd", required=True)
+
+    a = sub.add_parser("add", help="register a product to monitor")
+    a.add_argument("key")
+    a.add_argument("--host", required=True)
+    a.add_argument("--url")
+
+    c = sub.add_parser("import-cdc", help="register products and change history from catalog_cdc")
+    c.add_argument("--catalog", required=True)
+    c.add_argument("--host", default="amazon.in")
+    c.add_argument("--db", default=None)
+
+    s = sub.add_parser("sale", help="add a sale window (local time)")
+    s.add_argument("start")
+    s.add_argument("end")
+    s.add_argument("--host")
+
+    b = sub.add_parser("budget", help="polls per hour allowed for a host")
+    b.add_argument("host")
+    b.add_argument("per_hour", type=float)
+
+    d = sub.add_parser("due", help="list targets due now (and mark them as handed out)")
+    d.add_argument("--limit", type=int)
+
+    r = sub.add_parser("record", help="report a poll result")
+    r.add_argument("key")
+    r.add_argument("--changed", action="store_true")
+
+    sub.add_parser("status", help="rates, intervals and due times")
+    return p.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    sched = PollScheduler.load(args.state) if os.path.exists(args.state) else PollScheduler()
+
+    if args.cmd == "add":
+        sched.add(args.key, args.host, {"url": args.url} if args.url else None)
+    elif args.cmd == "import-cdc":
+        print(f"[scheduler] {import_cdc(sched, args.catalog, args.db, args.host)} products from {args.catalog}")
+    elif args.cmd == "sale":
+        sched.add_sale(datetime.fromisoformat(args.start).timestamp(), datetime.fromisoformat(args.end).timestamp(),
+                       args.host)
+    elif args.cmd == "budget":
+        sched.set_budget(args.host, args.per_hour)
+    elif args.cmd == "due":
+        for t in sched.due(limit=args.limit):
+            print(f"{t.host}\t{t.key}\t{t.payload.get('url', '')}")
+    elif args.cmd == "record":
+        if args.key not in sched.targets:
+            print(f"[scheduler] Unknown target {args.key}")
+            return 1
+        sched.record(args.key, args.changed)
+    else:
+        table = sched.status()
+        print(table.to_string(index=False) if not table.empty else "[scheduler] No targets.")
+
+    sched.save(args.state)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
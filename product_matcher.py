@@ -0,0 +1,335 @@
+# product_matcher.py
+# Link the same product across Amazon (ASIN), Flipkart (pid) and pricehistory (slug).
+#
+#   python product_matcher.py match Scraping/Scraping/amazon_products_laptops.csv flipkart_laptops.csv
+#   python product_matcher.py match amazon.csv urls.txt --right-source pricehistory
+#   python product_matcher.py lookup B0CS69DGSW
+#
+# Listings come from search-result files (Product_Name / Product_ASIN columns and
+# the like) or from plain lists of product URLs, whose slugs double as titles.
+# Each title is normalised into brand, model tokens (s24, v15, al15 …), variant
+# words (pro, ultra, plus …), RAM / storage in GB and colour. Candidate pairs
+# are generated through a blocking index on (brand, model token), so a listing
+# is only compared with the few listings sharing one of its keys, not with the
+# whole catalogue. Pairs with conflicting specs are rejected; the rest are scored
+# on token overlap, matched greedily one-to-one and stored in SQLite.
+
+import argparse
+import os
+import re
+import sqlite3
+import sys
+from collections import defaultdict
+from dataclasses import dataclass, field
+from datetime import datetime
+from urllib.parse import parse_qs, urlparse
+
+import pandas as pd
+
+DB_PATH = os.path.join("output", "product_matches.sqlite")
+MATCH_THRESHOLD = 0.5
+MAX_BLOCK = 500  # keys shared by more listings than this are too generic to block on
+
+COLOURS = {
+    "black", "white", "grey", "silver", "blue", "green", "gold", "violet", "purple", "cream", "yellow",
+    "red", "pink", "orange", "marble", "onyx", "amber", "cobalt", "jade", "titanium", "graphite", "mint",
+    "lavender", "navy", "bronze", "champagne", "midnight", "starlight", "steel",
+}
+COLOUR_ALIASES = {"gray": "grey", "sliver": "silver"}
+VARIANTS = {"pro", "ultra", "plus", "max", "fe", "lite", "mini", "neo", "edge", "prime", "note"}
+NETWORK_TOKENS = {"4g", "5g", "lte"}
+STOP_WORDS = {
+    "with", "and", "the", "for", "of", "in", "to", "ai", "smartphone", "mobile", "phone", "laptop", "new",
+    "storage", "ram", "rom", "gb", "tb", "ssd", "hdd", "memory", "expandable", "up", "upto", "buy", "online",
+    "at", "best", "price", "india", "p", "product", "reviews", "cm", "inch", "inches",
+}
+
+_SIZE = re.compile(r"(\d+(?:\.\d+)?)\s*(gb|tb)\b\s*(ram|ssd|storage|rom|hdd|emmc|ufs)?")
+_TOKEN = re.compile(r"[a-z0-9]+")
+
+
+@dataclass
+class Listing:
+    source: str
+    id: str
+    title: str
+    brand: str = ""
+    ram_gb: float = None
+    storage_gb: float = None
+    colour: str = None
+    model: frozenset = field(default_factory=frozenset)
+    variants: frozenset = field(default_factory=frozenset)
+    tokens: frozenset = field(default_factory=frozenset)
+
+
+# -------------------------------
+# Normalisation
+# -------------------------------
+def _sizes(text):
+    """(ram_gb, storage_gb) from '8GB RAM, 128GB Storage', '8gb-128gb-storage', '512 GB SSD', '1TB' …"""
+    ram, storage, loose = None, None, []
+    for m in _SIZE.finditer(text):
+        gb = float(m.group(1)) * (1024 if m.group(2) == "tb" else 1)
+        kind = m.group(3)
+        if kind == "ram":
+            ram = gb
+        elif kind:
+            storage = gb
+        else:
+            loose.append(gb)
+    # unlabelled sizes: the largest is storage, a smaller one is RAM; a lone small one is RAM
+    loose.sort()
+    if storage is None and loose and (len(loose) > 1 or ram is not None or loose[-1] > 24):
+        storage = loose.pop()
+    if ram is None and loose:
+        ram = loose[-1]
+    return ram, storage
+
+
+def normalise_listing(source, id, title) -> Listing:
+    text = str(title or "").lower().replace("-", " ").replace("_", " ")
+    ram, storage = _sizes(text)
+    words = [COLOUR_ALIASES.get(w, w) for w in _TOKEN.findall(_SIZE.sub(" ", text))]
+    # long bare numbers are years / pin codes / screen sizes in mm, not identity
+    tokens = [w for w in words if w not in STOP_WORDS and (not w.isdigit() or len(w) <= 2)]
+    brand = tokens[0] if tokens else ""
+    colours = [w for w in tokens if w in COLOURS]
+    model = {w for w in tokens[1:] if any(c.isdigit() for c in w) and any(c.isalpha() for c in w)
+             and w not in NETWORK_TOKENS}
+    return Listing(
+        source=source,
+        id=str(id),
+        title=str(title or ""),
+        brand=brand,
+        ram_gb=ram,
+        storage_gb=storage,
+        colour=" ".join(colours) or None,
+        model=frozenset(model),
+        variants=frozenset(w for w in tokens if w in VARIANTS),
+        tokens=frozenset(w for w in tokens if w not in COLOURS),
+    )
+
+
+def listing_from_url(url, source=None) -> Listing:
+    """Flipkart / Amazon / pricehistory product URL (or bare slug) → Listing titled by its slug."""
+    parsed = urlparse(url if "://" in url else f"https://slug/{url}")
+    host = parsed.netloc
+    parts = [p for p in parsed.path.split("/") if p]
+    # /dp/<ASIN>, /gp/product/<ASIN>, /p/<itm>: no slug to take a title from
+    slug = parts[0] if parts and parts[0] not in ("dp", "gp", "product", "p") else ""
+    if "flipkart" in host:
+        pid = parse_qs(parsed.query).get("pid", [None])[0]
+        return normalise_listing(source or "flipkart", pid or parts[-1], slug)
+    if "amazon" in host:
+        asin = next((parts[i + 1] for i, p in enumerate(parts[:-1]) if p in ("dp", "product")), parts[-1])
+        return normalise_listing(source or "amazon", asin, slug)
+    slug = parts[1] if len(parts) >= 2 and parts[0] == "product" else (parts[-1] if parts else "")
+    return normalise_listing(source or "pricehistory", slug, slug)
+
+
+TITLE_COLUMNS = ["Product_Name", "Product_Title", "title", "Title", "name"]
+ID_COLUMNS = ["Product_ASIN", "ASIN", "pid", "Product_ID", "slug", "id"]
+URL_COLUMNS = ["Product_Link", "Product_URL", "url", "URL"]
+
+
+def load_listings(path, source) -> list:
+    """Search-result CSV/XLSX (title + id or URL columns) or a text file with one URL/slug per line."""
+    if path.endswith(".txt"):
+        with open(path, encoding="utf-8") as f:
+            return [listing_from_url(line.strip(), source) for line in f if line.strip()]
+    df = pd.read_excel(path) if path.endswith((".xlsx", ".xls")) else pd.read_csv(path)
+    title_col = next((c for c in TITLE_COLUMNS if c in df), None)
+    id_col = next((c for c in ID_COLUMNS if c in df), None)
+    url_col = next((c for c in URL_COLUMNS if c in df), None)
+    if title_col is None and url_col is None:
+        raise ValueError(f"{path}: no title column ({', '.join(TITLE_COLUMNS)}) or URL column")
+    out = []
+    for row in df.to_dict("records"):
+        if title_col is None:
+            out.append(listing_from_url(str(row[url_col]), source))
+            continue
+        if id_col is not None and pd.notna(row[id_col]):
+            lid = row[id_col]
+        else:
+            lid = listing_from_url(str(row[url_col]), source).id if url_col else len(out)
+        out.append(normalise_listing(source, lid, row[title_col]))
+    return out
+
+
+# -------------------------------
+# Blocking + scoring
+# -------------------------------
+def blocking_keys(item: Listing):
+    if item.model:
+        return {f"{item.brand}|{m}" for m in item.model}
+    # no model number in the title: fall back to brand + storage
+    return {f"{item.brand}|{item.storage_gb}"}
+
+
+def build_block_index(listings):
+    index = defaultdict(list)
+    for i, item in enumerate(listings):
+        for key in blocking_keys(item):
+            index[key].append(i)
+    return index
+
+
+def score_pair(a: Listing, b: Listing) -> float:
+    if a.brand != b.brand:
+        return 0.0
+    for x, y in ((a.ram_gb, b.ram_gb), (a.storage_gb, b.storage_gb)):
+        if x is not None and y is not None and x != y:
+            return 0.0
+    if a.variants != b.variants:
+        return 0.0
+    if a.model and b.model and not (a.model & b.model):
+        return 0.0
+    tokens = len(a.tokens & b.tokens) / len(a.tokens | b.tokens) if a.tokens | b.tokens else 0.0
+    # titles differ a lot in marketing filler; model numbers and specs carry the match
+    model = len(a.model & b.model) / len(a.model | b.model) if a.model | b.model else 0.0
+    specs = sum(x is not None and x == y for x, y in ((a.ram_gb, b.ram_gb), (a.storage_gb, b.storage_gb))) / 2
+    score = 0.3 * tokens + 0.4 * model + 0.3 * specs
+    if a.colour and b.colour and not (set(a.colour.split()) & set(b.colour.split())):
+        score *= 0.7
+    return score
+
+
+def match_listings(left, right, threshold=MATCH_THRESHOLD, max_block=MAX_BLOCK):
+    """
+    One-to-one matches between two listing lists.
+    Returns (DataFrame of matches, {"candidates": pairs scored, "skipped_blocks": …}).
+    """
+    index = build_block_index(right)
+    scored = {}
+    skipped = set()
+    for i, item in enumerate(left):
+        for key in blocking_keys(item):
+            block = index.get(key, ())
+            if len(block) > max_block:
+                skipped.add(key)
+                continue
+            for j in block:
+                if (i, j) not in scored:
+                    scored[(i, j)] = score_pair(item, right[j])
+
+    # greedy one-to-one assignment, best pairs first
+    used_left, used_right, rows = set(), set(), []
+    for (i, j), s in sorted(scored.items(), key=lambda kv: -kv[1]):
+        if s < threshold or i in used_left or j in used_right:
+            continue
+        used_left.add(i)
+        used_right.add(j)
+        rows.append({
+            "left_source": left[i].source, "left_id": left[i].id, "left_title": left[i].title,
+            "right_source": right[j].source, "right_id": right[j].id, "right_title": right[j].title,
+            "score": round(s, 4),
+        })
+    stats = {"candidates": len(scored), "all_pairs": len(left) * len(right), "skipped_blocks": len(skipped)}
+    return pd.DataFrame(rows), stats
+
+
+# -------------------------------
+# Persistence
+# -------------------------------
+class MatchStore:
+    def __init__(self, path=DB_PATH):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.conn = sqlite3.connect(path)
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS matches ("
+            " left_source TEXT, left_id TEXT, right_source TEXT, right_id TEXT,"
+            " score REAL, left_title TEXT, right_title TEXT, matched_at TEXT,"
+            " PRIMARY KEY (left_source, left_id, right_source))"
+        )
+        self.conn.execute("CREATE INDEX IF NOT EXISTS matches_right ON matches (right_source, right_id)")
+
+    def close(self):
+        self.conn.close()
+
+    def save(self, matches: pd.DataFrame) -> int:
+        if matches.empty:
+            return 0
+        now = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        rows = [(r.left_source, r.left_id, r.right_source, r.right_id, r.score, r.left_title, r.right_title, now)
+                for r in matches.itertuples(index=False)]
+        with self.conn:
+            # a newer run can re-point a listing; keep the better-scoring link
+            self.conn.executemany(
+                "INSERT INTO matches VALUES (?, ?, ?, ?, ?, ?, ?, ?) "
+                "ON CONFLICT (left_source, left_id, right_source) DO UPDATE SET "
+                "right_id = excluded.right_id, score = excluded.score, right_title = excluded.right_title, "
+                "matched_at = excluded.matched_at WHERE excluded.score >= matches.score",
+                rows,
+            )
+        return len(rows)
+
+    def linked(self, id, source=None) -> dict:
+        """{source: id} for every listing transitively linked to the given one."""
+        seen = {}
+        frontier = [(source, str(id))]
+        while frontier:
+            src, lid = frontier.pop()
+            if src:
+                where, params = "(left_source = ? AND left_id = ?) OR (right_source = ? AND right_id = ?)", \
+                    (src, lid, src, lid)
+            else:
+                where, params = "left_id = ? OR right_id = ?", (lid, lid)
+            for a_src, a_id, b_src, b_id in self.conn.execute(
+                    f"SELECT left_source, left_id, right_source, right_id FROM matches WHERE {where}", params):
+                for s, i in ((a_src, a_id), (b_src, b_id)):
+                    if s not in seen:
+                        seen[s] = i
+                        frontier.append((s, i))
+        return seen
+
+
+def parse_args(argv=None):
+    p = argparse.ArgumentParser(description="Match product listings across marketplaces.")
+    p.add_argument("--db", default=DB_PATH)
+    sub = p.add_subparsers(dest="cmd", required=True)
+
+    m = sub.add_parser("match", help="link two listing files and store the matches")
+    m.add_argument("left")
+    m.add_argument("right")
+    m.add_argument("--left-source", default="amazon")
+    m.add_argument("--right-source", default="flipkart")
+    m.add_argument("--threshold", type=float, default=MATCH_THRESHOLD)
+    m.add_argument("--max-block", type=int, default=MAX_BLOCK)
+    m.add_argument("--output", default=None, help="also write the matches to CSV")
+
+    q = sub.add_parser("lookup", help="ids linked to an ASIN / pid / slug")
+    q.add_argument("id")
+    q.add_argument("--source")
+    return p.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    store = MatchStore(args.db)
+    try:
+        if args.cmd == "lookup":
+            links = store.linked(args.id, args.source)
+            if not links:
+                print(f"[match] No links for {args.id}")
+                return 1
+            for source, lid in sorted(links.items()):
+                print(f"{source:>14}  {lid}")
+            return 0
+
+        left = load_listings(args.left, args.left_source)
+        right = load_listings(args.right, args.right_source)
+        matches, stats = match_listings(left, right, args.threshold, args.max_block)
+        store.save(matches)
+        if args.output and not matches.empty:
+            matches.to_csv(args.output, index=False, encoding="utf-8-sig")
+        print(f"[match] {len(left)} × {len(right)} listings: {stats['candidates']} candidate pairs "
+              f"(of {stats['all_pairs']}), {len(matches)} matches → {args.db}")
+        if stats["skipped_blocks"]:
+            print(f"[match] {stats['skipped_blocks']} oversized blocks skipped (--max-block {args.max_block})")
+    finally:
+        store.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,199 @@
+# records.py
+# Typed product-snapshot and review records.
+#
+#   python records.py product_reviews_combined_*.xlsx      # memory: raw strings vs typed columns
+#
+# The scrapers keep what the page showed: Price "44,950.00", MRP "₹74,999.00",
+# Discount "-12%" / "(32% off)" / "Up to42,150.00 off", Rating "4.3 out of 5 stars",
+# Reviews "(1,395)" / "1,395 ratings". The parsers below turn those into numbers
+# once. The column functions work on whole Series and parse each distinct
+# string a single time (product metadata repeats on every review row), and
+# typed_reviews() stores repeated strings as categoricals and numbers as
+# float32, so the frame is a fraction of its string size. ProductSnapshot and
+# Review are slotted records for the per-record streaming path.
+
+import re
+import sys
+from dataclasses import asdict, dataclass
+
+import numpy as np
+import pandas as pd
+
+_NUMBER = r"(\d[\d,]*(?:\.\d+)?)"
+_CURRENCY = re.compile(_NUMBER)
+_PERCENT = re.compile(r"(\d+(?:\.\d+)?)\s*%")
+_RATING = re.compile(r"(?<![\d.])(\d(?:\.\d+)?)(?![\d])")
+_COUNT = re.compile(_NUMBER + r"\s*([kKmM]?)\b")
+
+_MULTIPLIERS = {"": 1, "k": 1_000, "m": 1_000_000}
+
+NUMERIC_COLUMNS = {
+    # raw column → (typed column, parser name)
+    "Price": ("Price_INR", "currency"),
+    "MRP": ("MRP_INR", "currency"),
+    "Discount": ("Discount_Pct", "percent"),
+    "Rating": ("Rating_Value", "rating"),
+    "Reviews": ("Review_Count", "count"),
+}
+
+CATEGORY_COLUMNS = ["Source", "Product_Name", "Product_ASIN", "Brand", "Price", "MRP", "Discount", "Rating",
+                    "Reviews", "Stock_Status", "Seller", "Product_Link", "Reviews_Link", "Scraped_At",
+                    "Review_Date", "Source_File"]
+
+
+# -------------------------------
+# Scalar parsers
+# -------------------------------
+def parse_currency(text) -> float:
+    """'₹74,999.00' / '44,950.00' / '25979' → float (NaN when no number)."""
+    m = _CURRENCY.search(str(text or ""))
+    return float(m.group(1).replace(",", "")) if m else np.nan
+
+
+def parse_percent(text) -> float:
+    """'-12%' / '(32% off)' → 12.0 / 32.0 (discount depth, always positive)."""
+    m = _PERCENT.search(str(text or ""))
+    return float(m.group(1)) if m else np.nan
+
+
+def parse_rating(text) -> float:
+    """'4.2 out of 5 stars' / '4.2' → 4.2 (NaN outside 0–5)."""
+    m = _RATING.search(str(text or ""))
+    value = float(m.group(1)) if m else np.nan
+    return value if 0 <= value <= 5 else np.nan
+
+
+def parse_count(text) -> float:
+    """'(1,395)' / '1,395 ratings' / '2.1K' → 1395 / 1395 / 2100."""
+    m = _COUNT.search(str(text or ""))
+    if not m:
+        return np.nan
+    return float(m.group(1).replace(",", "")) * _MULTIPLIERS[m.group(2).lower()]
+
+
+PARSERS = {"currency": parse_currency, "percent": parse_percent, "rating": parse_rating, "count": parse_count}
+
+
+# -------------------------------
+# Column parsers
+# -------------------------------
+def parse_column(values, kind: str) -> pd.Series:
+    """Vectorised PARSERS[kind] over a Series: each distinct string is parsed once."""
+    values = pd.Series(values)
+    if pd.api.types.is_numeric_dtype(values):
+        return values.astype(np.float64)
+    codes, uniques = pd.factorize(values)
+    parsed = np.array([PARSERS[kind](u) for u in uniques] + [np.nan], dtype=np.float64)
+    # code -1 (missing) lands on the trailing NaN
+    return pd.Series(parsed[codes], index=values.index)
+
+
+def add_numeric_columns(df: pd.DataFrame) -> pd.DataFrame:
+    """Adds Price_INR, MRP_INR, Discount_Pct, Rating_Value, Review_Count next to the raw columns."""
+    df = df.copy()
+    for raw, (typed, kind) in NUMERIC_COLUMNS.items():
+        if raw in df:
+            df[typed] = parse_column(df[raw], kind)
+    # "Up to42,150.00 off" carries no percentage; derive it from price and MRP
+    if {"Discount_Pct", "Price_INR", "MRP_INR"} <= set(df.columns):
+        derived = (1 - df["Price_INR"] / df["MRP_INR"]) * 100
+        df["Discount_Pct"] = df["Discount_Pct"].fillna(derived.where(df["MRP_INR"] > 0).round(1))
+    return df
+
+
+def typed_reviews(df: pd.DataFrame) -> pd.DataFrame:
+    """Compact typed frame: numeric columns as float32, repeated strings as categoricals."""
+    df = add_numeric_columns(df)
+    if "Review_Stars" in df:
+        df["Review_Stars"] = parse_column(df["Review_Stars"], "rating")
+    for col in ["Review_Stars", *(typed for typed, _ in NUMERIC_COLUMNS.values())]:
+        if col in df:
+            df[col] = df[col].astype(np.float32)
+    for col in CATEGORY_COLUMNS:
+        if col in df and df[col].nunique(dropna=False) <= len(df) // 2:
+            df[col] = df[col].astype("category")
+    return df
+
+
+# -------------------------------
+# Slotted records
+# -------------------------------
+@dataclass(slots=True)
+class ProductSnapshot:
+    asin: str
+    name: str = ""
+    brand: str = ""
+    price: float = np.nan
+    mrp: float = np.nan
+    discount_pct: float = np.nan
+    rating: float = np.nan
+    review_count: float = np.nan
+    stock_status: str = ""
+    seller: str = ""
+    scraped_at: str = ""
+
+    @classmethod
+    def from_raw(cls, data: dict) -> "ProductSnapshot":
+        """From the dicts built by extract_product_metadata / parse_card."""
+        price, mrp = parse_currency(data.get("Price")), parse_currency(data.get("MRP"))
+        discount = parse_percent(data.get("Discount"))
+        if np.isnan(discount) and mrp > 0:
+            discount = round((1 - price / mrp) * 100, 1)
+        return cls(
+            asin=data.get("Product_ASIN") or "",
+            name=data.get("Product_Name") or "",
+            brand=data.get("Brand") or "",
+            price=price,
+            mrp=mrp,
+            discount_pct=discount,
+            rating=parse_rating(data.get("Rating")),
+            review_count=parse_count(data.get("Reviews")),
+            stock_status=data.get("Stock_Status") or "",
+            seller=data.get("Seller") or "",
+            scraped_at=data.get("Scraped_At") or "",
+        )
+
+    def numeric_fields(self) -> dict:
+        return {"Price_INR": self.price, "MRP_INR": self.mrp, "Discount_Pct": self.discount_pct,
+                "Rating_Value": self.rating, "Review_Count": self.review_count}
+
+    def as_dict(self) -> dict:
+        return asdict(self)
+
+
+@dataclass(slots=True)
+class Review:
+    title: str
+    body: str
+    stars: float
+    reviewer: str
+    date: str
+    source: str
+
+    @classmethod
+    def from_raw(cls, data: dict) -> "Review":
+        return cls(
+            title=data.get("Review_Title") or "",
+            body=data.get("Review_Body") or "",
+            stars=parse_rating(data.get("Review_Stars")),
+            reviewer=data.get("Reviewer") or "",
+            date=data.get("Review_Date") or "",
+            source=data.get("Source") or "",
+        )
+
+
+def main(argv=None):
+    from reviews import find_review_files, read_review_file
+
+    paths = (argv if argv is not None else sys.argv[1:]) or find_review_files()
+    for path in paths:
+        raw = read_review_file(path)
+        typed = typed_reviews(raw)
+        before = raw.memory_usage(deep=True).sum() / 1e6
+        after = typed.memory_usage(deep=True).sum() / 1e6
+        print(f"[records] {path}: {len(raw)} rows, {before:.2f} MB raw → {after:.2f} MB typed")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
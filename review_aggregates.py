@@ -0,0 +1,202 @@
+# review_aggregates.py
+# Incremental per-product / per-source / per-day review aggregates.
+#
+#   python review_aggregates.py ingest files/*.xlsx        # fold new reviews in
+#   python review_aggregates.py query B0CS69DGSW --rolling 7
+#   python review_aggregates.py summary
+#
+# State lives in one SQLite file. Each ingested review is remembered by its
+# identity fingerprint, so re-ingesting overlapping scrape files only adds the
+# reviews not seen before; updates are O(new reviews). Daily rows hold counts,
+# a 1-5 star histogram, sentiment counts and sums for means, so queries and
+# rolling means only ever touch the (small) daily table, never raw reviews.
+
+import argparse
+import os
+import sqlite3
+import sys
+
+import numpy as np
+import pandas as pd
+
+from review_sentiment import SentimentCache, enrich_reviews
+from reviews import find_review_files, product_key, read_review_file, review_day, review_identity
+
+DB_PATH = os.path.join("output", "review_aggregates.sqlite")
+
+COUNT_COLUMNS = [
+    "n_reviews",
+    "stars_1", "stars_2", "stars_3", "stars_4", "stars_5",
+    "stars_sum", "stars_n",
+    "positive", "neutral", "negative", "sentiment_na",
+    "polarity_sum", "polarity_n",
+]
+
+SCHEMA = f"""
+CREATE TABLE IF NOT EXISTS seen_reviews (fp TEXT PRIMARY KEY);
+CREATE TABLE IF NOT EXISTS daily (
+    product TEXT NOT NULL,
+    source TEXT NOT NULL,
+    day TEXT NOT NULL,
+    {", ".join(f"{c} REAL NOT NULL DEFAULT 0" for c in COUNT_COLUMNS)},
+    PRIMARY KEY (product, source, day)
+);
+CREATE INDEX IF NOT EXISTS daily_product_day ON daily (product, day);
+"""
+
+
+class ReviewAggregates:
+    def __init__(self, path=DB_PATH):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.conn = sqlite3.connect(path)
+        self.conn.executescript(SCHEMA)
+
+    def close(self):
+        self.conn.close()
+
+    # -------------------------------
+    # Incremental update
+    # -------------------------------
+    def _new_rows(self, df: pd.DataFrame) -> pd.DataFrame:
+        df = df.assign(_fp=review_identity(df)).drop_duplicates("_fp")
+        fps = df["_fp"].tolist()
+        seen = set()
+        for i in range(0, len(fps), 900):
+            chunk = fps[i:i + 900]
+            marks = ",".join("?" * len(chunk))
+            seen.update(r[0] for r in self.conn.execute(f"SELECT fp FROM seen_reviews WHERE fp IN ({marks})", chunk))
+        return df[~df["_fp"].isin(seen)]
+
+    def ingest(self, df: pd.DataFrame) -> int:
+        """Fold a batch of (sentiment-enriched) reviews into the daily state."""
+        new = self._new_rows(df)
+        if new.empty:
+            return 0
+
+        stars = pd.to_numeric(new["Review_Stars"], errors="coerce")
+        bucket = stars.round().clip(1, 5)
+        sentiment = new["sentiment"] if "sentiment" in new else pd.Series("N/A", index=new.index)
+        polarity = pd.to_numeric(new["polarity"], errors="coerce") if "polarity" in new \
+            else pd.Series(np.nan, index=new.index)
+
+        delta = pd.DataFrame({
+            "product": product_key(new),
+            "source": new["Source"].replace("", "Unknown"),
+            "day": review_day(new),
+            "n_reviews": 1.0,
+            **{f"stars_{k}": (bucket == k).astype(float) for k in range(1, 6)},
+            "stars_sum": stars.fillna(0.0),
+            "stars_n": stars.notna().astype(float),
+            "positive": (sentiment == "positive").astype(float),
+            "neutral": (sentiment == "neutral").astype(float),
+            "negative": (sentiment == "negative").astype(float),
+            "sentiment_na": (~sentiment.isin(["positive", "neutral", "negative"])).astype(float),
+            "polarity_sum": polarity.fillna(0.0),
+            "polarity_n": polarity.notna().astype(float),
+        })
+        grouped = delta.groupby(["product", "source", "day"], as_index=False)[COUNT_COLUMNS].sum()
+
+        cols = ", ".join(COUNT_COLUMNS)
+        marks = ", ".join("?" * (3 + len(COUNT_COLUMNS)))
+        updates = ", ".join(f"{c} = {c} + excluded.{c}" for c in COUNT_COLUMNS)
+        with self.conn:
+            self.conn.executemany(
+                f"INSERT INTO daily (product, source, day, {cols}) VALUES ({marks}) "
+                f"ON CONFLICT (product, source, day) DO UPDATE SET {updates}",
+                grouped.itertuples(index=False, name=None),
+            )
+            self.conn.executemany("INSERT INTO seen_reviews VALUES (?)", ((fp,) for fp in new["_fp"]))
+        return len(new)
+
+    # -------------------------------
+    # Queries
+    # -------------------------------
+    def daily(self, product, source=None, start=None, end=None, rolling=7) -> pd.DataFrame:
+        sql = "SELECT day, SUM(n_reviews) AS n_reviews, " + \
+              ", ".join(f"SUM({c}) AS {c}" for c in COUNT_COLUMNS[1:]) + \
+              " FROM daily WHERE product = ?"
+        params = [product]
+        if source:
+            sql += " AND source = ?"
+            params.append(source)
+        if start:
+            sql += " AND day >= ?"
+            params.append(start)
+        if end:
+            sql += " AND day <= ?"
+            params.append(end)
+        sql += " GROUP BY day ORDER BY day"
+        df = pd.read_sql_query(sql, self.conn, params=params)
+        if df.empty:
+            return df
+
+        df["avg_stars"] = df["stars_sum"] / df["stars_n"].replace(0, np.nan)
+        df["avg_polarity"] = df["polarity_sum"] / df["polarity_n"].replace(0, np.nan)
+        # calendar-day window; means are ratios of rolling sums, so busy days weigh more
+        dated = df[df["day"] != "unknown"].set_index(pd.to_datetime(df.loc[df["day"] != "unknown", "day"]))
+        roll = dated[["stars_sum", "stars_n", "polarity_sum", "polarity_n", "positive", "n_reviews"]] \
+            .rolling(f"{rolling}D", min_periods=1).sum()
+        roll.index = df.index[df["day"] != "unknown"]
+        df[f"stars_mean_{rolling}d"] = roll["stars_sum"] / roll["stars_n"].replace(0, np.nan)
+        df[f"polarity_mean_{rolling}d"] = roll["polarity_sum"] / roll["polarity_n"].replace(0, np.nan)
+        df[f"positive_share_{rolling}d"] = roll["positive"] / roll["n_reviews"].replace(0, np.nan)
+        return df
+
+    def summary(self, products=None) -> pd.DataFrame:
+        sql = "SELECT product, source, MIN(day) AS first_day, MAX(day) AS last_day, " + \
+              ", ".join(f"SUM({c}) AS {c}" for c in COUNT_COLUMNS) + " FROM daily"
+        params = []
+        if products:
+            sql += f" WHERE product IN ({','.join('?' * len(products))})"
+            params = list(products)
+        sql += " GROUP BY product, source ORDER BY product, source"
+        df = pd.read_sql_query(sql, self.conn, params=params)
+        df["avg_stars"] = df["stars_sum"] / df["stars_n"].replace(0, np.nan)
+        df["avg_polarity"] = df["polarity_sum"] / df["polarity_n"].replace(0, np.nan)
+        return df
+
+
+def parse_args(argv=None):
+    p = argparse.ArgumentParser(description="Incremental review aggregates per product/source/day.")
+    p.add_argument("--db", default=DB_PATH)
+    sub = p.add_subparsers(dest="cmd", required=True)
+
+    ing = sub.add_parser("ingest", help="add reviews from scrape files")
+    ing.add_argument("files", nargs="*")
+    ing.add_argument("--workers", type=int, default=None)
+
+    q = sub.add_parser("query", help="daily series for one product")
+    q.add_argument("product")
+    q.add_argument("--source", default=None)
+    q.add_argument("--start", default=None)
+    q.add_argument("--end", default=None)
+    q.add_argument("--rolling", type=int, default=7)
+
+    sub.add_parser("summary", help="totals per product and source")
+    return p.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    agg = ReviewAggregates(args.db)
+    try:
+        if args.cmd == "ingest":
+            cache = SentimentCache()
+            try:
+                for path in args.files or find_review_files():
+                    df, _ = enrich_reviews(read_review_file(path), cache, args.workers)
+                    print(f"[aggregates] {path}: {agg.ingest(df)} new reviews")
+            finally:
+                cache.close()
+        elif args.cmd == "query":
+            df = agg.daily(args.product, args.source, args.start, args.end, args.rolling)
+            print(df.to_string(index=False) if not df.empty else "[aggregates] No data.")
+        else:
+            print(agg.summary().to_string(index=False))
+    finally:
+        agg.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,104 @@
+# review_dates.py
+# Normalise scraped Review_Date strings into typed timestamps.
+#
+# Known shapes:
+#   Amazon    "Reviewed in India on 12 March 2024"
+#             "Reviewed in the United States on March 12, 2024"
+#   Flipkart  "2 months ago", "a day ago", "11 days ago", "Today", "Yesterday",
+#             "Mar, 2024", "12 Mar, 2024"
+#   already typed / ISO strings "2024-03-12", "2024-03-12 10:00:00"
+#
+# Each distinct string is classified once (memoised across calls) as either an
+# absolute date or a relative offset. Relative offsets are then resolved
+# against each row's scrape timestamp with column arithmetic, so a file of
+# 100k reviews with a few hundred distinct date strings costs a few hundred parses.
+
+import re
+
+import numpy as np
+import pandas as pd
+
+_AMAZON_PREFIX = re.compile(r"^\s*reviewed\s+in\s+.*?\s+on\s+", re.I)
+_RELATIVE = re.compile(r"^\s*(\d+|an?|one)\s+(second|minute|hour|day|week|month|year)s?\s+ago\s*$", re.I)
+_MONTH_YEAR = re.compile(r"^\s*([A-Za-z]{3,9}),?\s+(\d{4})\s*$")
+_ISO = re.compile(r"^\d{4}-\d{2}-\d{2}")
+
+_UNIT_DAYS = {"second": 1 / 86400, "minute": 1 / 1440, "hour": 1 / 24, "day": 1, "week": 7}
+
+# raw string -> ("abs", Timestamp) | ("rel", unit, n) | ("none",)
+_PARSE_CACHE = {}
+MAX_CACHE = 200_000
+
+
+def classify(raw: str):
+    if raw in _PARSE_CACHE:
+        return _PARSE_CACHE[raw]
+
+    text = _AMAZON_PREFIX.sub("", str(raw or "")).strip()
+    low = text.lower()
+    result = ("none",)
+    if low in ("today", "just now"):
+        result = ("rel", "day", 0)
+    elif low == "yesterday":
+        result = ("rel", "day", 1)
+    elif (m := _RELATIVE.match(low)):
+        n = 1 if m.group(1) in ("a", "an", "one") else int(m.group(1))
+        result = ("rel", m.group(2), n)
+    elif (m := _MONTH_YEAR.match(text)):
+        ts = pd.to_datetime(f"1 {m.group(1)} {m.group(2)}", errors="coerce", format="mixed")
+        result = ("abs", ts) if pd.notna(ts) else ("none",)
+    elif text:
+        # day-first for "12/03/2024"-style Indian dates, but never for ISO strings
+        ts = pd.to_datetime(text, errors="coerce", format="mixed", dayfirst=not _ISO.match(text))
+        if pd.notna(ts):
+            result = ("abs", ts.tz_localize(None) if ts.tzinfo else ts)
+
+    if len(_PARSE_CACHE) < MAX_CACHE:
+        _PARSE_CACHE[raw] = result
+    return result
+
+
+def parse_review_dates(raw: pd.Series, scraped_at=None) -> pd.Series:
+    """
+    raw: Review_Date strings; scraped_at: Series aligned with raw, a single
+    timestamp, or None (now). Returns datetime64[ns]: NaT when unparseable, and
+    for relative dates whose row has no scrape time.
+    """
+    raw = pd.Series(raw).fillna("").astype(str)
+    if scraped_at is None:
+        scraped_at = pd.Timestamp.now()
+    if isinstance(scraped_at, pd.Series):
+        ref = pd.to_datetime(scraped_at, errors="coerce").reindex(raw.index)
+    else:
+        ref = pd.Series(pd.Timestamp(scraped_at), index=raw.index)
+    if ref.dt.tz is not None:
+        ref = ref.dt.tz_convert(None)
+    # rows without a scrape time keep NaT: resolving "3 days ago" against now would be silently wrong
+
+    codes, uniques = pd.factorize(raw)
+    parsed = [classify(u) for u in uniques]
+
+    abs_ts = pd.Series([p[1] if p[0] == "abs" else pd.NaT for p in parsed], dtype="datetime64[ns]")
+    out = pd.Series(abs_ts.to_numpy()[codes], index=raw.index)
+
+    kind = np.array([p[0] for p in parsed])[codes]
+    unit = np.array([p[1] if p[0] == "rel" else "" for p in parsed], dtype=object)[codes]
+    n = np.array([p[2] if p[0] == "rel" else 0 for p in parsed])[codes]
+
+    rel = kind == "rel"
+    fixed = rel & np.isin(unit, list(_UNIT_DAYS))
+    if fixed.any():
+        days = n[fixed] * np.array([_UNIT_DAYS[u] for u in unit[fixed]])
+        out[fixed] = ref[fixed] - pd.to_timedelta(days, unit="D")
+    # months / years need calendar arithmetic; group by (unit, n) so each offset is built once
+    for u in ("month", "year"):
+        sel = rel & (unit == u)
+        for k in np.unique(n[sel]):
+            rows = sel & (n == k)
+            offset = pd.DateOffset(months=int(k)) if u == "month" else pd.DateOffset(years=int(k))
+            out[rows] = ref[rows] - offset
+    return out.astype("datetime64[ns]")
+
+
+def cache_info() -> dict:
+    return {"entries": len(_PARSE_CACHE), "max": MAX_CACHE}
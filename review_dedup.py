@@ -0,0 +1,253 @@
+# review_dedup.py
+# Near-duplicate review detection with character shingles, MinHash and LSH.
+#
+#   python review_dedup.py files/*.xlsx --threshold 0.8
+#
+# Exact dedup (ReviewDeduper in review_pipeline.py) only drops identical
+# (title, body) pairs; syndicated or lightly edited reviews that appear on both
+# Amazon and Flipkart slip through. Here every review gets a MinHash signature and is put
+# into an LSH index (bands × rows, chosen to minimise missed and spurious
+# candidates around the threshold). Only reviews sharing at least one band bucket
+# are compared, so a lookup touches a handful of candidates instead of the whole
+# corpus, and reviews can be inserted one at a time as scrapes land.
+
+import argparse
+import os
+import pickle
+import sys
+import zlib
+from collections import defaultdict
+
+import numpy as np
+import pandas as pd
+
+from reviews import find_review_files, load_review_files, normalise_text, review_identity, review_text
+
+MERSENNE_PRIME = (1 << 31) - 1
+INDEX_PATH = os.path.join("output", "review_lsh.pkl")
+
+
+def shingles(text: str, k: int = 5) -> np.ndarray:
+    """Hashed character k-shingles of the normalised text (uint64, unique)."""
+    t = normalise_text(text)
+    if len(t) < k:
+        t = t.ljust(k)
+    hashes = {zlib.crc32(t[i:i + k].encode("utf-8")) for i in range(len(t) - k + 1)}
+    return np.fromiter(hashes, dtype=np.uint64, count=len(hashes))
+
+
+def lsh_params(threshold: float, num_perm: int, fp_weight=0.5, fn_weight=0.5):
+    """
+    (bands, rows) with bands*rows <= num_perm minimising the weighted area of
+    false positives (candidate probability below the threshold) plus false
+    negatives (miss probability above it) under the S-curve 1-(1-s^r)^b.
+    Only curves whose midpoint (1/b)^(1/r) lies below the threshold qualify, so
+    pairs at the threshold are more likely than not to become candidates.
+    """
+    s = (np.arange(1000) + 0.5) / 1000  # midpoint rule on [0, 1]
+    below = s < threshold
+    best = None
+    for bands in range(1, num_perm + 1):
+        for rows in range(1, num_perm // bands + 1):
+            if (1.0 / bands) ** (1.0 / rows) >= threshold:
+                continue
+            p = 1.0 - (1.0 - s ** rows) ** bands
+            err = (fp_weight * p[below].sum() + fn_weight * (1.0 - p[~below]).sum()) / len(s)
+            if best is None or err < best[0]:
+                best = (err, bands, rows)
+    if best is None:
+        return num_perm, 1
+    return best[1], best[2]
+
+
+class MinHashLSH:
+    def __init__(self, threshold=0.8, num_perm=128, shingle_size=5, seed=1):
+        self.threshold = threshold
+        self.num_perm = num_perm
+        self.shingle_size = shingle_size
+        self.bands, self.rows = lsh_params(threshold, num_perm)
+        rng = np.random.default_rng(seed)
+        self._a = rng.integers(1, MERSENNE_PRIME, size=num_perm, dtype=np.uint64)
+        self._b = rng.integers(0, MERSENNE_PRIME, size=num_perm, dtype=np.uint64)
+        self.keys = []
+        self.positions = {}
+        # grown by doubling so incremental inserts stay amortised O(1)
+        self._signatures = np.empty((1024, num_perm), dtype=np.uint32)
+        self.buckets = [defaultdict(list) for _ in range(self.bands)]
+
+    def __len__(self):
+        return len(self.keys)
+
+    def __contains__(self, key):
+        return key in self.positions
+
+    def __setstate__(self, state):
+        # indexes pickled before positions existed
+        self.__dict__.update(state)
+        if "positions" not in state:
+            self.positions = {k: i for i, k in enumerate(self.keys)}
+
+    def set_threshold(self, threshold):
+        """Re-tunes bands × rows for a new threshold and rebuilds the buckets from the stored signatures."""
+        if threshold == self.threshold:
+            return
+        self.threshold = threshold
+        self.bands, self.rows = lsh_params(threshold, self.num_perm)
+        self.buckets = [defaultdict(list) for _ in range(self.bands)]
+        for idx, sig in enumerate(self.signatures):
+            for band, bk in enumerate(self._band_keys(sig)):
+                self.buckets[band][bk].append(idx)
+
+    # -------------------------------
+    # Signatures
+    # -------------------------------
+    def signature(self, text: str) -> np.ndarray:
+        x = shingles(text, self.shingle_size) % MERSENNE_PRIME
+        # (a*x + b) mod p for every permutation × shingle, then min over shingles
+        perm = (np.outer(self._a, x) + self._b[:, None]) % MERSENNE_PRIME
+        return perm.min(axis=1).astype(np.uint32)
+
+    def _band_keys(self, sig: np.ndarray):
+        r = self.rows
+        return [sig[i * r:(i + 1) * r].tobytes() for i in range(self.bands)]
+
+    @property
+    def signatures(self) -> np.ndarray:
+        return self._signatures[:len(self.keys)]
+
+    # -------------------------------
+    # Insert / query
+    # -------------------------------
+    def query_signature(self, sig: np.ndarray, before=None):
+        """[(key, estimated Jaccard)] for indexed items (inserted before position `before`) at or above the threshold."""
+        candidates = set()
+        for band, bk in enumerate(self._band_keys(sig)):
+            candidates.update(self.buckets[band].get(bk, ()))
+        if before is not None:
+            candidates = {i for i in candidates if i < before}
+        if not candidates:
+            return []
+        idx = np.fromiter(candidates, dtype=np.int64)
+        sims = (self.signatures[idx] == sig).mean(axis=1)
+        keep = sims >= self.threshold
+        order = np.argsort(-sims[keep])
+        return [(self.keys[i], float(s)) for i, s in zip(idx[keep][order], sims[keep][order])]
+
+    def query(self, text: str):
+        return self.query_signature(self.signature(text))
+
+    def insert_signature(self, key, sig: np.ndarray):
+        idx = len(self.keys)
+        if idx == len(self._signatures):
+            grown = np.empty((2 * idx, self.num_perm), dtype=np.uint32)
+            grown[:idx] = self._signatures
+            self._signatures = grown
+        self._signatures[idx] = sig
+        self.keys.append(key)
+        self.positions[key] = idx
+        for band, bk in enumerate(self._band_keys(sig)):
+            self.buckets[band][bk].append(idx)
+
+    def insert(self, key, text: str):
+        self.insert_signature(key, self.signature(text))
+
+    def add(self, key, text: str):
+        """
+        Query then insert; returns the matches found before insertion. A key that
+        is already indexed is not inserted again and gets the matches it had then.
+        """
+        sig = self.signature(text)
+        if key in self.positions:
+            return self.query_signature(sig, before=self.positions[key])
+        matches = self.query_signature(sig)
+        self.insert_signature(key, sig)
+        return matches
+
+    # -------------------------------
+    # Persistence
+    # -------------------------------
+    def save(self, path=INDEX_PATH):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        tmp = path + ".tmp"
+        with open(tmp, "wb") as f:
+            # plain state, so an index written by the CLI (__main__) loads from an import too
+            pickle.dump(self.__dict__, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp, path)
+
+    @staticmethod
+    def load(path=INDEX_PATH):
+        with open(path, "rb") as f:
+            state = pickle.load(f)
+        if isinstance(state, MinHashLSH):
+            return state
+        index = MinHashLSH.__new__(MinHashLSH)
+        index.__setstate__(state)
+        return index
+
+
+def find_near_duplicates(texts, keys=None, index: MinHashLSH = None, threshold=0.8):
+    """
+    Walk texts in order; each one is matched against everything indexed before it.
+    Returns a DataFrame with key, duplicate_of and similarity (None when unique).
+    """
+    index = index or MinHashLSH(threshold=threshold)
+    keys = list(keys) if keys is not None else list(range(len(index), len(index) + len(texts)))
+    rows = []
+    for key, text in zip(keys, texts):
+        matches = index.add(key, text)
+        best = matches[0] if matches else (None, None)
+        rows.append({"key": key, "duplicate_of": best[0], "similarity": best[1]})
+    return pd.DataFrame(rows), index
+
+
+def deduplicate_reviews_fuzzy(reviews, threshold=0.8):
+    """Drops reviews (list of dicts) that near-duplicate an earlier one."""
+    index = MinHashLSH(threshold=threshold)
+    unique_reviews = []
+    for i, r in enumerate(reviews):
+        text = f"{r.get('Review_Title') or ''} {r.get('Review_Body') or ''}"
+        if not index.add(i, text):
+            unique_reviews.append(r)
+    return unique_reviews
+
+
+def parse_args(argv=None):
+    p = argparse.ArgumentParser(description="Flag near-duplicate reviews across marketplaces.")
+    p.add_argument("files", nargs="*")
+    p.add_argument("--threshold", type=float, default=0.8, help="Jaccard similarity counted as duplicate")
+    p.add_argument("--index", default=INDEX_PATH, help="persistent LSH index to extend")
+    p.add_argument("--fresh", action="store_true", help="ignore any existing index")
+    p.add_argument("--output", default=os.path.join("output", "review_near_duplicates.csv"))
+    return p.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    df = load_review_files(args.files or find_review_files())
+    if df.empty:
+        print("[dedup] No reviews found.")
+        return 1
+
+    index = None
+    if not args.fresh and os.path.exists(args.index):
+        index = MinHashLSH.load(args.index)
+        index.set_threshold(args.threshold)
+        print(f"[dedup] Loaded index with {len(index)} reviews")
+
+    # content identity, so re-running over the same files does not re-index (or self-match) anything
+    keys = review_identity(df)
+    result, index = find_near_duplicates(review_text(df).tolist(), keys, index, args.threshold)
+    out = pd.concat([df[["Source", "Review_Title", "Review_Body", "Source_File"]].reset_index(drop=True),
+                     result[["duplicate_of", "similarity"]]], axis=1)
+    os.makedirs(os.path.dirname(args.output) or ".", exist_ok=True)
+    out.to_csv(args.output, index=False, encoding="utf-8-sig")
+    index.save(args.index)
+
+    dupes = out["duplicate_of"].notna().sum()
+    print(f"[dedup] {len(out)} reviews, {dupes} near-duplicates (threshold {args.threshold}, "
+          f"{index.bands} bands × {index.rows} rows) → {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,186 @@
+# review_index.py
+# Persistent full-text index over Review_Title / Review_Body.
+#
+#   python review_index.py add files/*.xlsx product_reviews_combined_*.xlsx
+#   python review_index.py search 'battery AND (heating OR heat)' --source Amazon --max-stars 3
+#   python review_index.py search '"camera quality"' --by product
+#
+# Backed by SQLite FTS5 (inverted index, BM25 ranking, boolean / phrase / prefix
+# queries) with an external-content table holding the filter columns. Product,
+# source, star rating and review day are plain indexed columns, so filtered
+# counts and top-k matches do not scan the corpus. New scrape files are added
+# incrementally; reviews already indexed (same identity fingerprint) are skipped.
+
+import argparse
+import os
+import sqlite3
+import sys
+import time
+
+import pandas as pd
+
+from reviews import find_review_files, product_key, read_review_file, review_day, review_identity
+
+DB_PATH = os.path.join("output", "review_index.sqlite")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS reviews (
+    id INTEGER PRIMARY KEY,
+    fp TEXT NOT NULL UNIQUE,
+    product TEXT,
+    source TEXT,
+    stars REAL,
+    day TEXT,
+    title TEXT,
+    body TEXT,
+    source_file TEXT
+);
+CREATE INDEX IF NOT EXISTS reviews_product_day ON reviews (product, day);
+CREATE INDEX IF NOT EXISTS reviews_source_day ON reviews (source, day);
+CREATE INDEX IF NOT EXISTS reviews_stars ON reviews (stars);
+CREATE VIRTUAL TABLE IF NOT EXISTS review_fts USING fts5(
+    title, body, content='reviews', content_rowid='id', tokenize='porter unicode61'
+);
+"""
+
+GROUP_COLUMNS = {"product", "source", "day", "stars"}
+
+
+class ReviewIndex:
+    def __init__(self, path=DB_PATH):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.conn = sqlite3.connect(path)
+        self.conn.executescript(SCHEMA)
+
+    def close(self):
+        self.conn.close()
+
+    def __len__(self):
+        return self.conn.execute("SELECT COUNT(*) FROM reviews").fetchone()[0]
+
+    # -------------------------------
+    # Incremental indexing
+    # -------------------------------
+    def add(self, df: pd.DataFrame) -> int:
+        rows = pd.DataFrame({
+            "fp": review_identity(df),
+            "product": product_key(df),
+            "source": df["Source"],
+            "stars": pd.to_numeric(df["Review_Stars"], errors="coerce"),
+            "day": review_day(df),
+            "title": df["Review_Title"].fillna("").astype(str),
+            "body": df["Review_Body"].fillna("").astype(str),
+            "source_file": df["Source_File"] if "Source_File" in df else "",
+        }).drop_duplicates("fp")
+        rows["stars"] = rows["stars"].astype(object).where(rows["stars"].notna(), None)
+
+        with self.conn:
+            before = self.conn.execute("SELECT COALESCE(MAX(id), 0) FROM reviews").fetchone()[0]
+            self.conn.executemany(
+                "INSERT OR IGNORE INTO reviews (fp, product, source, stars, day, title, body, source_file) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                rows.itertuples(index=False, name=None),
+            )
+            # only rows that were actually new get tokenised
+            added = self.conn.execute(
+                "INSERT INTO review_fts (rowid, title, body) SELECT id, title, body FROM reviews WHERE id > ?",
+                (before,),
+            ).rowcount
+        return added
+
+    def optimize(self):
+        with self.conn:
+            self.conn.execute("INSERT INTO review_fts (review_fts) VALUES ('optimize')")
+
+    # -------------------------------
+    # Queries
+    # -------------------------------
+    @staticmethod
+    def _filters(product=None, source=None, min_stars=None, max_stars=None, start=None, end=None):
+        clauses, params = [], []
+        for col, op, value in [("product", "=", product), ("source", "=", source),
+                               ("stars", ">=", min_stars), ("stars", "<=", max_stars),
+                               ("day", ">=", start), ("day", "<=", end)]:
+            if value is not None:
+                clauses.append(f"r.{col} {op} ?")
+                params.append(value)
+        return "".join(f" AND {c}" for c in clauses), params
+
+    def count(self, query: str, by=None, **filters):
+        where, params = self._filters(**filters)
+        base = f"FROM review_fts JOIN reviews r ON r.id = review_fts.rowid WHERE review_fts MATCH ?{where}"
+        if not by:
+            return self.conn.execute(f"SELECT COUNT(*) {base}", [query, *params]).fetchone()[0]
+        if by not in GROUP_COLUMNS:
+            raise ValueError(f"Cannot group by '{by}'. Choose from: {', '.join(sorted(GROUP_COLUMNS))}")
+        return pd.read_sql_query(f"SELECT r.{by} AS {by}, COUNT(*) AS matches {base} GROUP BY r.{by} "
+                                 f"ORDER BY matches DESC", self.conn, params=[query, *params])
+
+    def search(self, query: str, top=10, **filters) -> pd.DataFrame:
+        where, params = self._filters(**filters)
+        sql = (
+            "SELECT r.product, r.source, r.stars, r.day, r.title, "
+            "snippet(review_fts, 1, '[', ']', '…', 16) AS snippet, bm25(review_fts) AS score "
+            f"FROM review_fts JOIN reviews r ON r.id = review_fts.rowid WHERE review_fts MATCH ?{where} "
+            "ORDER BY score LIMIT ?"
+        )
+        return pd.read_sql_query(sql, self.conn, params=[query, *params, top])
+
+
+def parse_args(argv=None):
+    p = argparse.ArgumentParser(description="Full-text index over scraped reviews.")
+    p.add_argument("--db", default=DB_PATH)
+    sub = p.add_subparsers(dest="cmd", required=True)
+
+    a = sub.add_parser("add", help="index review files (incremental)")
+    a.add_argument("files", nargs="*")
+    a.add_argument("--optimize", action="store_true", help="merge index segments afterwards")
+
+    s = sub.add_parser("search", help="FTS5 query: AND / OR / NOT, \"phrases\", prefix*")
+    s.add_argument("query")
+    s.add_argument("--product")
+    s.add_argument("--source")
+    s.add_argument("--min-stars", type=float)
+    s.add_argument("--max-stars", type=float)
+    s.add_argument("--start", help="YYYY-MM-DD")
+    s.add_argument("--end", help="YYYY-MM-DD")
+    s.add_argument("--top", type=int, default=10)
+    s.add_argument("--by", choices=sorted(GROUP_COLUMNS), help="return match counts per group instead")
+    return p.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    index = ReviewIndex(args.db)
+    try:
+        if args.cmd == "add":
+            for path in args.files or find_review_files():
+                print(f"[index] {path}: {index.add(read_review_file(path))} new reviews")
+            if args.optimize:
+                index.optimize()
+            print(f"[index] {len(index)} reviews indexed → {args.db}")
+            return 0
+
+        filters = {"product": args.product, "source": args.source, "min_stars": args.min_stars,
+                   "max_stars": args.max_stars, "start": args.start, "end": args.end}
+        t0 = time.perf_counter()
+        if args.by:
+            result = index.count(args.query, by=args.by, **filters)
+            print(result.to_string(index=False))
+        else:
+            total = index.count(args.query, **filters)
+            top = index.search(args.query, args.top, **filters)
+            print(f"{total} matching reviews")
+            if not top.empty:
+                print(top.to_string(index=False))
+        print(f"[index] query took {(time.perf_counter() - t0) * 1000:.1f} ms")
+    except sqlite3.OperationalError as e:
+        print(f"[index] Bad query: {e}")
+        return 2
+    finally:
+        index.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
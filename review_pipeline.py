@@ -0,0 +1,176 @@
+# review_pipeline.py
+# Streaming review pipeline: extractors → dedup → enrichment → chunked sink.
+#
+# Every stage runs in its own thread and is connected to the next by a bounded
+# queue, so at most `maxsize` records per hop are in memory no matter how many
+# reviews a crawl yields. Extractors are plain generators (see
+# Ascrape_review.iter_amazon_reviews / iter_flipkart_reviews); several of them
+# can feed the pipeline at once. The sink appends to CSV every `chunk_size`
+# records, so results are on disk while the crawl is still running. When any
+# stage or the sink raises, a shared stop event tells every thread to finish
+# after its current record, so extractors do not keep crawling to exhaustion.
+
+import os
+import queue
+import threading
+
+import pandas as pd
+
+from review_dedup import MinHashLSH
+from reviews import fingerprint
+
+_END = object()
+
+
+class ReviewDeduper:
+    """Exact (title, body) dedup, optionally followed by MinHash/LSH near-duplicate dedup."""
+
+    def __init__(self, near_dup_threshold=None):
+        self.seen = set()
+        self.lsh = MinHashLSH(threshold=near_dup_threshold) if near_dup_threshold else None
+        self.dropped = 0
+
+    def __call__(self, record):
+        text = f"{record.get('Review_Title') or ''} {record.get('Review_Body') or ''}"
+        key = fingerprint(text)
+        if key in self.seen:
+            self.dropped += 1
+            return None
+        self.seen.add(key)
+        if self.lsh is not None and self.lsh.add(key, text):
+            self.dropped += 1
+            return None
+        return record
+
+
+class ChunkedCsvSink:
+    """Appends records to a CSV in chunks; the header is written with the first chunk."""
+
+    def __init__(self, path, columns=None, chunk_size=200):
+        self.path = path
+        self.columns = columns
+        self.chunk_size = chunk_size
+        self.buffer = []
+        self.written = 0
+
+    def __call__(self, record):
+        self.buffer.append(record)
+        if len(self.buffer) >= self.chunk_size:
+            self.flush()
+
+    def flush(self):
+        if not self.buffer:
+            return
+        df = pd.DataFrame(self.buffer)
+        if self.columns is None:
+            self.columns = list(df.columns)
+        df = df.reindex(columns=self.columns)
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        first = self.written == 0 and not os.path.exists(self.path)
+        df.to_csv(self.path, mode="a", header=first, index=False, encoding="utf-8-sig" if first else "utf-8")
+        self.written += len(df)
+        self.buffer = []
+
+    def close(self):
+        self.flush()
+
+
+def _put(q, item, stop):
+    """Blocking put that gives up once the pipeline is stopping; False if it did."""
+    while not stop.is_set():
+        try:
+            q.put(item, timeout=0.1)
+            return True
+        except queue.Full:
+            continue
+    return False
+
+
+def _get(q, stop):
+    """Blocking get that returns _END once the pipeline is stopping."""
+    while not stop.is_set():
+        try:
+            return q.get(timeout=0.1)
+        except queue.Empty:
+            continue
+    return _END
+
+
+def _produce(gen, out_q, errors, stop):
+    try:
+        for record in gen:
+            if not _put(out_q, record, stop):
+                break
+    except Exception as e:
+        errors.append(e)
+        stop.set()
+    finally:
+        if hasattr(gen, "close"):
+            gen.close()  # runs the extractor's cleanup (driver.quit, registry save) when stopped early
+        _put(out_q, _END, stop)
+
+
+def _transform(fn, in_q, out_q, n_upstream, errors, stop):
+    finished = 0
+    try:
+        while finished < n_upstream and not stop.is_set():
+            record = _get(in_q, stop)
+            if record is _END:
+                finished += 1
+                continue
+            result = fn(record)
+            if result is not None:
+                _put(out_q, result, stop)
+    except Exception as e:
+        errors.append(e)
+        stop.set()
+    finally:
+        _put(out_q, _END, stop)
+
+
+def run_pipeline(extractors, stages, sink, maxsize=500):
+    """
+    extractors: iterables of record dicts (run concurrently)
+    stages:     callables record -> record | None (None drops it), run in order
+    sink:       callable record -> None with an optional close()
+    Returns the number of records that reached the sink.
+    """
+    errors = []
+    threads = []
+    stop = threading.Event()
+    q = queue.Queue(maxsize)
+    for gen in extractors:
+        threads.append(threading.Thread(target=_produce, args=(gen, q, errors, stop), daemon=True))
+
+    upstream = len(extractors)
+    for fn in stages:
+        nxt = queue.Queue(maxsize)
+        threads.append(threading.Thread(target=_transform, args=(fn, q, nxt, upstream, errors, stop), daemon=True))
+        q, upstream = nxt, 1
+
+    for t in threads:
+        t.start()
+
+    delivered = 0
+    finished = 0
+    try:
+        while finished < upstream and not stop.is_set():
+            record = _get(q, stop)
+            if record is _END:
+                finished += 1
+                continue
+            sink(record)
+            delivered += 1
+    except BaseException:
+        stop.set()
+        raise
+    finally:
+        if hasattr(sink, "close"):
+            sink.close()
+        # every thread checks `stop` between records, so this returns promptly after a failure
+        for t in threads:
+            t.join()
+
+    if errors:
+        raise errors[0]
+    return delivered
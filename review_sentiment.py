@@ -0,0 +1,176 @@
+# review_sentiment.py
+# Sentiment + text features for scraped reviews, run after ingestion instead of
+# inside the scrape loop.
+#
+#   python review_sentiment.py                       # all known review files
+#   python review_sentiment.py files/*.xlsx --workers 8
+#
+# Reviews are fingerprinted by normalised content and looked up in a SQLite
+# cache first; only unseen texts go to TextBlob, in large batches spread over a
+# process pool. Length features are plain column operations.
+# Output: output/<file>_sentiment.csv per input file.
+
+import argparse
+import os
+import sqlite3
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from reviews import find_review_files, fingerprints, read_review_file, review_text
+
+CACHE_PATH = os.path.join("output", "sentiment_cache.sqlite")
+BATCH_SIZE = 2000
+
+# same thresholds / buckets as scraping_final.text_features
+POSITIVE_THRESHOLD = 0.2
+NEGATIVE_THRESHOLD = -0.2
+LENGTH_BINS = [-np.inf, 5, 15, 50, np.inf]
+LENGTH_LABELS = ["Very Short", "Short", "Medium", "Long"]
+
+
+# -------------------------------
+# Vectorised text features
+# -------------------------------
+def add_text_features(df: pd.DataFrame, text: pd.Series) -> pd.DataFrame:
+    text = text.fillna("").astype(str).str.strip()
+    df["char_count"] = text.str.len()
+    df["word_count"] = text.str.count(r"\S+")
+    df["length_category"] = pd.cut(df["word_count"], LENGTH_BINS, labels=LENGTH_LABELS).astype(str)
+    return df
+
+
+def sentiment_label(polarity: pd.Series) -> pd.Series:
+    labels = np.select(
+        [polarity > POSITIVE_THRESHOLD, polarity < NEGATIVE_THRESHOLD, polarity.notna()],
+        ["positive", "negative", "neutral"],
+        default="N/A",
+    )
+    return pd.Series(labels, index=polarity.index)
+
+
+# -------------------------------
+# Fingerprint cache
+# -------------------------------
+class SentimentCache:
+    def __init__(self, path=CACHE_PATH):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.conn = sqlite3.connect(path)
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS sentiment ("
+            " fp TEXT PRIMARY KEY, polarity REAL, subjectivity REAL)"
+        )
+
+    def get_many(self, fps) -> dict:
+        found = {}
+        fps = list(fps)
+        for i in range(0, len(fps), 900):  # stay under SQLite's variable limit
+            chunk = fps[i:i + 900]
+            marks = ",".join("?" * len(chunk))
+            for fp, pol, subj in self.conn.execute(
+                    f"SELECT fp, polarity, subjectivity FROM sentiment WHERE fp IN ({marks})", chunk):
+                found[fp] = (pol, subj)
+        return found
+
+    def put_many(self, rows):
+        with self.conn:
+            self.conn.executemany("INSERT OR REPLACE INTO sentiment VALUES (?, ?, ?)", rows)
+
+    def close(self):
+        self.conn.close()
+
+
+# -------------------------------
+# Batch scoring (worker side)
+# -------------------------------
+def score_batch(texts):
+    try:
+        from textblob import TextBlob
+    except Exception:
+        return [(None, None)] * len(texts)
+    out = []
+    for t in texts:
+        try:
+            s = TextBlob(t).sentiment
+            out.append((s.polarity, s.subjectivity))
+        except Exception:
+            out.append((None, None))
+    return out
+
+
+def score_texts(texts: dict, workers=None, batch_size=BATCH_SIZE) -> dict:
+    """texts: {fingerprint: text} → {fingerprint: (polarity, subjectivity)}"""
+    fps = list(texts)
+    batches = [fps[i:i + batch_size] for i in range(0, len(fps), batch_size)]
+    results = {}
+    if not batches:
+        return results
+    if workers == 1 or len(batches) == 1:
+        scored = map(score_batch, ([texts[fp] for fp in b] for b in batches))
+        for b, res in zip(batches, scored):
+            results.update(zip(b, res))
+        return results
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        scored = pool.map(score_batch, [[texts[fp] for fp in b] for b in batches])
+        for b, res in zip(batches, scored):
+            results.update(zip(b, res))
+    return results
+
+
+def enrich_reviews(df: pd.DataFrame, cache: SentimentCache, workers=None, batch_size=BATCH_SIZE):
+    text = review_text(df)
+    df = add_text_features(df, text)
+    df["review_fp"] = fingerprints(text)
+
+    has_text = text != ""
+    wanted = dict(zip(df.loc[has_text, "review_fp"], text[has_text]))
+    cached = cache.get_many(wanted)
+    missing = {fp: t for fp, t in wanted.items() if fp not in cached}
+    fresh = score_texts(missing, workers, batch_size)
+    # failed scores (None) are not cached so they are retried next run
+    cache.put_many((fp, p, s) for fp, (p, s) in fresh.items() if p is not None)
+
+    scores = {**cached, **fresh}
+    df["polarity"] = pd.to_numeric(df["review_fp"].map(lambda fp: scores.get(fp, (None, None))[0]), errors="coerce")
+    df["subjectivity"] = pd.to_numeric(df["review_fp"].map(lambda fp: scores.get(fp, (None, None))[1]), errors="coerce")
+    df["sentiment"] = sentiment_label(df["polarity"])
+    return df, {"reviews": len(df), "cached": len(cached), "scored": len(fresh)}
+
+
+def parse_args(argv=None):
+    p = argparse.ArgumentParser(description="Batch sentiment + text features for scraped review files.")
+    p.add_argument("files", nargs="*", help="review .xlsx/.csv files (default: all known review files)")
+    p.add_argument("--cache", default=CACHE_PATH)
+    p.add_argument("--workers", type=int, default=None)
+    p.add_argument("--batch-size", type=int, default=BATCH_SIZE)
+    p.add_argument("--output-dir", default="output")
+    return p.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    paths = args.files or find_review_files()
+    if not paths:
+        print("[sentiment] No review files found.")
+        return 1
+
+    os.makedirs(args.output_dir, exist_ok=True)
+    cache = SentimentCache(args.cache)
+    try:
+        for path in paths:
+            t0 = time.perf_counter()
+            df, stats = enrich_reviews(read_review_file(path), cache, args.workers, args.batch_size)
+            out = os.path.join(args.output_dir, f"{os.path.splitext(os.path.basename(path))[0]}_sentiment.csv")
+            df.to_csv(out, index=False, encoding="utf-8-sig")
+            print(f"[sentiment] {path}: {stats['reviews']} reviews, {stats['cached']} cached, "
+                  f"{stats['scored']} scored in {time.perf_counter() - t0:.1f}s → {out}")
+    finally:
+        cache.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,114 @@
+# reviews.py
+# Shared helpers for review files written by the scrapers
+# (Ascrape_review → product_reviews_combined_<ASIN>_<ts>.csv / .xlsx,
+#  scraping_final.merge_and_save_final → output/*_metadata_reviews.csv).
+
+import glob
+import hashlib
+import os
+import re
+
+import pandas as pd
+
+from review_dates import parse_review_dates
+
+REVIEW_FILE_PATTERNS = [
+    "product_reviews_combined_*.xlsx",
+    "product_reviews_combined_*.csv",
+    os.path.join("files", "product_reviews_combined_*.xlsx"),
+    os.path.join("output", "*_metadata_reviews.csv"),
+]
+
+# scraping_final.py column names → Ascrape_review.py column names
+LEGACY_COLUMNS = {
+    "text": "Review_Body",
+    "review": "Review_Body",
+    "rating_value": "Review_Stars",
+    "rating": "Review_Stars",
+    "date": "Review_Date",
+    "platform": "Source",
+    "product_name": "Product_Name",
+    "product_asin": "Product_ASIN",
+    "scraped_at": "Scraped_At",
+}
+
+_WS = re.compile(r"\s+")
+
+
+def find_review_files(patterns=None):
+    paths = []
+    for pat in patterns or REVIEW_FILE_PATTERNS:
+        paths.extend(glob.glob(pat))
+    return sorted(set(paths))
+
+
+def read_review_file(path: str) -> pd.DataFrame:
+    if path.lower().endswith((".xlsx", ".xls")):
+        df = pd.read_excel(path)
+    else:
+        df = pd.read_csv(path, encoding="utf-8-sig")
+    # legacy files: rename only columns that do not collide with existing ones
+    rename = {k: v for k, v in LEGACY_COLUMNS.items() if k in df.columns and v not in df.columns}
+    df = df.rename(columns=rename)
+    for col in ["Review_Title", "Review_Body", "Review_Stars", "Reviewer", "Review_Date", "Source",
+                "Product_ASIN", "Product_Name", "Scraped_At"]:
+        if col not in df.columns:
+            df[col] = ""
+    df["Source"] = df["Source"].fillna("").astype(str).str.strip().str.title()
+    df["Source_File"] = os.path.basename(path)
+    return df
+
+
+def load_review_files(paths) -> pd.DataFrame:
+    frames = [read_review_file(p) for p in paths]
+    if not frames:
+        return pd.DataFrame()
+    return pd.concat(frames, ignore_index=True)
+
+
+def review_text(df: pd.DataFrame) -> pd.Series:
+    """Text to analyse: the body, falling back to the title when the body is empty."""
+    body = df["Review_Body"].fillna("").astype(str).str.strip()
+    title = df["Review_Title"].fillna("").astype(str).str.strip()
+    return body.where(body != "", title)
+
+
+def normalise_text(text: str) -> str:
+    return _WS.sub(" ", str(text or "")).strip().lower()
+
+
+def fingerprint(text: str) -> str:
+    return hashlib.sha1(normalise_text(text).encode("utf-8")).hexdigest()
+
+
+def fingerprints(texts) -> list:
+    return [fingerprint(t) for t in texts]
+
+
+def product_key(df: pd.DataFrame) -> pd.Series:
+    asin = df["Product_ASIN"].fillna("").astype(str).str.strip()
+    name = df["Product_Name"].fillna("").astype(str).str.strip()
+    return asin.where(asin != "", name).replace("", "unknown")
+
+
+def review_timestamp(df: pd.DataFrame) -> pd.Series:
+    """Typed review date; relative Flipkart dates are resolved against Scraped_At."""
+    if "Review_Timestamp" in df.columns:
+        ts = pd.to_datetime(df["Review_Timestamp"], errors="coerce")
+        if ts.notna().all():
+            return ts
+    return parse_review_dates(df["Review_Date"], df["Scraped_At"].replace("", None))
+
+
+def review_day(df: pd.DataFrame) -> pd.Series:
+    """Calendar day of each review; falls back to the scrape date when unparseable."""
+    day = review_timestamp(df)
+    scraped = pd.to_datetime(df["Scraped_At"], errors="coerce")
+    return day.fillna(scraped).dt.strftime("%Y-%m-%d").fillna("unknown")
+
+
+def review_identity(df: pd.DataFrame) -> list:
+    """Fingerprint identifying one review of one product on one source."""
+    parts = product_key(df) + "\x1f" + df["Source"].astype(str) + "\x1f" + \
+        df["Review_Title"].fillna("").astype(str) + "\x1f" + df["Review_Body"].fillna("").astype(str)
+    return fingerprints(parts)
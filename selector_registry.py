@@ -0,0 +1,222 @@
+# selector_registry.py
+# Central CSS selector fallback chains per site and field, tiered, learning within a tier.
+#
+#   python selector_registry.py report                  # hit counts, current order, dead selectors
+#   python selector_registry.py report --site flipkart --dead-only
+#   python selector_registry.py reset --site flipkart   # forget learned order
+#
+# Sites rename their CSS classes every few months, so scrapers carry chains
+# of selectors (old layout, new layout, a generic fallback) and used to try
+# them in the order they were written on every page. The registry keeps the
+# chains in one place. A chain is a list of tiers in preference order; a tier
+# is one selector, or a tuple of true alternatives (the same element under
+# different layouts). Lookups learn only inside a tier: the alternative that
+# matched moves to the front of its tier (move-to-front), so in the steady
+# state a field costs one selector evaluation per tier tried. Broader
+# selectors and ones that can match different data sit in later tiers and are
+# never promoted over the written order. A selector that has not matched in the last DEAD_AFTER
+# evaluations of its field is reported as dead, and a field whose whole chain
+# keeps missing shows up with a high miss rate: both mean the chain needs a
+# new selector. Order and counters persist in output/selector_stats.json so
+# every run starts from what worked last time.
+
+import argparse
+import json
+import os
+import sys
+import threading
+import time
+
+STATS_PATH = os.path.join("output", "selector_stats.json")
+DEAD_AFTER = 200
+
+CHAINS = {
+    "flipkart": {
+        # product page
+        "product_name": [("span.B_NuCI", "span._35KyD6"), "div._1Mh3u3 h1"],
+        "brand": ["a._2whKao", "span._2apC"],
+        "price": ["div._30jeq3._16Jk6d", "div._30jeq3"],
+        "mrp": ["div._3I9_wc._2p6lqe", "div._3I9_wc"],
+        "discount": ["div._3Ay6Sb._31Dcoz", "div._3Ay6Sb"],
+        "rating": ["div._3LWZlK", "span._2_R_DZ"],
+        "reviews_count": ["span._2_R_DZ", "span._2s6RMp"],
+        "seller": ["a._2whKao", "div._3k-BhJ"],
+        "stock": ["div._16FRp0", "div._2o7WAb"],
+        # review listing
+        "review_blocks": [("div._16PBlm", "div._27M-vq", "div._2kS5Gq", "div.dhYmqp"),
+                          "div._1AtVbE div[class*='col-']"],
+        "review_text_nodes": ["div.t-ZTKy div", "div._1c3YSN"],
+        # inside one review block
+        "review_text": [("div.t-ZTKy div", "div.qwjRop")],
+        "review_body": [("div.t-ZTKy", "div.qwjRop")],
+        "review_title": ["p._2-N8zT"],
+        "review_rating": ["div._3LWZlK", "span._2_R_DZ"],
+        "review_date": ["p._2sc7ZR._2V5EHH", "div._2fxQ4u"],
+    },
+}
+
+
+def _has_text(el):
+    return bool(el.get_text(strip=True))
+
+
+class SelectorRegistry:
+    def __init__(self, path=STATS_PATH, chains=CHAINS, dead_after=DEAD_AFTER):
+        self.path = path
+        self.dead_after = dead_after
+        self._lock = threading.Lock()
+        self.fields = {}
+        saved = {}
+        if path and os.path.exists(path):
+            with open(path, encoding="utf-8") as f:
+                saved = json.load(f)
+        for site, fields in chains.items():
+            for name, selectors in fields.items():
+                self.fields[(site, name)] = self._merge(selectors, saved.get(site, {}).get(name))
+
+    @staticmethod
+    def _merge(chain, saved):
+        # tiers keep their written order; inside a tier the learned order wins and new selectors go last.
+        # Selectors removed from the code are dropped.
+        tiers = [(t,) if isinstance(t, str) else tuple(t) for t in chain]
+        selectors = [s for t in tiers for s in t]
+        stats = {"evals": 0, "misses": 0, "order": selectors,
+                 "tier": {s: i for i, t in enumerate(tiers) for s in t},
+                 "selectors": {s: {"hits": 0, "last_hit_eval": None, "last_hit_at": None} for s in selectors}}
+        if saved:
+            stats["evals"], stats["misses"] = saved.get("evals", 0), saved.get("misses", 0)
+            learned = {s: rank for rank, s in enumerate(saved.get("order", []))}
+            stats["order"] = sorted(selectors, key=lambda s: (stats["tier"][s], learned.get(s, len(learned))))
+            for s, row in saved.get("selectors", {}).items():
+                if s in stats["selectors"]:
+                    stats["selectors"][s].update(row)
+        return stats
+
+    def _field(self, site, name):
+        try:
+            return self.fields[(site, name)]
+        except KeyError:
+            raise KeyError(f"No selector chain for {site}.{name}") from None
+
+    def _lookup(self, site, name, run):
+        """run(selector) -> result or None; tries the chain in learned order and records the winner."""
+        field = self._field(site, name)
+        with self._lock:
+            order = list(field["order"])
+        for selector in order:
+            result = run(selector)
+            if result:
+                with self._lock:
+                    field["evals"] += 1
+                    row = field["selectors"][selector]
+                    row["hits"] += 1
+                    row["last_hit_eval"] = field["evals"]
+                    row["last_hit_at"] = time.time()
+                    tier = field["tier"][selector]
+                    front = next(i for i, s in enumerate(field["order"]) if field["tier"][s] == tier)
+                    if field["order"][front] != selector:
+                        field["order"].remove(selector)
+                        field["order"].insert(front, selector)
+                return result
+        with self._lock:
+            field["evals"] += 1
+            field["misses"] += 1
+        return None
+
+    # -------------------------------
+    # Lookups (BeautifulSoup)
+    # -------------------------------
+    def select_one(self, soup, site, name, accept=None):
+        """First element of the first selector that matches (and passes `accept`), or None."""
+        def run(selector):
+            el = soup.select_one(selector)
+            return el if el is not None and (accept is None or accept(el)) else None
+        return self._lookup(site, name, run)
+
+    def select(self, soup, site, name):
+        """All elements of the first selector that matches anything; [] when the chain misses."""
+        return self._lookup(site, name, soup.select) or []
+
+    def text(self, soup, site, name, sep=""):
+        el = self.select_one(soup, site, name, accept=_has_text)
+        return el.get_text(sep, strip=True) if el is not None else None
+
+    # -------------------------------
+    # Reporting / persistence
+    # -------------------------------
+    def is_dead(self, field, selector):
+        row = field["selectors"][selector]
+        since = field["evals"] - (row["last_hit_eval"] or 0)
+        return since >= self.dead_after
+
+    def report(self, site=None):
+        rows = []
+        with self._lock:
+            for (s, name), field in sorted(self.fields.items()):
+                if site and s != site:
+                    continue
+                for rank, selector in enumerate(field["order"]):
+                    row = field["selectors"][selector]
+                    rows.append({
+                        "site": s, "field": name, "rank": rank, "tier": field["tier"][selector],
+                        "selector": selector, "hits": row["hits"],
+                        "hit_rate": round(row["hits"] / field["evals"], 3) if field["evals"] else None,
+                        "field_miss_rate": round(field["misses"] / field["evals"], 3) if field["evals"] else None,
+                        "dead": self.is_dead(field, selector),
+                    })
+        return rows
+
+    def dead(self, site=None):
+        return [r for r in self.report(site) if r["dead"]]
+
+    def save(self):
+        if not self.path:
+            return
+        out = {}
+        with self._lock:
+            for (site, name), field in self.fields.items():
+                out.setdefault(site, {})[name] = field
+            data = json.dumps(out, indent=1)
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        tmp = self.path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            f.write(data)
+        os.replace(tmp, self.path)
+
+    def reset(self, site=None):
+        with self._lock:
+            for (s, name) in list(self.fields):
+                if site is None or s == site:
+                    self.fields[(s, name)] = self._merge(CHAINS[s][name], None)
+
+
+REGISTRY = SelectorRegistry()
+
+
+def parse_args(argv=None):
+    p = argparse.ArgumentParser(description="Selector fallback chains and their hit statistics.")
+    p.add_argument("cmd", choices=["report", "reset"])
+    p.add_argument("--site", choices=sorted(CHAINS), default=None)
+    p.add_argument("--dead-only", action="store_true")
+    p.add_argument("--path", default=STATS_PATH)
+    return p.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    registry = SelectorRegistry(args.path)
+    if args.cmd == "reset":
+        registry.reset(args.site)
+        registry.save()
+        print(f"[selectors] Reset {args.site or 'all sites'}")
+        return 0
+    rows = registry.dead(args.site) if args.dead_only else registry.report(args.site)
+    for r in rows:
+        flag = "  DEAD" if r["dead"] else ""
+        print(f"{r['site']}.{r['field']:<18} #{r['rank']} tier {r['tier']} {r['selector']:<36} hits={r['hits']:<6} "
+              f"rate={r['hit_rate']}  field_miss={r['field_miss_rate']}{flag}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
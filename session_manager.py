@@ -0,0 +1,282 @@
+# session_manager.py
+# One cookie jar per site, shared by requests sessions and Selenium drivers.
+#
+#   python session_manager.py status amazon           # cheap local freshness check
+#   python session_manager.py check amazon            # + one probe request for a login wall
+#   python session_manager.py refresh pricehistory
+#
+# The jar is the pickled list of Selenium cookie dicts that save_cookies.py
+# writes (amazon_cookies.pkl); sites without a login keep theirs under
+# output/sessions/. Freshness is checked locally first (required cookies
+# present, none expiring within REFRESH_MARGIN_S; for anonymous sites, a
+# warm-up younger than warm_ttl) and, at most every PROBE_TTL_S, with one
+# request that looks for a sign-in redirect. Drivers get
+# the cookies through the DevTools protocol without first loading the home
+# page; requests sessions are built once per process and reused by later
+# jobs. Cookies the site rotates during a session are written back to the jar
+# with save_from_driver() / save_from_session(), so HTTP and browser stay in sync.
+
+import argparse
+import json
+import os
+import pickle
+import sys
+import threading
+import time
+
+SESSION_DIR = os.path.join("output", "sessions")
+REFRESH_MARGIN_S = 24 * 3600
+PROBE_TTL_S = 30 * 60
+USER_AGENT = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 Chrome/120.0 Safari/537.36"
+
+SITES = {
+    "amazon": {
+        "home": "https://www.amazon.in/",
+        "cookie_file": "amazon_cookies.pkl",
+        # at-acbin / sess-at-acbin only exist for a signed-in session
+        "required": ["session-id", "ubid-acbin", "at-acbin"],
+        "probe": "https://www.amazon.in/gp/css/order-history",
+        "login_markers": ["/ap/signin"],
+        "warm_ttl": None,
+    },
+    "flipkart": {
+        "home": "https://www.flipkart.com/",
+        "cookie_file": os.path.join(SESSION_DIR, "flipkart_cookies.pkl"),
+        "required": [],
+        "probe": None,
+        "login_markers": [],
+        "warm_ttl": 6 * 3600,
+    },
+    "pricehistory": {
+        "home": "https://pricehistoryapp.com/",
+        "cookie_file": os.path.join(SESSION_DIR, "pricehistory_cookies.pkl"),
+        "required": [],
+        "probe": None,
+        "login_markers": [],
+        # anonymous site: cookies from a warm-up visit are reused for this long
+        "warm_ttl": 6 * 3600,
+    },
+}
+
+
+class SessionExpired(RuntimeError):
+    pass
+
+
+class SessionManager:
+    def __init__(self, site, cookie_file=None):
+        if site not in SITES:
+            raise ValueError(f"Unknown site '{site}'. Choose from: {', '.join(SITES)}")
+        self.site = site
+        self.config = dict(SITES[site])
+        self.cookie_file = cookie_file or self.config["cookie_file"]
+        self.status_file = self.cookie_file + ".status.json"
+        self._cookies = None
+        self._mtime = None
+        self._session = None
+        self._lock = threading.Lock()
+
+    # -------------------------------
+    # Jar
+    # -------------------------------
+    def cookies(self):
+        """Cookie dicts from the jar, re-read only when the file changed."""
+        try:
+            mtime = os.path.getmtime(self.cookie_file)
+        except OSError:
+            return []
+        if self._cookies is None or mtime != self._mtime:
+            with open(self.cookie_file, "rb") as f:
+                self._cookies = pickle.load(f)
+            self._mtime = mtime
+        return self._cookies
+
+    def _save(self, cookies):
+        os.makedirs(os.path.dirname(self.cookie_file) or ".", exist_ok=True)
+        tmp = self.cookie_file + ".tmp"
+        with open(tmp, "wb") as f:
+            pickle.dump(cookies, f)
+        os.replace(tmp, self.cookie_file)
+        self._cookies, self._mtime = cookies, os.path.getmtime(self.cookie_file)
+
+    def _merge(self, fresh):
+        merged = {(c["name"], c.get("domain"), c.get("path", "/")): c for c in self.cookies()}
+        for c in fresh:
+            key = (c["name"], c.get("domain"), c.get("path", "/"))
+            old = merged.get(key)
+            # a long-lived driver may still hold values the jar has since refreshed; keep the later expiry
+            if old is not None and old.get("expiry") is not None and c.get("expiry") is not None \
+                    and old["expiry"] > c["expiry"]:
+                continue
+            merged[key] = c
+        now = time.time()
+        self._save([c for c in merged.values() if c.get("expiry") is None or c["expiry"] > now])
+        self._write_status(warmed_at=time.time())
+
+    def _status(self):
+        try:
+            with open(self.status_file, encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _write_status(self, **values):
+        status = {**self._status(), **values}
+        os.makedirs(os.path.dirname(self.status_file) or ".", exist_ok=True)
+        with open(self.status_file, "w", encoding="utf-8") as f:
+            json.dump(status, f)
+
+    # -------------------------------
+    # Freshness
+    # -------------------------------
+    def local_check(self, now=None):
+        """(ok, reason) from the jar alone: required cookies present and not about to expire."""
+        now = time.time() if now is None else now
+        cookies = self.cookies()
+        if not cookies:
+            return False, "no cookies"
+        by_name = {c["name"]: c for c in cookies}
+        missing = [n for n in self.config["required"] if n not in by_name]
+        if missing:
+            return False, f"missing {', '.join(missing)}"
+        # anonymous sites carry short-lived cookies (__cf_bm lasts 30 min); warm_ttl governs those instead
+        for name in self.config["required"]:
+            expiry = by_name[name].get("expiry")
+            if expiry is not None and expiry - now < REFRESH_MARGIN_S:
+                return False, f"{name} expires in {(expiry - now) / 3600:.1f}h"
+        warm_ttl = self.config["warm_ttl"]
+        warmed_at = self._status().get("warmed_at")
+        if warm_ttl and (warmed_at is None or now - warmed_at > warm_ttl):
+            return False, "warm-up too old"
+        return True, "ok"
+
+    def probe(self, force=False):
+        """One request to a signed-in page; cached for PROBE_TTL_S. True when no login wall."""
+        if not self.config["probe"]:
+            return True
+        status = self._status()
+        if not force and status.get("probed_at") and time.time() - status["probed_at"] < PROBE_TTL_S \
+                and status.get("probe_mtime") == self._mtime:
+            return status["probe_ok"]
+        res = self.requests_session().get(self.config["probe"], timeout=20, allow_redirects=True)
+        ok = res.status_code == 200 and not any(m in res.url for m in self.config["login_markers"])
+        self._write_status(probed_at=time.time(), probe_ok=ok, probe_mtime=self._mtime)
+        return ok
+
+    def ensure_fresh(self, probe=False) -> bool:
+        """
+        Refreshes proactively when the jar is stale; raises SessionExpired if that
+        cannot fix it. Returns True when the jar was refreshed, so callers holding
+        a driver can attach() the new cookies.
+        """
+        refreshed = False
+        ok, reason = self.local_check()
+        if not ok:
+            self.refresh()
+            refreshed = True
+            ok, reason = self.local_check()
+        if ok and probe and not self.probe():
+            ok, reason = False, "login wall on probe page"
+        if not ok:
+            hint = " — run save_cookies.py to sign in again" if self.site == "amazon" else ""
+            raise SessionExpired(f"{self.site} session not usable: {reason}{hint}")
+        return refreshed
+
+    def refresh(self):
+        """
+        Visits the home page with the current jar and stores whatever the site sets.
+        Keeps anonymous sites warm and lets Amazon rotate its session cookies; an
+        expired sign-in still needs save_cookies.py.
+        """
+        with self._lock:
+            self._session = None
+        session = self.requests_session(warm=False)
+        session.get(self.config["home"], timeout=20)
+        self.save_from_session(session)
+
+    # -------------------------------
+    # Consumers
+    # -------------------------------
+    def requests_session(self, warm=True):
+        """Process-wide requests.Session carrying the jar; built once and reused by later jobs."""
+        import requests
+
+        with self._lock:
+            if self._session is not None:
+                return self._session
+            session = requests.Session()
+            session.headers["User-Agent"] = USER_AGENT
+            for c in self.cookies():
+                session.cookies.set(c["name"], c["value"], domain=c.get("domain"), path=c.get("path", "/"))
+            self._session = session
+        if warm and self.config["warm_ttl"] and not self.local_check()[0]:
+            session.get(self.config["home"], timeout=20)
+            self.save_from_session(session)
+        return session
+
+    def attach(self, driver):
+        """Loads the jar into a driver without navigating first (CDP), else via the home page."""
+        cookies = self.cookies()
+        params = []
+        for c in cookies:
+            p = {k: c[k] for k in ("name", "value", "domain", "path", "secure", "httpOnly", "sameSite") if k in c}
+            if "expiry" in c:
+                p["expires"] = c["expiry"]
+            params.append(p)
+        try:
+            driver.execute_cdp_cmd("Network.enable", {})
+            driver.execute_cdp_cmd("Network.setCookies", {"cookies": params})
+        except Exception:
+            driver.get(self.config["home"])
+            for c in cookies:
+                c = {k: v for k, v in c.items() if k != "expiry"}  # avoid datetime serialization issues
+                driver.add_cookie(c)
+        return len(cookies)
+
+    def save_from_driver(self, driver):
+        self._merge(driver.get_cookies())
+
+    def save_from_session(self, session):
+        fresh = []
+        for c in session.cookies:
+            cookie = {"name": c.name, "value": c.value, "domain": c.domain, "path": c.path, "secure": c.secure}
+            if c.expires:
+                cookie["expiry"] = int(c.expires)
+            fresh.append(cookie)
+        self._merge(fresh)
+
+
+_MANAGERS = {}
+_MANAGERS_LOCK = threading.Lock()
+
+
+def get_session_manager(site) -> SessionManager:
+    """Per-process manager for a site, so warm sessions survive across jobs."""
+    with _MANAGERS_LOCK:
+        if site not in _MANAGERS:
+            _MANAGERS[site] = SessionManager(site)
+        return _MANAGERS[site]
+
+
+def parse_args(argv=None):
+    p = argparse.ArgumentParser(description="Shared cookie jars for requests and Selenium.")
+    p.add_argument("cmd", choices=["status", "check", "refresh"])
+    p.add_argument("site", choices=sorted(SITES))
+    return p.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    manager = get_session_manager(args.site)
+    if args.cmd == "refresh":
+        manager.refresh()
+    ok, reason = manager.local_check()
+    print(f"[session] {args.site}: {len(manager.cookies())} cookies, local check: {reason}")
+    if args.cmd == "check" and ok:
+        ok = manager.probe(force=True)
+        print(f"[session] {args.site}: probe {'ok' if ok else 'hit a login wall'}")
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())